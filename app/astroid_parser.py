@@ -8,12 +8,10 @@ import json
 from skimage.feature import peak_local_max
 import numpy as np
 import cv2 
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')
 
 # project
 from app.blueprint_composer import blueprint_to_json, create_empty_blueprint_json, create_miner_json, json_to_blueprint, PREFIX
+from app.plotting import new_figure, figure_to_png
 
 def template_matching(img_bgr: np.ndarray, x: int, y: int, w: int, h: int, peak_threshold_rel: float):
     # get template
@@ -153,16 +151,13 @@ class AstroidParser:
             simple_coordinates = peaks_to_simple_coordinate(np.array(peaks), min(w, h) // 2)
 
             # plot and store as image buffer
-            plt.clf()
+            figure = new_figure()
+            ax = figure.add_subplot()
             if simple_coordinates.size > 0:
-                plt.scatter(simple_coordinates[:, 0], simple_coordinates[:, 1], marker='s', c='lightgrey')
-                plt.axis('equal')
+                ax.scatter(simple_coordinates[:, 0], simple_coordinates[:, 1], marker='s', c='lightgrey')
+                ax.axis('equal')
 
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight')
-            plt.close()
-            buffer.seek(0)
-            self.simple_coordinate_image_buffer = buffer
+            self.simple_coordinate_image_buffer = figure_to_png(figure)
             self.simple_coordinate_image_updated = True
             
             # store simple coordinates
@@ -331,28 +326,24 @@ def parse_using_blueprint_and_return_image(blueprint: str = "") -> BytesIO:
         raise ValueError("No nodes found in the blueprint.")
         
     # plot and store as image buffer
-    plt.clf()
+    figure = new_figure()
+    ax = figure.add_subplot()
     if nodes:
         xs, ys = zip(*nodes)
-        plt.scatter(xs, ys, marker='s', c='lightgrey')
+        ax.scatter(xs, ys, marker='s', c='lightgrey')
         x_min = min(xs)
         x_max = max(xs)
         y_min = min(ys)
         y_max = max(ys)
-        plt.xlim(x_min - 5, x_max + 5)
-        plt.axis('equal')
-        plt.xlabel("X Coordinate")
-        plt.ylabel("Y Coordinate")
-        plt.xticks(np.arange(x_min - 5, x_max + 6, 1))
-        plt.yticks(np.arange(y_min - 5, y_max + 6, 1))
-        plt.grid(True)
+        ax.set_xlim(x_min - 5, x_max + 5)
+        ax.axis('equal')
+        ax.set_xlabel("X Coordinate")
+        ax.set_ylabel("Y Coordinate")
+        ax.set_xticks(np.arange(x_min - 5, x_max + 6, 1))
+        ax.set_yticks(np.arange(y_min - 5, y_max + 6, 1))
+        ax.grid(True)
 
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight')
-    plt.close()
-    buffer.seek(0)
-    
-    return buffer
+    return figure_to_png(figure)
 
 # if __name__ == "__main__":
 #     # example usage
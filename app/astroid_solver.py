@@ -1,22 +1,61 @@
 # system
-from typing import List, Tuple, Dict, Optional
-from collections import defaultdict
-from pathlib import Path
+from typing import List, Tuple, Optional, Callable, Iterator
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import threading
+import copy
+import os
+from time import time
+import logging
+logger = logging.getLogger(__name__)
 
 # third party
 from ortools.sat.python import cp_model
-from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
 import cv2
 import numpy as np
 
 # project
-from app.astroid_parser import astroid_parser
-from app.var_to_txt import var_to_txt, FakeVar
-from app.blueprint_composer import compose_blueprint
+from app.var_to_txt import var_to_txt
+from app.solution import Solution, Edges, DIRECTIONS, node_keys
+from app.blueprint_composer import compose_blueprint, stream_blueprint, GZIP_LEVEL
 from app.astroid_parser import get_brush_blueprint, parse_using_blueprint
+from app.greedy_layout import greedy_layout, MINER_MAX_FLOW
+from app.plotting import new_figure, figure_to_png
 
-DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+# weight of a miner with a flow of 1, 2, 3 and 4 in the saturation objective
+SATURATION_WEIGHTS = [1, 100, 10000, 1000000]
+NODE_BYTES = 128  # a source node in nodes_to_extract, a tuple of two ints in a list
+
+class SolverParameters:
+    """
+    CP-SAT parameters applied to every solve of the AstroidSolver.
+    
+    Args:
+        num_search_workers (int): Number of parallel search workers, 0 lets CP-SAT use all cores.
+        search_branching (str): Name of a CP-SAT search branching, e.g. "AUTOMATIC_SEARCH" or "PORTFOLIO_SEARCH".
+        presolve_level (int): 0 disables presolve, 1 presolves without probing, 2 is the full CP-SAT presolve.
+        linearization_level (int): 0 to 2, how much of the model is added to the LP relaxation.
+        random_seed (int): Seed of the search, use a fixed value for reproducible runs.
+    """
+    def __init__(self, num_search_workers: int = 0, search_branching: str = "AUTOMATIC_SEARCH", presolve_level: int = 2, linearization_level: int = 1, random_seed: int = 1):
+        self.num_search_workers = num_search_workers
+        self.search_branching = search_branching
+        self.presolve_level = presolve_level
+        self.linearization_level = linearization_level
+        self.random_seed = random_seed
+    
+    def apply(self, solver: cp_model.CpSolver) -> None:
+        solver.parameters.num_workers = max(0, self.num_search_workers)
+        solver.parameters.search_branching = getattr(cp_model, self.search_branching)
+        solver.parameters.cp_model_presolve = self.presolve_level > 0
+        solver.parameters.cp_model_probing_level = 0 if self.presolve_level < 2 else 2
+        solver.parameters.linearization_level = min(max(self.linearization_level, 0), 2)
+        solver.parameters.random_seed = self.random_seed
+    
+    def __repr__(self):
+        return f"SolverParameters(num_search_workers={self.num_search_workers}, search_branching={self.search_branching}, presolve_level={self.presolve_level}, linearization_level={self.linearization_level}, random_seed={self.random_seed})"
 
 class AstroidSolver:
     def __init__(self):
@@ -26,19 +65,106 @@ class AstroidSolver:
         # default blueprint
         self.default_blueprint = "SHAPEZ2-2-H4sIAN0dd2cA/6xaXW+bMBT9L9Ye0YTNl0Haw7J2UrVEqtqs2jRVE0qcDo1C5JBtUZX/PhIMNRCofU37ELXhnHt8fX2uDbygBxRhbHsWmt2i6AW9Kw5bhiJ0s0vjbI0sdLPKs9MXV3ERo+gHSsq/o+rb2zResWeWFeVl53+n8SHfF+/n54+f97/iLVskGePIyvZpKi66ft4WB/R4tNB1VvCE7UrWF7QsY17AoZksarZP0nWSPQ3JKgUVm5w/70TAKuruxBfd7avfXuRvKPIt9B1FZQ7uUORYZy3X/woer4qcX7FNvE+Lm6xgPIvTh5gncTnio3VGBmAklZBYCxmCkZVaV1Y7Y2khQHO26QIXCec5Z+uawO8TzJNNgb9uFcBN9HmjW4r+Oed/Y74ezRYMizF4kgRUccA9sbXM25wX9yxbM95FWOhTec2Xj+efD01Y5xLDHVux5M8QRwl/xRNwiYjQIKgLz7MrD3jB+BPjZJnj+Rslhb1uotRrWWBbI9WsR38Aq7wYKgKiGdwfxY4UpqgLA9liQcB0Y9sAHPalD9dJp5p90BxXEQOD+jiFV7XadmEIJKwyBsEqE2ybxA8vDFt9NQs0GUia0tBdcFsEQakMdQBtHAQVgj31ddzJUgv5dkN7jQdu3UCw8BvQ3NRYxcF2q/FVt2Eb71Jo93FQjdTBXXg7hmXdbQ1awaO9XpYUOpl3YXTqVUXA9lwXFcwf60lxYLK9AYPULkxPam0OuDq9CQbT2gxUxbI8HwDHywuy+XEN+rlQS1smMotXv8cwbo2pjA8oOJTwGLBGQpjx+ibgRjlcM1AtRCeVdd5v06Qor8bL3BlfxVSe0lNJkNEmKlBVRgkgNW4bD6lfINg3ARNp2RG4ZwXDNBqW5Yx6gPIdkEDzGEJk4zZOwmUe7SwMbrTf3j8S2AZfoLHBBp+C7Nsf9SOlg4Wt3KICeZRYp2METajG8R34zYVasoKjBVJ+nJah6SiGm1otVXsrZMOsTB/ndqYGqhbeiqFotzNFBsqJkXICOzja5gcwG+qUdCDzBkL6REA5ZCo54D4SNizgu2sYq+/8bbn3aPlqDcWmxioRqe4VbTlJWt7aVg0xV9xSC6oU/yKFxl4Dd1I/gRKTJdTWQ6bSA9+LBfLBUkXI4qkjJOiefYAMOk47RIGNKahuoQznYxIeffMfyc0kRFS3dEczRKbKEJkqQwZEocEZITQ4IwirvnCrRqtBUcnpTfpTaw2pN6mg3x7P8q/yv5nyAIBNiho7MTVsCXSiDkUnaVB0ov5EDduT3X7xAvxM0O0vDYU9X/Oqy8gdUMXHxoYMgQFDvZHzjLPYonA004jd0e2v6pNdUwpiToHNKWxjitCYoeUUo9P4aKFZksX88MD4Ljm9+XZ6Z+94fDwe/wsgwABYhMLTwicAAA==$"
         
-        # solution flag
+        # cp-sat parameters
+        self.solver_parameters = SolverParameters()
+        
+        # fields with more tiles than window_min_tiles and larger than the window size are solved window by window
+        # (None solves the whole field at once)
+        self.window_size : Optional[int] = None
+        self.window_min_tiles : int = 0
+        
+        # after an edit of the asteroid, only the tiles within incremental_radius of the edited tiles are re-optimized
+        self.incremental_radius : int = 3
+        self.previous_layout : Optional[dict] = None
+        self.previous_nodes : set = set()
+        self.previous_with_elevator : Optional[bool] = None
+        self.solved_with_elevator : Optional[bool] = None
+        
+        # called with a snapshot of the improving solutions while solving, at most every incumbent_interval seconds
+        # (a dict with the phase, the objective of the search in that phase, num_miners, num_extenders, time and layout as in get_layout)
+        self.incumbent_callback : Optional[Callable[[dict], None]] = None
+        self.incumbent_interval : float = 1.0
+        self.last_incumbent_time = 0.0
+        self.solve_start_time = 0.0
+        self.incumbent_num_extractors = 0
+        
+        # structured telemetry of the last run_solver, see record_search and record_incumbent
+        self.metrics : dict = {}
+        self.model_build_time = 0.0
+        self.presolve_time : Optional[float] = None
+        
+        # set by stop, the running search and the remaining phases are skipped
+        # (component_stop_event stops the searches of the cluster processes of run_components)
+        self.stopped = False
+        self.current_solver : Optional[cp_model.CpSolver] = None
+        self.component_stop_event = None
+        
+        # the variable indices and edges of each kind, see get_variable_edges
+        self.variable_edges = None
+        
+        # the model of the last add_astroid_locations and its source nodes, see release_model
+        self.model : Optional[cp_model.CpModel] = None
+        self.nodes_to_extract : List[tuple] = []
+        
+        # the last solution, and its flag (solution_version changes with every new solution, for caching its results)
+        self.solution : Optional[Solution] = None
+        self.solution_version = 0
         self.has_solution = False
 
-    def add_astroid_locations(self, astroid_location: np.ndarray) -> None:        
-        # list of all nodes (the box around asteroid location and a border of 1 around it as sinks)
-        x_min = min(x for x, y in astroid_location) - 1
-        x_max = max(x for x, y in astroid_location) + 1
-        y_min = min(y for x, y in astroid_location) - 1
-        y_max = max(y for x, y in astroid_location) + 1
-        nodes = [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+    def add_astroid_locations(self, astroid_location: np.ndarray, with_elevator: bool = True, decompose: bool = True) -> None:        
+        build_start_time = time()
+        
+        # keep the previous solution for an incremental re-solve
+        if self.has_solution:
+            self.previous_layout = self.get_layout()
+            self.previous_nodes = set(self.nodes_to_extract)
+            self.previous_with_elevator = self.solved_with_elevator
+        
+        # ----------------------------------------------------------
+        # index the nodes
+        # ----------------------------------------------------------
+        
+        # list of source nodes (the asteroid tiles)
+        sources = np.unique(np.asarray(astroid_location, dtype=np.int64).reshape(-1, 2), axis=0)
+        num_sources = len(sources)
+        
+        # separate asteroid clusters are solved as independent subproblems in run_solver
+        components = find_connected_components(sources) if decompose else [sources]
+        if len(components) > 1:
+            logger.info(f"[Model] {num_sources} tiles in {len(components)} clusters, building one model per cluster")
+            self.components = components
+            self.with_elevator = with_elevator
+            self.nodes_to_extract = [tuple(node) for node in sources.tolist()]
+            self.model = None
+            self.model_stats = None
+            self.model_build_time = time() - build_start_time
+            return
+        self.components = None
+        
+        # the box around asteroid location and a border of 1 around it as sinks
+        x_min, y_min = sources.min(axis=0) - 1
+        x_max, y_max = sources.max(axis=0) + 1
+        
+        # grid lookup from node to source index (-1 for sink nodes)
+        source_index = np.full((x_max - x_min + 1, y_max - y_min + 1), -1, dtype=np.int64)
+        source_index[sources[:, 0] - x_min, sources[:, 1] - y_min] = np.arange(num_sources)
+        
+        # edges from every source to its 4 neighbours, edge e goes from source e // 4 in DIRECTIONS[e % 4]
+        # (only sources can host something, so sink nodes have no out going edges)
+        edge_source = np.repeat(np.arange(num_sources), len(DIRECTIONS))
+        edge_start = sources[edge_source]
+        edge_end = edge_start + np.tile(np.array(DIRECTIONS, dtype=np.int64), (num_sources, 1))
+        edge_end_source = source_index[edge_end[:, 0] - x_min, edge_end[:, 1] - y_min]
+        num_edges = len(edge_start)
+        
+        # in going edges of every source
+        in_edge_order = np.argsort(edge_end_source, kind="stable")
+        in_edge_order = in_edge_order[edge_end_source[in_edge_order] >= 0]
+        in_edge_split = np.cumsum(np.bincount(edge_end_source[in_edge_order], minlength=num_sources))[:-1]
+        source_in_edges = np.split(in_edge_order, in_edge_split)
         
-        # list of source nodes
-        nodes_to_extract = [(x, y) for x, y in astroid_location]
+        # edges that can host an extender (an extender must point to another extractor, never to a sink)
+        extender_edges = np.flatnonzero(edge_end_source >= 0)
         
         # ----------------------------------------------------------
         # initialize the model
@@ -49,295 +175,695 @@ class AstroidSolver:
         # create some variables to use later
         # ----------------------------------------------------------
         
-        all_extender_platforms = []
-        all_miner_platforms = []
-        all_belts = []
-        all_flows = []
+        # one variable of each kind per edge, variable i belongs to edge i
+        all_belts = [model.NewBoolVar("") for _ in range(num_edges)]
+        all_flows = [model.NewIntVar(0, self.BELT_MAX_FLOW, "") for _ in range(num_edges)]
+        all_miner_platforms = [model.NewBoolVar("") for _ in range(num_edges)]
+        flow_greater_than_zero = [model.NewBoolVar("") for _ in range(num_edges)]
         
-        node_extenders : Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
-        node_miners : Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
-        node_belts : Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
-        node_flow_out : Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
-        node_flow_in : Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
-        node_used_by_elevator : Dict[Tuple[int, int], cp_model.IntVar] = {}
+        # extenders only for the edges where they can be placed, variable i belongs to edge extender_edges[i]
+        all_extender_platforms = [model.NewBoolVar("") for _ in range(len(extender_edges))]
+        edge_extender = [None] * num_edges
+        for e, extender in zip(extender_edges.tolist(), all_extender_platforms):
+            edge_extender[e] = extender
         
-        flow_to_list_of_things_in_the_same_direction : Dict[cp_model.IntVar, List[cp_model.IntVar]] = defaultdict(list)
+        # one variable of each kind per source
+        node_used_by_elevator = [model.NewBoolVar("") for _ in range(num_sources)] if with_elevator else []
+        node_used_by_belt = [model.NewBoolVar("") for _ in range(num_sources)]
+        node_used_by_extractor = [model.NewBoolVar("") for _ in range(num_sources)]
+        node_used_by_something = [model.NewBoolVar("") for _ in range(num_sources)]
+        node_is_miner_and_flow_is = [[model.NewBoolVar("") for _ in range(4)] for _ in range(num_sources)]
         
-        for node in nodes_to_extract:            
-            for direction in DIRECTIONS:
-                end_node = (node[0] + direction[0], node[1] + direction[1])
-                
-                # skip if end node is out of bounds
-                if end_node[0] < x_min or end_node[0] > x_max or end_node[1] < y_min or end_node[1] > y_max:
-                    continue
-                                        
-                # create a variable to represent if a belt is placed at the node
-                belt_var_name = f"belt_{node[0]}_{node[1]}_{end_node[0]}_{end_node[1]}"
-                belt_var = model.NewBoolVar(belt_var_name)
-                all_belts.append(belt_var)
-                node_belts[node].append(belt_var)
-                
-                # create a variable to represent the flow of resources from the node to the end node
-                flow_var_name = f"flow_{node[0]}_{node[1]}_{end_node[0]}_{end_node[1]}"
-                flow_var = model.NewIntVar(0, self.BELT_MAX_FLOW, flow_var_name)
-                all_flows.append(flow_var)
-                node_flow_out[node].append(flow_var)
-                node_flow_in[end_node].append(flow_var)
-                
-                flow_to_list_of_things_in_the_same_direction[flow_var].append(belt_var)
-                
-                # create extractor platform if node is in the list of nodes to extract
-                if node in nodes_to_extract:
-                    # create a variable to represent if a miner is placed at the node
-                    miner_var_name = f"miner_{node[0]}_{node[1]}_{end_node[0]}_{end_node[1]}"
-                    miner_var = model.NewBoolVar(miner_var_name)
-                    all_miner_platforms.append(miner_var)
-                    node_miners[node].append(miner_var)
-                    
-                    flow_to_list_of_things_in_the_same_direction[flow_var].append(miner_var)
-                    
-                    # create a variable to represent if a extender platform is placed at the node
-                    var_name = f"extender_{node[0]}_{node[1]}_{end_node[0]}_{end_node[1]}"
-                    extender_var = model.NewBoolVar(var_name)
-                    all_extender_platforms.append(extender_var)
-                    node_extenders[node].append(extender_var)
-                    
-                    flow_to_list_of_things_in_the_same_direction[flow_var].append(extender_var)
-        
-        # node_used_by_elevator
-        for node in nodes:
-            if node in nodes_to_extract:
-                # create a variable to represent if an elevator is placed at the node
-                elevator_var_name = f"elevator_{node[0]}_{node[1]}"
-                elevator_var = model.NewBoolVar(elevator_var_name)
-                node_used_by_elevator[node] = elevator_var
-            else:
-                # create a dummy variable for elevator if node is not in nodes_to_extract
-                elevator_var = model.NewBoolVar(f"dummyelevator_{node[0]}_{node[1]}")
-                model.Add(elevator_var == 0)
-                node_used_by_elevator[node] = elevator_var
-        
-        # node is miner
-        node_used_by_miner = {}
-        for node in nodes:
-            node_used_by_miner[node] = model.NewBoolVar(f"node_used_by_miner_{node[0]}_{node[1]}")
-            miners_list = node_miners.get(node, [])
-            if miners_list:
-                model.AddMaxEquality(node_used_by_miner[node], miners_list)
-            else:
-                model.Add(node_used_by_miner[node] == 0)
-                
-        # node is miner and is saturated
-        node_is_miner_and_flow_is = {}
-        for node in nodes:
-            for k in [1, 2, 3, 4]:
-                var_name = f"node_is_miner_and_flow_is_{node[0]}_{node[1]}_{k}"
-                var = model.NewBoolVar(var_name)
-                node_is_miner_and_flow_is[(node[0], node[1], k)] = var
-                
-                # make sure node is miner
-                model.Add(var <= node_used_by_miner[node])
-                
-                # make sure flow is k
-                if node_flow_out[node]:
-                    model.Add(sum(node_flow_out[node]) == k).OnlyEnforceIf(var)
-                else:
-                    model.Add(var == 0)
-        
-        # encourage more saturated miners
-        more_saturated_miner_objective = sum(
-            1000000 * node_is_miner_and_flow_is[(n[0], n[1], 4)] +
-            10000 * node_is_miner_and_flow_is[(n[0], n[1], 3)] +
-            100 * node_is_miner_and_flow_is[(n[0], n[1], 2)] +
-            1 * node_is_miner_and_flow_is[(n[0], n[1], 1)] 
-            for n in nodes)
-                            
         # ----------------------------------------------------------
         # set objective of the problem
         # ----------------------------------------------------------
-                    
-        # set first objective to maximize the number of extractors used
-        # set second objective to minimize the number of belts used
-        primary_objective = sum(all_miner_platforms + all_extender_platforms)
-        model.Maximize(1_000_000_000 * primary_objective + more_saturated_miner_objective)
+        
+        # first objective is to maximize the number of extractors used
+        # second objective is to maximize the number of saturated miners
+        # (the objectives are set in run_solver, one phase at a time)
+        primary_objective = cp_model.LinearExpr.Sum(all_miner_platforms + all_extender_platforms)
+        more_saturated_miner_objective = cp_model.LinearExpr.WeightedSum(
+            [var for flow_is in node_is_miner_and_flow_is for var in flow_is],
+            SATURATION_WEIGHTS * num_sources)
         
         # ----------------------------------------------------------
         # add constraints for the problem
         # ----------------------------------------------------------
         
-        # create - is_node_used_by_belt
-        node_used_by_belt = {}
-        for node in nodes:
-            var_name = f"node_used_by_belt_{node[0]}_{node[1]}"
-            node_used_by_belt_var = model.NewBoolVar(var_name)
-            node_used_by_belt[node] = node_used_by_belt_var
-            belts_list = node_belts.get(node, [])
-            if belts_list:
-                model.AddMaxEquality(node_used_by_belt_var, belts_list)
-            else:
-                model.Add(node_used_by_belt_var == 0)
-        
-        # create - is_node_used_by_extractor
-        node_used_by_extractor = {}
-        for node in nodes:
-            var_name = f"node_used_by_extractor_{node[0]}_{node[1]}"
-            node_used_by_extractor_var = model.NewBoolVar(var_name)
-            node_used_by_extractor[node] = node_used_by_extractor_var
-            extractors_list = node_miners.get(node, []) + node_extenders.get(node, [])
-            if extractors_list:
-                model.AddMaxEquality(node_used_by_extractor_var, extractors_list)
+        for s in range(num_sources):
+            out_edges = range(s * len(DIRECTIONS), (s + 1) * len(DIRECTIONS))
+            belts_list = [all_belts[e] for e in out_edges]
+            miners_list = [all_miner_platforms[e] for e in out_edges]
+            extenders_list = [edge_extender[e] for e in out_edges if edge_extender[e] is not None]
+            out_flow = cp_model.LinearExpr.Sum([all_flows[e] for e in out_edges])
+            in_flow = cp_model.LinearExpr.Sum([all_flows[e] for e in source_in_edges[s]])
+            
+            # create - is_node_used_by_belt / extractor / something
+            model.AddMaxEquality(node_used_by_belt[s], belts_list)
+            model.AddMaxEquality(node_used_by_extractor[s], miners_list + extenders_list)
+            if with_elevator:
+                model.AddMaxEquality(node_used_by_something[s], [node_used_by_belt[s], node_used_by_extractor[s], node_used_by_elevator[s]])
             else:
-                model.Add(node_used_by_extractor_var == 0)
-        
-        # create - is node used by something
-        node_used_by_something = {}
-        for node in nodes:
-            var_name = f"node_used_by_something_{node[0]}_{node[1]}"
-            node_used_by_something_var = model.NewBoolVar(var_name)
-            node_used_by_something[node] = node_used_by_something_var
-            model.AddMaxEquality(node_used_by_something_var, [node_used_by_belt[node], node_used_by_extractor[node], node_used_by_elevator[node]])
-        
-        # constraint - XOR(belt, extender, miner, elevator)
-        for node in nodes:
-            # add constraint that only one thing can be at the node
-            sum_of_things = node_used_by_belt[node] + sum(node_extenders.get(node, [])) + sum(node_miners.get(node, [])) + node_used_by_elevator[node]
-            model.Add(sum_of_things <= 1)
-        
-        # constraint - flow input and output
-        for node in nodes:
-            in_flow = sum(node_flow_in[node]) if node_flow_in[node] else 0
-            out_flow = sum(node_flow_out[node]) if node_flow_out[node] else 0
-
+                model.AddMaxEquality(node_used_by_something[s], [node_used_by_belt[s], node_used_by_extractor[s]])
+            
+            # node is miner and is saturated
+            for k, var in enumerate(node_is_miner_and_flow_is[s], start=1):
+                # make sure node is miner (at most one miner per node)
+                model.Add(var <= cp_model.LinearExpr.Sum(miners_list))
+                
+                # make sure flow is k
+                model.Add(out_flow == k).OnlyEnforceIf(var)
+            
+            # constraint - XOR(belt, extender, miner, elevator)
+            things = [node_used_by_belt[s]] + extenders_list + miners_list
+            if with_elevator:
+                things.append(node_used_by_elevator[s])
+            model.Add(cp_model.LinearExpr.Sum(things) <= 1)
+            
+            # constraint - flow input and output
             # used by belt (in = out)
-            model.Add(out_flow - in_flow == 0).OnlyEnforceIf(node_used_by_belt[node])
+            model.Add(out_flow - in_flow == 0).OnlyEnforceIf(node_used_by_belt[s])
             
             # used by extractor (out = in + 1)
-            model.Add(out_flow - in_flow == 1).OnlyEnforceIf(node_used_by_extractor[node])
+            model.Add(out_flow - in_flow == 1).OnlyEnforceIf(node_used_by_extractor[s])
             
-            # used by elevator, no out flow
-            model.Add(out_flow == 0).OnlyEnforceIf(node_used_by_elevator[node])
+            # not used by something (in = out = 0)
+            model.Add(out_flow == 0).OnlyEnforceIf(node_used_by_something[s].Not())
+            model.Add(in_flow == 0).OnlyEnforceIf(node_used_by_something[s].Not())
             
-            # if node is in nodes to extract and has nothing in it, should have zero out flow and zero in flow
-            if node in nodes_to_extract:
-                # not used by something (in = out = 0)
-                model.Add(out_flow == 0).OnlyEnforceIf(node_used_by_something[node].Not())
-                model.Add(in_flow == 0).OnlyEnforceIf(node_used_by_something[node].Not())
-        
-        # constraint - max flow
-        for node in nodes:
-            out_flow = sum(node_flow_out[node]) if node_flow_out[node] else 0
+            # constraint - max flow
             # extractor - 4
-            model.Add(out_flow <= 4).OnlyEnforceIf(node_used_by_extractor[node])
+            model.Add(out_flow <= 4).OnlyEnforceIf(node_used_by_extractor[s])
             
             # belt - self.BELT_MAX_FLOW
-            model.Add(out_flow <= self.BELT_MAX_FLOW).OnlyEnforceIf(node_used_by_belt[node])
+            model.Add(out_flow <= self.BELT_MAX_FLOW).OnlyEnforceIf(node_used_by_belt[s])
             
-        # create - flow greater than zero
-        flow_greater_than_zero = {}
-        for flow in all_flows:
-            var_name = f"flow_greater_than_zero_{flow.Name()}"
-            flow_greater_than_zero_var = model.NewBoolVar(var_name)
-            flow_greater_than_zero[flow] = flow_greater_than_zero_var
-            model.Add(flow >= 1).OnlyEnforceIf(flow_greater_than_zero_var)
-            model.Add(flow == 0).OnlyEnforceIf(flow_greater_than_zero_var.Not())
+            if with_elevator:
+                # used by elevator, no out flow
+                model.Add(out_flow == 0).OnlyEnforceIf(node_used_by_elevator[s])
+                
+                # if node is elevator, only one in flow direction is allowed
+                in_flows_gt_zero = [flow_greater_than_zero[e] for e in source_in_edges[s]]
+                if in_flows_gt_zero:
+                    model.Add(cp_model.LinearExpr.Sum(in_flows_gt_zero) <= 1).OnlyEnforceIf(node_used_by_elevator[s])
+        
+        for e in range(num_edges):
+            flow = all_flows[e]
+            things_in_flow_direction = [all_belts[e], all_miner_platforms[e]]
+            if edge_extender[e] is not None:
+                things_in_flow_direction.append(edge_extender[e])
             
+            # create - flow greater than zero
+            model.Add(flow >= 1).OnlyEnforceIf(flow_greater_than_zero[e])
+            model.Add(flow == 0).OnlyEnforceIf(flow_greater_than_zero[e].Not())
             
-        # if have flow value, something must be in the same direction
-        for outflow in all_flows:        
-            # get the list of things in the same direction
-            flow_greater_than_zero_var = flow_greater_than_zero.get(outflow, None)
-            things_in_flow_direction = flow_to_list_of_things_in_the_same_direction.get(outflow, [])
+            # if have flow value, something must be in the same direction
+            model.Add(cp_model.LinearExpr.Sum(things_in_flow_direction) >= 1).OnlyEnforceIf(flow_greater_than_zero[e])
             
-            # add the constraint only if flow_greater_than_zero_var is not None
-            if flow_greater_than_zero_var is not None:
-                if things_in_flow_direction:
-                    model.Add(sum(things_in_flow_direction) >= 1).OnlyEnforceIf(flow_greater_than_zero_var)
-                else:
-                    model.Add(flow_greater_than_zero_var == 0)
+            end = edge_end_source[e]
+            if end >= 0:
+                # if extender is true, the end node must have extender or miner
+                model.Add(node_used_by_extractor[end] == 1).OnlyEnforceIf(edge_extender[e])
                 
-        # if extender is true, the end node must have extender or miner
-        for extender in all_extender_platforms:
-            # get the start and end nodes of the extender
-            var_parts = extender.Name().split('_')
-            start_node = (int(var_parts[1]), int(var_parts[2]))
-            end_node = (int(var_parts[3]), int(var_parts[4]))
-            
-            # add the constraint
-            model.Add(node_used_by_extractor[end_node] == 1).OnlyEnforceIf(extender)
+                # if miner is true, the end node must not be used by extractor
+                model.Add(node_used_by_extractor[end] == 0).OnlyEnforceIf(all_miner_platforms[e])
                 
-        # if miner is true, the end node must not be used by extractor
-        for miner in all_miner_platforms:
-            # get the start and end nodes of the miner
-            var_parts = miner.Name().split('_')
-            start_node = (int(var_parts[1]), int(var_parts[2]))
-            end_node = (int(var_parts[3]), int(var_parts[4]))
-            
-            # add the constraint
-            model.Add(node_used_by_extractor[end_node] == 0).OnlyEnforceIf(miner)
-        
-        # if belt is true, the end node must not have extractor
-        for belt in all_belts:
-            # get the start and end nodes of the belt
-            var_parts = belt.Name().split('_')
-            start_node = (int(var_parts[1]), int(var_parts[2]))
-            end_node = (int(var_parts[3]), int(var_parts[4]))
-            
-            # add the constraint
-            model.Add(node_used_by_extractor[end_node] == 0).OnlyEnforceIf(belt)
+                # if belt is true, the end node must not have extractor
+                model.Add(node_used_by_extractor[end] == 0).OnlyEnforceIf(all_belts[e])
+        
+        # ----------------------------------------------------
+        # model size
+        # ----------------------------------------------------
         
-        # if node is elevator, only one in flow direction is allowed
-        for node in nodes_to_extract:
-            in_flows_gt_zero = [flow_greater_than_zero[flow] for flow in node_flow_in[node]] if node_flow_in[node] else []
-            if in_flows_gt_zero:
-                model.Add(sum(in_flows_gt_zero) <= 1).OnlyEnforceIf(node_used_by_elevator[node])
+        # estimated variables and constraints that are not created compared to a model with every variable for every node
+        # and edge (counted from the sizes below, not measured on such a model):
+        # - extenders pointing to a sink (fixed to 0)
+        # - node used by miner (replaced by the sum of miners, 1 max equality each)
+        # - elevators when they are not allowed (out flow, in flows and fix to 0 constraints)
+        num_sink_edges = num_edges - len(extender_edges)
+        num_sources_with_in_edges = int(np.count_nonzero(np.bincount(edge_end_source[edge_end_source >= 0], minlength=num_sources)))
+        pruned_variables = num_sink_edges + num_sources
+        pruned_constraints = num_sink_edges + num_sources
+        if not with_elevator:
+            pruned_variables += num_sources
+            pruned_constraints += 2 * num_sources + num_sources_with_in_edges
+        
+        proto = model.Proto()
+        self.model_stats = {
+            "variables": len(proto.variables),
+            "constraints": len(proto.constraints),
+            "estimated_variables_before_pruning": len(proto.variables) + pruned_variables,
+            "estimated_constraints_before_pruning": len(proto.constraints) + pruned_constraints,
+        }
+        logger.info(f"[Model] {num_sources} tiles, "
+                    f"variables: {self.model_stats['variables']} (estimated {self.model_stats['estimated_variables_before_pruning']} before pruning), "
+                    f"constraints: {self.model_stats['constraints']} (estimated {self.model_stats['estimated_constraints_before_pruning']} before pruning)")
         
         # ----------------------------------------------------
         # store the model
         # ----------------------------------------------------
         self.model = model
+        self.model_build_time = time() - build_start_time
+        self.variable_edges = None
         self.all_extender_platforms = all_extender_platforms
         self.all_miner_platforms = all_miner_platforms
         self.all_belts = all_belts
-        self.nodes_to_extract = nodes_to_extract
-        self.node_flow_in = node_flow_in   
-        self.node_flow_out = node_flow_out
-        self.node_used_by_elevator = node_used_by_elevator     
+        self.all_flows = all_flows
+        self.nodes_to_extract = [tuple(node) for node in sources.tolist()]
+        self.node_used_by_elevator = dict(zip(self.nodes_to_extract, node_used_by_elevator))
+        self.primary_objective = primary_objective
+        self.saturation_objective = more_saturated_miner_objective
+        
+        # edge arrays, used to map variables back to nodes without parsing names
+        self.edge_start = edge_start
+        self.edge_end = edge_end
+        self.extender_edges = extender_edges
+        
+    def run_solver(self, miners_timelimit : float = 5.0, saturation_timelimit : float = 5.0, with_elevator : bool = False, log_callback = None, solver_parameters : Optional[SolverParameters] = None) -> None:
+        if solver_parameters is not None:
+            self.solver_parameters = solver_parameters
+        self.solved_with_elevator = with_elevator
+        self.solve_start_time = time()
+        self.incumbent_num_extractors = 0
+        self.metrics = {
+            "tiles": len(self.nodes_to_extract),
+            "clusters": len(self.components) if self.components is not None else 1,
+            "model_build_time": self.model_build_time,
+            "variables": self.model_stats["variables"] if self.model_stats is not None else None,
+            "constraints": self.model_stats["constraints"] if self.model_stats is not None else None,
+            "num_search_workers": self.solver_parameters.num_search_workers,
+            "status": None,
+            "solve_time": 0.0,
+            "incremental": False,
+            "searches": [],
+            "incumbents": [],
+        }
+        
+        # solve each asteroid cluster separately
+        if self.components is not None:
+            self.run_components(miners_timelimit, saturation_timelimit, with_elevator and self.with_elevator, log_callback)
+            self.metrics["status"] = "FEASIBLE"
+            self.metrics["solve_time"] = time() - self.solve_start_time
+            return
         
-    def run_solver(self, miners_timelimit : float = 5.0, saturation_timelimit : float = 5.0, with_elevator : bool = False, log_callback = None) -> None:
         if not with_elevator:
-            # if not with elevator, set the elevator variables to zero
-            for node in self.nodes_to_extract:
-                self.model.Add(self.node_used_by_elevator[node] == 0)
+            # if not with elevator, set the elevator variables to zero (if the model has any)
+            for elevator in self.node_used_by_elevator.values():
+                self.model.Add(elevator == 0)
         
-        # optimize the model
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = miners_timelimit + saturation_timelimit
-        solver.parameters.log_search_progress = True
+        # start from a greedy layout, it is also the solution until the solver finds a better one
+        greedy_values, greedy_objective = self.get_greedy_values()
+        self.store_values(greedy_values)
+        self.record_incumbent("greedy", greedy_objective)
+        self.report_incumbent(greedy_values, greedy_objective, "greedy", force=True)
+        self.add_hints(greedy_values)
+        
+        # after an edit, only re-optimize around the edited tiles, or start from the previous solution if nothing changed
+        if self.previous_layout is not None and self.previous_with_elevator == with_elevator:
+            if set(self.nodes_to_extract) == self.previous_nodes:
+                self.add_hints(self.layout_to_values(self.previous_layout))
+            elif self.run_incremental(miners_timelimit + saturation_timelimit, log_callback, greedy_objective):
+                return
         
-        if log_callback is not None:
-            solver.log_callback = log_callback
+        # solve very large fields window by window
+        field_size = np.ptp(self.edge_start, axis=0).max() + 1
+        if self.window_size is not None and field_size > self.window_size and len(self.nodes_to_extract) > self.window_min_tiles:
+            self.run_windows(miners_timelimit + saturation_timelimit, log_callback, greedy_values, greedy_objective)
+            return
         
-        status = solver.Solve(self.model)
+        # ----------------------------------------------------------
+        # phase 1 - maximize the number of miners and extenders
+        # ----------------------------------------------------------
+        self.model.Maximize(self.primary_objective)
+        solver = self.create_solver(miners_timelimit, log_callback)
+        status = solver.Solve(self.model, self.get_incumbent_callback("miners"))
+        self.record_search("miners", solver, status)
         
-        # store solution
+        # keep the greedy layout if no solution is found, phase 2 then starts from it
         if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            self.all_miner_platforms_sol = [FakeVar(VarName=miner.Name(), X=solver.Value(miner)) for miner in self.all_miner_platforms]
-            self.all_extender_platforms_sol = [FakeVar(VarName=extender.Name(), X=solver.Value(extender)) for extender in self.all_extender_platforms]
-            self.all_belts_sol = [FakeVar(VarName=belt.Name(), X=solver.Value(belt)) for belt in self.all_belts]
-            self.nodes_to_extract_sol = self.nodes_to_extract
-            self.node_flow_in_sol = {node: [FakeVar(VarName=flow.Name(), X=solver.Value(flow)) for flow in flows] for node, flows in self.node_flow_in.items()}
-            self.node_flow_out_sol = {node: [FakeVar(VarName=flow.Name(), X=solver.Value(flow)) for flow in flows] for node, flows in self.node_flow_out.items()}
-            self.node_used_by_elevator_sol = {node: FakeVar(VarName=elevator.Name(), X=solver.Value(elevator)) for node, elevator in self.node_used_by_elevator.items()}
-            self.all_elevators_sol = [FakeVar(VarName=elevator.Name(), X=solver.Value(elevator)) for elevator in self.node_used_by_elevator.values()]
-            self.has_solution = True
+            self.store_solution(solver)
+            best_primary = round(solver.ObjectiveValue())
+            best_values = np.asarray(solver.ResponseProto().solution, dtype=np.int64)
         else:
-            self.has_solution = False
+            best_primary = greedy_objective // (1_000_000 * len(self.nodes_to_extract) + 1)
+            best_values = greedy_values
+        
+        # skip the second phase if no time is given for it
+        if saturation_timelimit <= 0 or self.stopped:
+            return
+        
+        # ----------------------------------------------------------
+        # phase 2 - maximize saturation while keeping the miner count
+        # ----------------------------------------------------------
+        
+        # keep at least the number of extractors found in phase 1 (or of the greedy layout)
+        self.model.Add(self.primary_objective >= best_primary)
+        
+        # start from the phase 1 solution
+        self.add_hints(best_values)
+        
+        self.model.Maximize(self.saturation_objective)
+        solver = self.create_solver(saturation_timelimit, log_callback)
+        status = solver.Solve(self.model, self.get_incumbent_callback("saturation"))
+        self.record_search("saturation", solver, status)
+        
+        # keep the phase 1 (or greedy) solution if phase 2 did not find anything
+        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            self.store_solution(solver)
+    
+    def get_greedy_values(self) -> Tuple[np.ndarray, int]:
+        # values of all model variables for the greedy layout (the ones it does not set are 0)
+        # and its objective, with both objectives in one as in run_windows
+        layout = greedy_layout(np.array(self.nodes_to_extract))
+        platforms = [[kind, *start, *end, 1] for kind in ["miner", "extender", "belt"] for start, end in layout[f"{kind}s"].items()]
+        platforms += [["flow", *start, *end, flow] for (start, end), flow in layout["flows"].items()]
+        values = self.layout_to_values({"platforms": platforms, "elevators": []})
+        
+        num_extractors = len(layout["miners"]) + len(layout["extenders"])
+        saturation = sum(SATURATION_WEIGHTS[layout["flows"][edge] - 1] for edge in layout["miners"].items())
+        logger.info(f"[Greedy] {num_extractors} miners and extenders")
+        return values, (1_000_000 * len(self.nodes_to_extract) + 1) * num_extractors + saturation
+    
+    def layout_to_values(self, layout: dict) -> np.ndarray:
+        # values of all model variables for a layout from get_layout (the ones it does not set are 0),
+        # platforms and elevators on nodes that are not in the model are skipped
+        edge_index = {edge: e for e, edge in enumerate(map(tuple, np.hstack([self.edge_start, self.edge_end]).tolist()))}
+        extender_index = {e: i for i, e in enumerate(self.extender_edges.tolist())}
+        variables = {"miner": self.all_miner_platforms, "belt": self.all_belts, "flow": self.all_flows}
+        
+        values = np.zeros(len(self.model.Proto().variables), dtype=np.int64)
+        for kind, x, y, x2, y2, value in layout["platforms"]:
+            e = edge_index.get((x, y, x2, y2))
+            if e is None:
+                continue
+            if kind == "extender":
+                if e not in extender_index:
+                    continue
+                values[self.all_extender_platforms[extender_index[e]].Index()] = value
+            else:
+                values[variables[kind][e].Index()] = value
+        for node in layout["elevators"]:
+            if tuple(node) in self.node_used_by_elevator:
+                values[self.node_used_by_elevator[tuple(node)].Index()] = 1
+        return values
+    
+    def get_decision_variables(self) -> Tuple[list, np.ndarray, np.ndarray]:
+        # the decision variables, the node each one belongs to and their indices in the model
+        elevator_nodes = np.array(list(self.node_used_by_elevator.keys()), dtype=np.int64).reshape(-1, 2)
+        decision_vars = self.all_belts + self.all_miner_platforms + self.all_flows + self.all_extender_platforms + list(self.node_used_by_elevator.values())
+        decision_nodes = np.vstack([self.edge_start, self.edge_start, self.edge_start, self.edge_start[self.extender_edges], elevator_nodes])
+        decision_index = np.array([var.Index() for var in decision_vars], dtype=np.int64)
+        return decision_vars, decision_nodes, decision_index
+    
+    def add_hints(self, values: np.ndarray) -> None:
+        # hint the decision variables, the solver derives the others
+        self.model.ClearHints()
+        for var in self.all_miner_platforms + self.all_extender_platforms + self.all_belts + self.all_flows + list(self.node_used_by_elevator.values()):
+            self.model.AddHint(var, int(values[var.Index()]))
+    
+    def is_complete(self) -> bool:
+        # the last solve ran to its time limits on the whole field and its searches found a solution, so it is as good
+        # as a solve with these time limits (not stopped, not an incremental re-solve, not the greedy layout)
+        return not self.stopped and not self.metrics.get("incremental", False) and self.metrics.get("status") in ["OPTIMAL", "FEASIBLE"]
+    
+    def stop(self) -> None:
+        # stops the running search, the best solution found so far is kept and the remaining phases and windows are skipped
+        # (and the searches of separate clusters, in their processes)
+        self.stopped = True
+        if self.current_solver is not None:
+            self.current_solver.StopSearch()
+        if self.component_stop_event is not None:
+            self.component_stop_event.set()
+    
+    def create_solver(self, timelimit : float, log_callback = None) -> cp_model.CpSolver:
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = timelimit if not self.stopped else 0.0
+        self.current_solver = solver
+        solver.parameters.log_search_progress = True
+        self.solver_parameters.apply(solver)
+        
+        # the log goes to log_callback (or stdout), the end of the presolve is taken from it as the response has no presolve time
+        self.presolve_time = None
+        def log(line: str) -> None:
+            if self.presolve_time is None and line.startswith("Starting search at "):
+                self.presolve_time = float(line.split()[3].rstrip("s"))
+            if log_callback is not None:
+                log_callback(line)
+            else:
+                print(line)
+        solver.log_callback = log
+        solver.parameters.log_to_stdout = False
+        
+        return solver
+    
+    def record_search(self, phase: str, solver: cp_model.CpSolver, status) -> None:
+        # telemetry of a finished search, the gap is relative to the bound
+        found = status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+        objective = solver.ObjectiveValue() if found else None
+        best_bound = solver.BestObjectiveBound()
+        self.metrics["searches"].append({
+            "phase": phase,
+            "status": solver.StatusName(status),
+            "wall_time": solver.WallTime(),
+            "presolve_time": self.presolve_time,
+            "objective": objective,
+            "best_bound": best_bound,
+            "gap": abs(best_bound - objective) / max(1.0, abs(best_bound)) if found else None,
+        })
+        # the status of the kept solution, a later search that finds nothing keeps the solution of the one before
+        if found or self.metrics["status"] is None:
+            self.metrics["status"] = solver.StatusName(status)
+        self.metrics["solve_time"] = time() - self.solve_start_time
+    
+    def record_incumbent(self, phase: str, objective: float, best_bound: Optional[float] = None) -> None:
+        # telemetry of an improving solution, as [seconds since the start of run_solver, phase, objective, bound]
+        if self.metrics:
+            self.metrics["incumbents"].append([time() - self.solve_start_time, phase, objective, best_bound])
+    
+    def store_solution(self, solver: cp_model.CpSolver) -> None:
+        # read all values at once from the response
+        self.store_values(np.asarray(solver.ResponseProto().solution, dtype=np.int64))
+    
+    def get_incumbent_callback(self, phase: str) -> cp_model.CpSolverSolutionCallback:
+        return IncumbentCallback(self, phase)
+    
+    def get_variable_edges(self) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+        # the variable indices and (x, y, x2, y2) edges of every kind of platform and the flows, only created once per model
+        if self.variable_edges is None:
+            edges = np.hstack([self.edge_start, self.edge_end])
+            self.variable_edges = [
+                ("miner", np.array([var.Index() for var in self.all_miner_platforms], dtype=np.int64), edges),
+                ("extender", np.array([var.Index() for var in self.all_extender_platforms], dtype=np.int64), edges[self.extender_edges]),
+                ("belt", np.array([var.Index() for var in self.all_belts], dtype=np.int64), edges),
+                ("flow", np.array([var.Index() for var in self.all_flows], dtype=np.int64), edges),
+            ]
+        return self.variable_edges
+    
+    def values_to_solution(self, values: np.ndarray) -> Solution:
+        # values of all model variables, indexed by variable index
+        edges = {kind: Edges.from_edges(kind_edges, values[indices]) for kind, indices, kind_edges in self.get_variable_edges()}
+        elevators = [node for node, elevator in self.node_used_by_elevator.items() if values[elevator.Index()] > 0]
+        return Solution(edges["miner"], edges["extender"], edges["belt"], edges["flow"], elevators)
+    
+    def report_incumbent(self, values: np.ndarray, objective: float, phase: str, force: bool = False) -> None:
+        # passes a solution of the model (values of all variables) to incumbent_callback
+        if self.incumbent_callback is None:
+            return
+        
+        # the first solutions of a search can be worse than its hint, only report the ones that improve
+        variable_edges = self.get_variable_edges()
+        num_extractors = int((values[variable_edges[0][1]] > 0).sum() + (values[variable_edges[1][1]] > 0).sum())
+        if num_extractors < self.incumbent_num_extractors:
+            return
+        now = time()
+        if not force and now - self.last_incumbent_time < self.incumbent_interval:
+            return
+        self.incumbent_num_extractors = num_extractors
+        self.last_incumbent_time = now
+        
+        solution = self.values_to_solution(values)
+        self.incumbent_callback({
+            "phase": phase,
+            "objective": objective,
+            "num_miners": len(solution.miners),
+            "num_extenders": len(solution.extenders),
+            "time": now - self.solve_start_time,
+            "layout": solution.to_layout(),
+        })
+    
+    def store_values(self, values: np.ndarray) -> None:
+        # values of all model variables, indexed by variable index
+        self.solution = self.values_to_solution(values)
+        self.solution_version += 1
+        self.has_solution = True
                 
+    def run_windows(self, timelimit : float, log_callback = None, incumbent : Optional[np.ndarray] = None, incumbent_objective : int = 0) -> None:
+        log = log_callback if log_callback is not None else print
+        window_size = self.window_size
+        
+        # ----------------------------------------------------------
+        # setup
+        # ----------------------------------------------------------
+        
+        # both objectives in one, a single extractor is worth more than any saturation
+        self.model.Maximize((1_000_000 * len(self.nodes_to_extract) + 1) * self.primary_objective + self.saturation_objective)
+        
+        # decision variables and the node they belong to
+        decision_vars, decision_nodes, decision_index = self.get_decision_variables()
+        
+        # windows tile the field, the second set is shifted by half a window so its windows cover the borders of the first
+        x_min, y_min = decision_nodes.min(axis=0)
+        x_max, y_max = decision_nodes.max(axis=0)
+        def get_windows(offset: int) -> List[Tuple[int, int]]:
+            windows = []
+            for x0 in range(x_min - offset, x_max + 1, window_size):
+                for y0 in range(y_min - offset, y_max + 1, window_size):
+                    inside = np.all((decision_nodes >= (x0, y0)) & (decision_nodes < (x0 + window_size, y0 + window_size)), axis=1)
+                    if inside.any():
+                        windows.append((x0, y0))
+            return windows
+        passes = [get_windows(0), get_windows(window_size // 2)]
+        
+        # time per window, enough for at least one pass over both window sets
+        window_timelimit = max(1.0, timelimit / (len(passes[0]) + len(passes[1])))
+        log(f"Solving in windows of {window_size}x{window_size}, {len(passes[0])} + {len(passes[1])} windows per round, {window_timelimit:.1f}s per window")
+        
+        # start from the given layout, or the empty layout, which is always feasible
+        if incumbent is None:
+            incumbent = np.zeros(len(self.model.Proto().variables), dtype=np.int64)
+            incumbent_objective = 0
+        
+        # ----------------------------------------------------------
+        # large neighborhood search over the windows
+        # ----------------------------------------------------------
+        deadline = time() + timelimit
+        pass_number = 0
+        passes_without_improvement = 0
+        while time() < deadline and passes_without_improvement < len(passes) and not self.stopped:
+            improved = False
+            for x0, y0 in passes[pass_number % len(passes)]:
+                remaining = deadline - time()
+                if remaining <= 0 or self.stopped:
+                    break
+                
+                # fix every decision outside the window to the incumbent
+                window_model = self.model.Clone()
+                window_model.ClearHints()
+                window_proto = window_model.Proto()
+                inside = np.all((decision_nodes >= (x0, y0)) & (decision_nodes < (x0 + window_size, y0 + window_size)), axis=1)
+                for index, value in zip(decision_index[~inside].tolist(), incumbent[decision_index[~inside]].tolist()):
+                    domain = window_proto.variables[index].domain
+                    domain[0] = value
+                    domain[1] = value
+                
+                # start from the incumbent inside the window
+                for index, value in zip(decision_index[inside].tolist(), incumbent[decision_index[inside]].tolist()):
+                    window_model.AddHint(window_model.GetIntVarFromProtoIndex(index), value)
+                
+                # solve the window
+                solver = self.create_solver(min(window_timelimit, remaining))
+                solver.parameters.log_search_progress = False
+                status = solver.Solve(window_model)
+                if status in [cp_model.OPTIMAL, cp_model.FEASIBLE] and solver.ObjectiveValue() > incumbent_objective:
+                    incumbent = np.asarray(solver.ResponseProto().solution, dtype=np.int64)
+                    incumbent_objective = solver.ObjectiveValue()
+                    improved = True
+                    self.record_incumbent("windows", incumbent_objective)
+                    self.report_incumbent(incumbent, incumbent_objective, "windows")
+            
+            num_extractors = int(incumbent[[var.Index() for var in self.all_miner_platforms + self.all_extender_platforms]].sum())
+            log(f"Window round {pass_number + 1}: {num_extractors} miners and extenders")
+            passes_without_improvement = 0 if improved else passes_without_improvement + 1
+            pass_number += 1
+        
+        # the window searches as one, without a bound for the whole field
+        self.metrics["searches"].append({
+            "phase": "windows",
+            "status": "FEASIBLE",
+            "wall_time": time() - (deadline - timelimit),
+            "presolve_time": None,
+            "objective": incumbent_objective,
+            "best_bound": None,
+            "gap": None,
+            "windows": pass_number,
+        })
+        self.metrics["status"] = "FEASIBLE"
+        self.metrics["solve_time"] = time() - self.solve_start_time
+        self.store_values(incumbent)
+    
+    def run_incremental(self, timelimit : float, log_callback = None, min_objective : int = 0) -> bool:
+        # re-optimize the tiles around the edited ones with everything else fixed to the previous solution,
+        # returns False if the full model should be solved instead
+        log = log_callback if log_callback is not None else print
+        nodes = set(self.nodes_to_extract)
+        changed = nodes ^ self.previous_nodes
+        
+        # tiles close to an edited tile
+        radius = self.incremental_radius
+        free_nodes = {(x + dx, y + dy) for x, y in changed for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)} & nodes
+        
+        # and everything downstream of them in the previous solution, as the flows they carry change too
+        next_node = {(x, y): (x2, y2) for kind, x, y, x2, y2, _ in self.previous_layout["platforms"] if kind != "flow"}
+        for node in list(free_nodes):
+            node = next_node.get(node)
+            while node in nodes and node not in free_nodes:
+                free_nodes.add(node)
+                node = next_node.get(node)
+        
+        # nothing to gain if most of the field changes
+        if len(free_nodes) > len(nodes) // 2:
+            return False
+        
+        # both objectives in one, a single extractor is worth more than any saturation
+        self.model.Maximize((1_000_000 * len(self.nodes_to_extract) + 1) * self.primary_objective + self.saturation_objective)
+        
+        # fix every decision outside the edited area to the previous solution, start from it inside
+        values = self.layout_to_values(self.previous_layout)
+        decision_vars, decision_nodes, decision_index = self.get_decision_variables()
+        inside = np.array([node in free_nodes for node in map(tuple, decision_nodes.tolist())], dtype=bool)
+        incremental_model = self.model.Clone()
+        incremental_model.ClearHints()
+        incremental_proto = incremental_model.Proto()
+        for index, value in zip(decision_index[~inside].tolist(), values[decision_index[~inside]].tolist()):
+            domain = incremental_proto.variables[index].domain
+            domain[0] = value
+            domain[1] = value
+        for index, value in zip(decision_index[inside].tolist(), values[decision_index[inside]].tolist()):
+            incremental_model.AddHint(incremental_model.GetIntVarFromProtoIndex(index), value)
+        
+        # the area is small, it does not need the time limit of the whole field
+        incremental_timelimit = min(timelimit, max(1.0, 0.05 * len(free_nodes)))
+        log(f"Incremental solve: {len(changed)} edited tiles, re-optimizing {len(free_nodes)} of {len(nodes)} tiles in {incremental_timelimit:.1f}s")
+        solver = self.create_solver(incremental_timelimit, log_callback)
+        status = solver.Solve(incremental_model, self.get_incumbent_callback("incremental"))
+        self.record_search("incremental", solver, status)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE] or solver.ObjectiveValue() < min_objective:
+            log("Incremental solve did not improve on the greedy layout, solving the whole field")
+            return False
+        
+        self.store_solution(solver)
+        self.metrics["incremental"] = True
+        return True
+    
+    def run_components(self, miners_timelimit : float, saturation_timelimit : float, with_elevator : bool, log_callback = None) -> None:
+        log = log_callback if log_callback is not None else print
+        solutions = []
+        
+        # after an edit, the clusters away from the edited tiles keep their previous solution
+        to_solve = list(range(len(self.components)))
+        if self.previous_layout is not None and self.previous_with_elevator == with_elevator:
+            changed = set(self.nodes_to_extract) ^ self.previous_nodes
+            if changed:
+                to_solve = []
+                for i, component in enumerate(self.components):
+                    component_nodes = set(map(tuple, component.tolist()))
+                    if any((x + dx, y + dy) in changed for x, y in component_nodes for dx, dy in [(0, 0)] + DIRECTIONS):
+                        to_solve.append(i)
+                        continue
+                    component_solver = AstroidSolver()
+                    component_solver.set_layout(component, {
+                        "platforms": [platform for platform in self.previous_layout["platforms"] if tuple(platform[1:3]) in component_nodes],
+                        "elevators": [node for node in self.previous_layout["elevators"] if tuple(node) in component_nodes],
+                    })
+                    solutions.append(component_solver.get_solution())
+                log(f"Keeping the previous solution of {len(self.components) - len(to_solve)} unchanged asteroid clusters")
+                self.metrics["incremental"] = len(to_solve) < len(self.components)
+        if not to_solve:
+            self.merge_solutions(solutions)
+            return
+        
+        # share the cores among the clusters, clusters that do not fit are solved in later rounds
+        num_cores = self.solver_parameters.num_search_workers or os.cpu_count() or 1
+        num_processes = min(len(to_solve), num_cores)
+        num_rounds = -(-len(to_solve) // num_processes)
+        component_parameters = copy.copy(self.solver_parameters)
+        component_parameters.num_search_workers = max(1, num_cores // num_processes)
+        log(f"Solving {len(to_solve)} asteroid clusters with {num_processes} processes")
+        
+        # solve the clusters in separate processes (spawn, as the web server is multithreaded),
+        # they stop their search once stop sets component_stop_event
+        context = multiprocessing.get_context("spawn")
+        self.component_stop_event = context.Event()
+        if self.stopped:
+            self.component_stop_event.set()
+        with ProcessPoolExecutor(max_workers=num_processes, mp_context=context, initializer=set_component_stop_event, initargs=(self.component_stop_event,)) as executor:
+            futures = {
+                executor.submit(solve_component, self.components[i], miners_timelimit / num_rounds, saturation_timelimit / num_rounds, with_elevator, component_parameters, self.window_size, self.window_min_tiles): i
+                for i in to_solve
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                solution = future.result()
+                if solution is None:
+                    log(f"Cluster {i + 1}/{len(self.components)}: {len(self.components[i])} tiles, no solution found")
+                    continue
+                log(f"Cluster {i + 1}/{len(self.components)}: {len(self.components[i])} tiles, {len(solution.miners)} miners, {len(solution.extenders)} extenders")
+                solutions.append(solution)
+        
+        self.merge_solutions(solutions)
+    
+    def get_solution(self) -> Optional[Solution]:
+        # the solution, picklable for the cluster processes
+        if not self.has_solution:
+            return None
+        return self.solution
+    
+    def merge_solutions(self, solutions: List[Solution]) -> None:
+        # clusters do not share any source node, so the solutions can simply be joined
+        self.solution = Solution.concatenate(solutions)
+        self.solution_version += 1
+        self.has_solution = len(solutions) > 0
+
+    def get_layout(self) -> Optional[dict]:
+        # the placed platforms, belts and flows of the solution, in a compact json friendly form
+        if not self.has_solution:
+            return None
+        return self.solution.to_layout()
+
+    def set_layout(self, astroid_location: np.ndarray, layout: dict) -> None:
+        # restore a solution from get_layout without building the model
+        sources = np.unique(np.asarray(astroid_location, dtype=np.int64).reshape(-1, 2), axis=0)
+        self.nodes_to_extract = [tuple(node) for node in sources.tolist()]
+        self.release_model()
+        self.solution = Solution.from_layout(layout)
+        self.solution_version += 1
+        self.has_solution = True
+
+    def release_model(self) -> None:
+        # drop the model, its variables and the previous layout, only the solution and the source nodes are kept
+        self.components = None
+        self.model = None
+        self.model_stats = None
+        self.variable_edges = None
+        self.current_solver = None
+        self.previous_layout = None
+        self.previous_nodes = set()
+        self.all_miner_platforms = self.all_extender_platforms = self.all_belts = self.all_flows = None
+        self.node_used_by_elevator = None
+        self.primary_objective = self.saturation_objective = None
+        self.edge_start = self.edge_end = self.extender_edges = None
+
+    def get_num_bytes(self) -> int:
+        # estimated memory of the task: the solution arrays, the source nodes (a tuple of two ints each),
+        # and the model if it is still kept (its proto size, the python variables take a few times more)
+        num_bytes = len(self.nodes_to_extract) * NODE_BYTES
+        if self.solution is not None:
+            num_bytes += self.solution.nbytes
+        if self.model is not None:
+            num_bytes += 4 * self.model.Proto().ByteSize()
+        return num_bytes
+
     def save_variables(self, filename: str) -> None:
         # save the variables to a file
-        var_to_txt(filename, self.all_extender_platforms_sol, self.all_miner_platforms_sol, self.all_belts_sol)
+        var_to_txt(filename, self.solution.extenders.to_vars("extender"), self.solution.miners.to_vars("miner"), self.solution.belts.to_vars("belt"))
+    
+    def get_shown_solution(self, remove_non_saturated_miners: bool = False) -> Solution:
+        # the solution as shown and exported, optionally without the miners that are not saturated
+        if not remove_non_saturated_miners:
+            return self.solution
+        return self.solution.with_platforms(*remove_non_saturated_miners_func(self.solution.miners, self.solution.extenders))
         
-    def get_solution_blueprint(self, miner_blueprint: Optional[str] = None, remove_non_saturated_miners: bool = False) -> str:
+    def get_solution_blueprint(self, miner_blueprint: Optional[str] = None, remove_non_saturated_miners: bool = False, compresslevel: int = GZIP_LEVEL, solve_for_fluid: bool = False) -> str:
         if miner_blueprint is None:
             # use the default blueprint if none is provided
             miner_blueprint = self.default_blueprint
@@ -345,113 +871,160 @@ class AstroidSolver:
         # skip if no solution
         if not self.has_solution:
             return "Solution not found"
-        
-        if remove_non_saturated_miners:
-            miner_platforms_sol, extender_platforms_sol = remove_non_saturated_miners_func(self.all_miner_platforms_sol, self.all_extender_platforms_sol)
-        else:
-            miner_platforms_sol = self.all_miner_platforms_sol
-            extender_platforms_sol = self.all_extender_platforms_sol
 
         # generate blueprint
-        return compose_blueprint(miner_platforms_sol, extender_platforms_sol, self.all_belts_sol, self.all_elevators_sol, miner_blueprint=miner_blueprint)
+        return compose_blueprint(self.get_shown_solution(remove_non_saturated_miners), miner_blueprint=miner_blueprint, compresslevel=compresslevel, solve_for_fluid=solve_for_fluid)
+    
+    def stream_solution_blueprint(self, miner_blueprint: Optional[str] = None, remove_non_saturated_miners: bool = False, compresslevel: int = GZIP_LEVEL, solve_for_fluid: bool = False) -> Iterator[str]:
+        # the blueprint of get_solution_blueprint piece by piece, the solution must exist
+        if miner_blueprint is None:
+            miner_blueprint = self.default_blueprint
+        return stream_blueprint(self.get_shown_solution(remove_non_saturated_miners), miner_blueprint=miner_blueprint, solve_for_fluid=solve_for_fluid, compresslevel=compresslevel)
     
     def get_solution_image(self, remove_non_saturated_miners: bool = False) -> BytesIO:
         # render the result
-        if remove_non_saturated_miners:
-            miner_platforms_sol, extender_platforms_sol = remove_non_saturated_miners_func(self.all_miner_platforms_sol, self.all_extender_platforms_sol)
-        else:
-            miner_platforms_sol = self.all_miner_platforms_sol
-            extender_platforms_sol = self.all_extender_platforms_sol
-        
-        blob = render_result(
-            miner_platforms_sol,
-            extender_platforms_sol,
-            self.all_belts_sol,
-            nodes_to_extract=self.nodes_to_extract,
-            node_flow_in=self.node_flow_in_sol,
-            node_flow_out=self.node_flow_out_sol,
-            node_used_by_elevator=self.node_used_by_elevator_sol)
+        blob = render_result(self.get_shown_solution(remove_non_saturated_miners), nodes_to_extract=self.nodes_to_extract)
         
         # return the blob
         return blob
-    
+
+    def get_solution_drawing(self, remove_non_saturated_miners: bool = False) -> dict:
+        """
+        The placed elements of the solution as flat integer arrays, for drawing it in the browser instead of render_result.
+
+        tiles and elevators hold x, y per element, miners, extenders and belts hold x, y, d per element with d the
+        index of their direction in DIRECTIONS, and flows holds x, y, d, value for the flows out of the miners.
+        throughput holds the items per miner from get_miner_throughput, in the order of miners.
+        """
+        solution = self.get_shown_solution(remove_non_saturated_miners)
+        def directed(edges: Edges, with_value: bool = False) -> List[int]:
+            columns = [edges.nodes, edges.directions[:, None]] + ([edges.values[:, None]] if with_value else [])
+            return np.hstack(columns).ravel().tolist()
+
+        return {
+            "tiles": np.asarray(self.nodes_to_extract, dtype=np.int64).ravel().tolist(),
+            "miners": directed(solution.miners),
+            "extenders": directed(solution.extenders),
+            "belts": directed(solution.belts),
+            "elevators": solution.elevators.ravel().tolist(),
+            "flows": directed(solution.miner_flows(), with_value=True),
+            "throughput": get_miner_throughput(solution.miners, solution.extenders)[0].tolist(),
+        }
+
     def show_solution_image(self) -> None:
         if not self.has_solution:
             print("No solution to show!")
             return
             
         # render the result
-        blob = render_result(
-            self.all_miner_platforms_sol,
-            self.all_extender_platforms_sol,
-            self.all_belts_sol,
-            nodes_to_extract=self.nodes_to_extract,
-            node_flow_in=self.node_flow_in_sol,
-            node_flow_out=self.node_flow_out_sol,
-            node_used_by_elevator=self.node_used_by_elevator_sol)
+        blob = render_result(self.solution, nodes_to_extract=self.nodes_to_extract)
         
         # show in cv2 window
         cv2.imshow("Astroid Miner Solution", cv2.imdecode(np.frombuffer(blob.getvalue(), np.uint8), cv2.IMREAD_COLOR))
         cv2.waitKey(0)
 
-def remove_non_saturated_miners_func(all_miner_platforms_sol: List[FakeVar], all_extender_platforms_sol: List[FakeVar]):    
-    # miner nodes
-    miner_nodes = []
-    for miner in all_miner_platforms_sol:
-        # skip if not used
-        if miner.X < 0.5:
-            continue
-        var_parts = miner.VarName.split('_')
-        start_node = (int(var_parts[1]), int(var_parts[2]))
-        miner_nodes.append(start_node)
-    
-    # extension map
-    extension_maps = {}
-    for extender in all_extender_platforms_sol:
-        # skip if extender is not used
-        if extender.X < 0.5:
-            continue
-        var_parts = extender.VarName.split('_')
-        start_node = (int(var_parts[1]), int(var_parts[2]))
-        end_node = (int(var_parts[3]), int(var_parts[4]))
-        extension_maps[start_node] = end_node
-    for start_node, end_node in extension_maps.items():
-        # similar to union find, compress the path
-        while end_node in extension_maps:
-            end_node = extension_maps[end_node]
-        extension_maps[start_node] = end_node
+class IncumbentCallback(cp_model.CpSolverSolutionCallback):
+    # records every improving solution of a search, and reports it to AstroidSolver.report_incumbent if someone listens
+    def __init__(self, astroid_solver: AstroidSolver, phase: str):
+        super().__init__()
+        self.astroid_solver = astroid_solver
+        self.phase = phase
+    
+    def on_solution_callback(self) -> None:
+        self.astroid_solver.record_incumbent(self.phase, self.objective_value, self.best_objective_bound)
+        if self.astroid_solver.incumbent_callback is not None:
+            self.astroid_solver.report_incumbent(np.asarray(self.response_proto.solution, dtype=np.int64), self.objective_value, self.phase)
 
-    # miner to extension count
-    miner_to_extension_count = {}
-    for miner_node in miner_nodes:
-        count = sum(1 for start_node, end_node in extension_maps.items() if end_node == miner_node)
-        miner_to_extension_count[miner_node] = count
-    
-    # remove non-saturated miners and extensions
-    miners_not_saturated = [miner_node for miner_node in miner_nodes if miner_to_extension_count[miner_node] < 3]
-    extension_not_saturated = [start_node for start_node, end_node in extension_maps.items() if end_node in miners_not_saturated]
-    all_miner_platforms_sol_new = []
-    all_extender_platforms_sol_new = []
-    for miner in all_miner_platforms_sol:
-        start_node = (int(miner.VarName.split('_')[1]), int(miner.VarName.split('_')[2]))
-        if start_node not in miners_not_saturated:
-            all_miner_platforms_sol_new.append(miner)
-    for extender in all_extender_platforms_sol:
-        start_node = (int(extender.VarName.split('_')[1]), int(extender.VarName.split('_')[2]))
-        end_node = (int(extender.VarName.split('_')[3]), int(extender.VarName.split('_')[4]))
-        if start_node not in extension_not_saturated:
-            all_extender_platforms_sol_new.append(extender)
-    
-    # return the new solution
-    return all_miner_platforms_sol_new, all_extender_platforms_sol_new
+def find_connected_components(astroid_location: np.ndarray) -> List[np.ndarray]:
+    # tiles separated by at least one empty node only share sinks, so each group of touching tiles is independent
+    sources = np.asarray(astroid_location, dtype=np.int64).reshape(-1, 2)
+    shifted = sources - sources.min(axis=0)
+    grid = np.zeros(shifted.max(axis=0) + 1, dtype=np.uint8)
+    grid[shifted[:, 0], shifted[:, 1]] = 1
+    
+    # label the groups of touching tiles
+    num_labels, labels = cv2.connectedComponents(grid, connectivity=4)
+    tile_labels = labels[shifted[:, 0], shifted[:, 1]]
+    return [sources[tile_labels == label] for label in range(1, num_labels)]
+
+def stop_when_set(astroid_solver: AstroidSolver, stop_event, solved: threading.Event, on_stop: Optional[Callable[[], None]] = None) -> None:
+    # runs in a thread, stops astroid_solver once stop_event is set and until solved is set
+    # (repeated as a search that was about to start would miss a single stop), returns once solved is set
+    while not stop_event.wait(0.5):
+        if solved.is_set():
+            return
+    if on_stop is not None:
+        on_stop()
+    while not solved.is_set():
+        astroid_solver.stop()
+        solved.wait(0.5)
 
-def render_result(all_miner_platforms: List[FakeVar],
-                  all_extender_platforms: List[FakeVar],
-                  all_belts: List[FakeVar],
-                  nodes_to_extract: List[Tuple[int, int]] = [],
-                  node_flow_in: Dict[Tuple[int, int], List[FakeVar]] = defaultdict(list),
-                  node_flow_out: Dict[Tuple[int, int], List[FakeVar]] = defaultdict(list),
-                  node_used_by_elevator: Dict[Tuple[int, int], FakeVar] = {}) -> BytesIO:
+# the stop event of the cluster processes of run_components, set in each process by the pool initializer
+component_stop_event = None
+
+def set_component_stop_event(stop_event) -> None:
+    global component_stop_event
+    component_stop_event = stop_event
+
+def solve_component(astroid_location: np.ndarray, miners_timelimit: float, saturation_timelimit: float, with_elevator: bool, solver_parameters: SolverParameters, window_size: Optional[int] = None, window_min_tiles: int = 0) -> Optional[Solution]:
+    # runs in a worker process, solves one asteroid cluster
+    astroid_solver = AstroidSolver()
+    astroid_solver.window_size = window_size
+    astroid_solver.window_min_tiles = window_min_tiles
+    solved = threading.Event()
+    if component_stop_event is not None:
+        threading.Thread(target=stop_when_set, args=(astroid_solver, component_stop_event, solved), daemon=True).start()
+    try:
+        astroid_solver.add_astroid_locations(astroid_location, with_elevator=with_elevator, decompose=False)
+        astroid_solver.run_solver(
+            miners_timelimit=miners_timelimit,
+            saturation_timelimit=saturation_timelimit,
+            with_elevator=with_elevator,
+            log_callback=lambda msg: None,
+            solver_parameters=solver_parameters)
+    finally:
+        solved.set()
+    return astroid_solver.get_solution()
+
+def get_extender_miners(miners: Edges, extenders: Edges) -> np.ndarray:
+    # the index in miners of the miner each extender feeds, directly or through other extenders (-1 if none)
+    miner_index = dict(zip(node_keys(miners.nodes).tolist(), range(len(miners))))
+    extender_keys = node_keys(extenders.nodes).tolist()
+    next_keys = dict(zip(extender_keys, node_keys(extenders.ends).tolist()))
+    
+    # follow each chain until a miner or an extender that is already resolved, then resolve the whole path
+    # (every extender is walked once, like path compression in union find)
+    roots = {}
+    for key in extender_keys:
+        path = []
+        while key in next_keys and key not in roots:
+            roots[key] = -1  # a chain that loops back feeds no miner
+            path.append(key)
+            key = next_keys[key]
+        miner = roots[key] if key in roots else miner_index.get(key, -1)
+        for path_key in path:
+            roots[path_key] = miner
+    return np.array([roots[key] for key in extender_keys], dtype=np.int64)
+
+def get_miner_throughput(miners: Edges, extenders: Edges) -> Tuple[np.ndarray, np.ndarray]:
+    # items per miner (one from the miner and one from every extender that feeds it, up to MINER_MAX_FLOW),
+    # and the miner of every extender as in get_extender_miners
+    extender_miners = get_extender_miners(miners, extenders)
+    num_extenders = np.bincount(extender_miners[extender_miners >= 0], minlength=len(miners))
+    return np.minimum(1 + num_extenders, MINER_MAX_FLOW), extender_miners
+
+def remove_non_saturated_miners_func(miners: Edges, extenders: Edges) -> Tuple[Edges, Edges]:
+    # keeps only the miners with the full throughput and the extenders that feed them
+    throughput, extender_miners = get_miner_throughput(miners, extenders)
+    saturated = throughput >= MINER_MAX_FLOW
+    
+    # extenders that feed no miner are kept
+    keep_extenders = np.ones(len(extenders), dtype=bool)
+    feeds_miner = extender_miners >= 0
+    keep_extenders[feeds_miner] = saturated[extender_miners[feeds_miner]]
+    return miners.select(saturated), extenders.select(keep_extenders)
+
+def render_result(solution: Solution, nodes_to_extract: List[Tuple[int, int]]) -> BytesIO:
     
     # -------------------------------------------
     # settings
@@ -461,131 +1034,72 @@ def render_result(all_miner_platforms: List[FakeVar],
     edge_color = 'black'
     belt_color = 'blue'
     miner_color = 'green'
-    miner_belt_color = belt_color
     extender_color = 'orange'
     extender_belt_color = 'black'
     elevator_color = 'blue'
     
-    # from all_belts, extract all nodes
-    all_nodes = set()
-    for belt in all_belts:
-        node = tuple(map(int, belt.VarName.split('_')[1:3]))
-        all_nodes.add(node)
-    
     # compute x and y limits
-    x_min = min(node[0] for node in all_nodes)
-    x_max = max(node[0] for node in all_nodes)
-    y_min = min(node[1] for node in all_nodes)
-    y_max = max(node[1] for node in all_nodes)
+    x_min, y_min = np.min(nodes_to_extract, axis=0).tolist()
+    x_max, y_max = np.max(nodes_to_extract, axis=0).tolist()
     
     # compute number of miners
-    num_miners = sum(1 for miner in all_miner_platforms if miner.X > 0.5)
-    num_extenders = sum(1 for extender in all_extender_platforms if extender.X > 0.5)
-    num_belts = sum(1 for belt in all_belts if belt.X > 0.5)
+    num_miners = len(solution.miners)
+    num_extenders = len(solution.extenders)
+    num_belts = len(solution.belts)
     
     # roughly compute figure size based on the limits
     width = (x_max - x_min + 5) / 3
     height = (y_max - y_min + 5) / 3
     
-    # initialize plt
-    plt.clf()
-    plt.figure(figsize=(width, height))
-    plt.xlim(x_min - 1, x_max + 1)
-    plt.ylim(y_min - 1, y_max + 1)
-    # plt.grid(True)
-    plt.xticks(range(x_min - 1, x_max + 2))
-    plt.yticks(range(y_min - 1, y_max + 2))
-    plt.gca().set_aspect('equal', adjustable='box')
+    # initialize the figure
+    figure = new_figure(width, height)
+    ax = figure.add_subplot()
+    ax.set_xlim(x_min - 1, x_max + 1)
+    ax.set_ylim(y_min - 1, y_max + 1)
+    ax.set_xticks(range(x_min - 1, x_max + 2))
+    ax.set_yticks(range(y_min - 1, y_max + 2))
+    ax.set_aspect('equal', adjustable='box')
     # include first optimization objective in the title
-    plt.title("Asteroid Miner Solution = " + str(num_miners) + " miners, " + str(num_extenders) + " extenders, " + str(num_belts) + " belts")
-    plt.xlabel("X-axis")
-    plt.ylabel("Y-axis")
-    # plt.axhline(0, color='black', lw=0.5)
-    # plt.axvline(0, color='black', lw=0.5)
+    ax.set_title("Asteroid Miner Solution = " + str(num_miners) + " miners, " + str(num_extenders) + " extenders, " + str(num_belts) + " belts")
+    ax.set_xlabel("X-axis")
+    ax.set_ylabel("Y-axis")
+    
+    # every kind of element is drawn as one collection, which is much faster than one artist per element
+    def draw_lines(edges: np.ndarray, color: str, linewidth: float) -> None:
+        if len(edges):
+            ax.add_collection(LineCollection(edges.reshape(-1, 2, 2), colors=color, linewidths=linewidth, zorder=1))
     
     # draw nodes to extract
-    plt.scatter(*zip(*nodes_to_extract), color='lightgrey', s=150, marker='s', zorder = 0)
+    ax.scatter(*zip(*nodes_to_extract), color='lightgrey', s=150, marker='s', zorder = 0)
         
     # draw elevator nodes
-    for node, elevator in node_used_by_elevator.items():
-        if elevator.X > 0.5:
-            plt.scatter(node[0], node[1], color=elevator_color, marker='x', s=150, zorder=2)
+    if len(solution.elevators):
+        ax.scatter(solution.elevators[:, 0], solution.elevators[:, 1], color=elevator_color, marker='x', s=150, zorder=2)
     
     # draw belts
-    for belt in all_belts:
-        if belt.X > 0.5:  # if the belt is placed
-            start_node = tuple(map(int, belt.VarName.split('_')[1:3]))
-            end_node = tuple(map(int, belt.VarName.split('_')[3:5]))
-            plt.plot([start_node[0], end_node[0]], [start_node[1], end_node[1]], color=belt_color, linewidth=2, zorder = 1)
-    
-    # draw miners
-    used_miner_nodes = set()
-    for miner in all_miner_platforms:
-        if miner.X > 0.5:  # if the miner is placed
-            start_node = tuple(map(int, miner.VarName.split('_')[1:3]))
-            end_node = tuple(map(int, miner.VarName.split('_')[3:5]))
-            used_miner_nodes.add(start_node)
-            
-            # compute direction
-            direction = (end_node[0] - start_node[0], end_node[1] - start_node[1])
-
-            if direction == (1, 0):  # right
-                marker = '>'
-            elif direction == (0, 1):  # up
-                marker = '^'
-            elif direction == (-1, 0):  # left
-                marker = '<'
-            elif direction == (0, -1):  # down
-                marker = 'v'
-            else:
-                marker = '.'
-            
-            # draw miner
-            plt.scatter(start_node[0], start_node[1], color=miner_color, marker=marker, s=80, edgecolors=edge_color, zorder=2)
-            
-            # draw line to belt
-            plt.plot([start_node[0], end_node[0]], [start_node[1], end_node[1]], color=belt_color, linewidth=2, zorder = 1)
-            
-    # draw extenders
-    for extender in all_extender_platforms:
-        if extender.X > 0.5:  # if the extender is placed
-            start_node = tuple(map(int, extender.VarName.split('_')[1:3]))
-            end_node = tuple(map(int, extender.VarName.split('_')[3:5]))
-            
-            # draw extender
-            plt.scatter(start_node[0], start_node[1], color=extender_color, marker='o', s=80, edgecolors=edge_color, zorder=2)
+    draw_lines(solution.belts.edges, belt_color, 2)
+    
+    # draw miners, with a marker pointing in their direction (in the order of DIRECTIONS), and a line to the belt
+    miners = solution.miners
+    for direction, marker in enumerate(['>', '^', '<', 'v']):
+        in_direction = miners.directions == direction
+        if in_direction.any():
+            ax.scatter(miners.nodes[in_direction, 0], miners.nodes[in_direction, 1], color=miner_color, marker=marker, s=80, edgecolors=edge_color, zorder=2)
+    draw_lines(miners.edges, belt_color, 2)
             
-            # draw line to miner or extender
-            plt.plot([start_node[0], end_node[0]], [start_node[1], end_node[1]], color=extender_belt_color, linewidth=1, zorder = 1)
-    
-    # draw flow out values for miner node
-    for node, flows in node_flow_out.items():
-        if node not in used_miner_nodes:
-            continue
-        for flow in flows:
-            if flow.X > 0.5:  # if the flow is placed
-                # get end node
-                end_node = tuple(map(int, flow.VarName.split('_')[3:5]))
-                
-                # get flow value
-                flow_value = flow.X
-                
-                # put text on the flow direction, lean more towards the start node
-                mid_x = (node[0] + end_node[0]) / 2
-                mid_y = (node[1] + end_node[1]) / 2
-                plt.text(mid_x, mid_y, f"{flow_value:.0f}", fontsize=15, ha='center', va='center', color=belt_color, zorder=3)
-    
-    # add legend
-    plt.tight_layout()
-        
-    # return the figure as a PNG image blob
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight')
-    plt.close()
-    buffer.seek(0)
-    
-    # return
-    return buffer
+    # draw extenders, with a line to the miner or extender
+    extenders = solution.extenders
+    if len(extenders):
+        ax.scatter(extenders.nodes[:, 0], extenders.nodes[:, 1], color=extender_color, marker='o', s=80, edgecolors=edge_color, zorder=2)
+    draw_lines(extenders.edges, extender_belt_color, 1)
+    
+    # draw flow out values for miner node, halfway to the next node
+    miner_flows = solution.miner_flows()
+    for (x, y, x2, y2), value in zip(miner_flows.edges.tolist(), miner_flows.values.tolist()):
+        ax.text((x + x2) / 2, (y + y2) / 2, str(value), fontsize=15, ha='center', va='center', color=belt_color, zorder=3)
+    
+    # return the figure as a PNG image blob (cropped to its content, which also leaves no room for a tight layout)
+    return figure_to_png(figure)
     
 if __name__ == "__main__":
     # use simple coordinates
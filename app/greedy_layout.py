@@ -0,0 +1,145 @@
+# system
+from typing import Tuple, Dict
+from collections import deque
+
+# third party
+import numpy as np
+
+# project
+
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+BELT_MAX_FLOW = 12 * 4
+MINER_MAX_FLOW = 4
+
+Node = Tuple[int, int]
+
+def greedy_layout(astroid_location: np.ndarray) -> Dict[str, dict]:
+    """
+    Builds a feasible layout in a single pass, used as a starting point for the solver.
+
+    Tiles are visited from the farthest to the closest to a sink. Each tile becomes a miner that
+    outputs along the shortest path to a sink, the path is turned into belts (or joins belts placed
+    before), and up to 3 neighbouring tiles become extenders chained to the miner.
+
+    Args:
+        astroid_location (np.ndarray): The asteroid tiles as (x, y) coordinates.
+
+    Returns:
+        dict: "miners", "extenders" and "belts" map a node to the node it outputs to,
+              "flows" maps an edge (node, end node) to its flow.
+    """
+    sources = set(map(tuple, np.asarray(astroid_location, dtype=np.int64).reshape(-1, 2).tolist()))
+
+    # ----------------------------------------------------------
+    # shortest path from every tile to a sink
+    # ----------------------------------------------------------
+    distance : Dict[Node, int] = {}
+    parent : Dict[Node, Node] = {}
+    queue = deque()
+    for node in sources:
+        for dx, dy in DIRECTIONS:
+            neighbour = (node[0] + dx, node[1] + dy)
+            if neighbour not in sources:
+                distance[node] = 1
+                parent[node] = neighbour
+                queue.append(node)
+                break
+    while queue:
+        node = queue.popleft()
+        for dx, dy in DIRECTIONS:
+            neighbour = (node[0] + dx, node[1] + dy)
+            if neighbour in sources and neighbour not in distance:
+                distance[neighbour] = distance[node] + 1
+                parent[neighbour] = node
+                queue.append(neighbour)
+
+    # ----------------------------------------------------------
+    # place miners, extenders and belts
+    # ----------------------------------------------------------
+    miners : Dict[Node, Node] = {}
+    extenders : Dict[Node, Node] = {}
+    belts : Dict[Node, Node] = {}
+    belt_flow : Dict[Node, int] = {}
+
+    def is_free(node: Node) -> bool:
+        return node in sources and node not in miners and node not in extenders and node not in belts
+
+    for miner in sorted(sources, key=lambda node: -distance[node]):
+        if not is_free(miner):
+            continue
+
+        # grow a cluster of extenders around the miner, deeper tiles first to keep the paths to the sinks free
+        cluster : Dict[Node, Node] = {miner: parent[miner]}
+        while len(cluster) < MINER_MAX_FLOW:
+            candidates = [
+                ((node[0] + dx, node[1] + dy), node)
+                for node in cluster for dx, dy in DIRECTIONS
+                if (node[0] + dx, node[1] + dy) not in cluster and (node[0] + dx, node[1] + dy) != parent[miner] and is_free((node[0] + dx, node[1] + dy))
+            ]
+            if not candidates:
+                break
+            extender, end_node = max(candidates, key=lambda candidate: distance[candidate[0]])
+            cluster[extender] = end_node
+        cluster_flow = len(cluster)
+
+        # the path from the miner to a sink, new belts until it reaches a sink or an existing belt
+        path = []
+        node = parent[miner]
+        blocked = False
+        while node in sources:
+            if node in belts:
+                # follow the existing belts to the sink to check their capacity
+                while node in belts:
+                    if belt_flow[node] + cluster_flow > BELT_MAX_FLOW:
+                        blocked = True
+                    node = belts[node]
+                break
+            if not is_free(node) or node in cluster:
+                blocked = True
+                break
+            path.append(node)
+            node = parent[node]
+
+        # skip the tile if it has no way out
+        if blocked:
+            continue
+
+        # place the cluster
+        for node, end_node in cluster.items():
+            if node == miner:
+                miners[node] = end_node
+            else:
+                extenders[node] = end_node
+
+        # place the belts and carry the flow to the sink
+        for node in path:
+            belts[node] = parent[node]
+            belt_flow[node] = 0
+        node = parent[miner]
+        while node in belts:
+            belt_flow[node] += cluster_flow
+            node = belts[node]
+
+    # ----------------------------------------------------------
+    # flows on every used edge
+    # ----------------------------------------------------------
+    flows : Dict[Tuple[Node, Node], int] = {}
+
+    # extractors output 1 plus everything chained into them, count from the ends of the chains
+    extractor_flow = {node: 1 for node in list(miners) + list(extenders)}
+    for node in sorted(extenders, key=lambda node: -chain_length(node, extenders)):
+        extractor_flow[extenders[node]] += extractor_flow[node]
+    for node, end_node in list(miners.items()) + list(extenders.items()):
+        flows[(node, end_node)] = extractor_flow[node]
+    for node, end_node in belts.items():
+        flows[(node, end_node)] = belt_flow[node]
+
+    return {"miners": miners, "extenders": extenders, "belts": belts, "flows": flows}
+
+def chain_length(node: Node, extenders: Dict[Node, Node]) -> int:
+    # number of extenders from the node to its miner
+    length = 0
+    while node in extenders:
+        node = extenders[node]
+        length += 1
+    return length
@@ -0,0 +1,20 @@
+# system
+from io import BytesIO
+
+# third party
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# the object oriented matplotlib API, each image has its own figure and canvas and no global pyplot state
+# is touched, so images can be rendered from many threads at the same time
+
+def new_figure(width: float = 6.4, height: float = 4.8) -> Figure:
+    figure = Figure(figsize=(width, height))
+    FigureCanvasAgg(figure)
+    return figure
+
+def figure_to_png(figure: Figure) -> BytesIO:
+    buffer = BytesIO()
+    figure.savefig(buffer, format='png', bbox_inches='tight')
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,64 @@
+# system
+from typing import Dict, Optional, Set
+from collections import OrderedDict
+import threading
+
+class ResultCache:
+    """
+    Rendered images, drawings and blueprints of the tasks, so repeated requests with the same options are not computed again.
+
+    A key starts with the task id and the version of its solution (AstroidSolver.solution_version), followed by
+    the kind of result and its options. A new solution gets a new version, so the results of an old one are never
+    served, and invalidate drops them right away. The least recently used results are evicted once the cached
+    strings take more than max_bytes.
+
+    Args:
+        max_bytes (int): Total size of the cached strings.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries : OrderedDict[tuple, str] = OrderedDict()
+        self.task_keys : Dict[str, Set[tuple]] = {}
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: str) -> None:
+        # results larger than the whole cache are not kept
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            self.discard(key)
+            self.entries[key] = value
+            self.task_keys.setdefault(key[0], set()).add(key)
+            self.num_bytes += len(value)
+            while self.num_bytes > self.max_bytes:
+                self.discard(next(iter(self.entries)))
+
+    def invalidate(self, task_id: str) -> None:
+        # drops all results of a task, after a new solve or when the task is removed
+        with self.lock:
+            for key in list(self.task_keys.get(task_id, ())):
+                self.discard(key)
+
+    def discard(self, key: tuple) -> None:
+        # called with the lock held
+        value = self.entries.pop(key, None)
+        if value is None:
+            return
+        self.num_bytes -= len(value)
+        keys = self.task_keys[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self.task_keys[key[0]]
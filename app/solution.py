@@ -0,0 +1,145 @@
+# system
+from typing import List, Optional
+
+# third party
+import numpy as np
+
+# project
+from app.var_to_txt import FakeVar
+
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+DIRECTION_VECTORS = np.array(DIRECTIONS, dtype=np.int32)
+
+# direction code of a step (dx, dy), at index (dx + 1) * 3 + (dy + 1)
+DIRECTION_CODES = np.full(9, -1, dtype=np.int8)
+for code, (dx, dy) in enumerate(DIRECTIONS):
+    DIRECTION_CODES[(dx + 1) * 3 + (dy + 1)] = code
+
+KINDS = ["miner", "extender", "belt", "flow"]
+
+def direction_codes(steps: np.ndarray) -> np.ndarray:
+    # the index in DIRECTIONS of each (dx, dy) row
+    steps = np.asarray(steps, dtype=np.int64).reshape(-1, 2)
+    return DIRECTION_CODES[(steps[:, 0] + 1) * 3 + (steps[:, 1] + 1)]
+
+def node_keys(nodes: np.ndarray) -> np.ndarray:
+    # one int64 per (x, y) row, to compare nodes with np.isin and np.unique
+    nodes = np.asarray(nodes, dtype=np.int64).reshape(-1, 2)
+    return (nodes[:, 0] << 32) + nodes[:, 1]
+
+class Edges:
+    """
+    The used elements of one kind (miners, extenders, belts or flows), each on the edge from a tile to its neighbour.
+
+    Only the elements with a value are kept, as arrays: nodes holds the (x, y) of the tile, directions the index of
+    the direction in DIRECTIONS and values the value (1 for platforms and belts, the amount for flows).
+    """
+    __slots__ = ("nodes", "directions", "values")
+
+    def __init__(self, nodes: Optional[np.ndarray] = None, directions: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None):
+        self.nodes = np.asarray(nodes if nodes is not None else [], dtype=np.int32).reshape(-1, 2)
+        self.directions = np.asarray(directions if directions is not None else [], dtype=np.int8)
+        self.values = np.asarray(values if values is not None else np.ones(len(self.nodes)), dtype=np.int32)
+
+    @classmethod
+    def from_edges(cls, edges: np.ndarray, values: np.ndarray) -> "Edges":
+        # edges as (x, y, x2, y2) rows, only the ones with a value are kept
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 4)
+        values = np.asarray(values, dtype=np.int64)
+        used = values > 0
+        edges = edges[used]
+        return cls(edges[:, :2], direction_codes(edges[:, 2:] - edges[:, :2]), values[used])
+
+    @classmethod
+    def from_vars(cls, variables: List[FakeVar]) -> "Edges":
+        # variables named "<kind>_<x>_<y>_<x2>_<y2>", as written by var_to_txt
+        used = [var for var in variables if var.X > 0.5]
+        edges = [list(map(int, var.VarName.split('_')[1:5])) for var in used]
+        return cls.from_edges(edges, [int(round(var.X)) for var in used])
+
+    @classmethod
+    def concatenate(cls, parts: List["Edges"]) -> "Edges":
+        if not parts:
+            return cls()
+        return cls(np.concatenate([part.nodes for part in parts]), np.concatenate([part.directions for part in parts]), np.concatenate([part.values for part in parts]))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def ends(self) -> np.ndarray:
+        # the neighbour tile each element points to
+        return self.nodes + DIRECTION_VECTORS[self.directions]
+
+    @property
+    def edges(self) -> np.ndarray:
+        # (x, y, x2, y2) rows
+        return np.hstack([self.nodes, self.ends])
+
+    @property
+    def nbytes(self) -> int:
+        return self.nodes.nbytes + self.directions.nbytes + self.values.nbytes
+
+    def select(self, mask: np.ndarray) -> "Edges":
+        return Edges(self.nodes[mask], self.directions[mask], self.values[mask])
+
+    def to_vars(self, kind: str) -> List[FakeVar]:
+        # the used elements as variables for var_to_txt
+        return [FakeVar(VarName=f"{kind}_{x}_{y}_{x2}_{y2}", X=value) for (x, y, x2, y2), value in zip(self.edges.tolist(), self.values.tolist())]
+
+class Solution:
+    """
+    A solved layout: the used miners, extenders, belts and flows as Edges, and the (x, y) of the used elevators.
+
+    Replaces one FakeVar per model variable, which also kept all the unused ones and had to be parsed from
+    its name by every consumer.
+    """
+    __slots__ = ("miners", "extenders", "belts", "flows", "elevators")
+
+    def __init__(self, miners: Optional[Edges] = None, extenders: Optional[Edges] = None, belts: Optional[Edges] = None, flows: Optional[Edges] = None, elevators: Optional[np.ndarray] = None):
+        self.miners = miners if miners is not None else Edges()
+        self.extenders = extenders if extenders is not None else Edges()
+        self.belts = belts if belts is not None else Edges()
+        self.flows = flows if flows is not None else Edges()
+        self.elevators = np.asarray(elevators if elevators is not None else [], dtype=np.int32).reshape(-1, 2)
+
+    @classmethod
+    def from_layout(cls, layout: dict) -> "Solution":
+        # a layout from to_layout, platforms as [kind, x, y, x2, y2, value] rows
+        rows = {kind: [] for kind in KINDS}
+        for kind, *row in layout["platforms"]:
+            rows[kind].append(row)
+        edges = {}
+        for kind, kind_rows in rows.items():
+            kind_rows = np.array(kind_rows, dtype=np.int64).reshape(-1, 5)
+            edges[kind] = Edges.from_edges(kind_rows[:, :4], kind_rows[:, 4])
+        return cls(edges["miner"], edges["extender"], edges["belt"], edges["flow"], layout["elevators"])
+
+    @classmethod
+    def concatenate(cls, solutions: List["Solution"]) -> "Solution":
+        return cls(
+            Edges.concatenate([solution.miners for solution in solutions]),
+            Edges.concatenate([solution.extenders for solution in solutions]),
+            Edges.concatenate([solution.belts for solution in solutions]),
+            Edges.concatenate([solution.flows for solution in solutions]),
+            np.concatenate([solution.elevators for solution in solutions]) if solutions else None)
+
+    def to_layout(self) -> dict:
+        # a compact json friendly form, platforms as [kind, x, y, x2, y2, value] rows
+        platforms = []
+        for kind, edges in zip(KINDS, [self.miners, self.extenders, self.belts, self.flows]):
+            platforms += [[kind, *edge, value] for edge, value in zip(edges.edges.tolist(), edges.values.tolist())]
+        return {"platforms": platforms, "elevators": self.elevators.tolist()}
+
+    @property
+    def nbytes(self) -> int:
+        # the size of the arrays, to account for the memory of the kept solutions
+        return self.miners.nbytes + self.extenders.nbytes + self.belts.nbytes + self.flows.nbytes + self.elevators.nbytes
+
+    def with_platforms(self, miners: Edges, extenders: Edges) -> "Solution":
+        # the same belts, flows and elevators with other miners and extenders
+        return Solution(miners, extenders, self.belts, self.flows, self.elevators)
+
+    def miner_flows(self) -> Edges:
+        # the flows out of the tiles with a miner
+        return self.flows.select(np.isin(node_keys(self.flows.nodes), node_keys(self.miners.nodes)))
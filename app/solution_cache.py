@@ -0,0 +1,182 @@
+# system
+from typing import Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+# third party
+import numpy as np
+
+# project
+from app.astroid_solver import SATURATION_WEIGHTS
+
+# the 8 symmetries of the grid (4 rotations, each with and without a mirror) as 2x2 matrices
+SYMMETRIES = [np.array(matrix, dtype=np.int64) for matrix in [
+    ((1, 0), (0, 1)),
+    ((0, -1), (1, 0)),
+    ((-1, 0), (0, -1)),
+    ((0, 1), (-1, 0)),
+    ((-1, 0), (0, 1)),
+    ((1, 0), (0, -1)),
+    ((0, 1), (1, 0)),
+    ((0, -1), (-1, 0)),
+]]
+
+def canonicalize(astroid_location: np.ndarray) -> Tuple[str, np.ndarray, np.ndarray]:
+    """
+    Finds the canonical form of an asteroid, the same for every translation, rotation and mirror of it.
+
+    Args:
+        astroid_location (np.ndarray): The asteroid tiles as (x, y) coordinates.
+
+    Returns:
+        tuple: The hash of the canonical tiles, and the matrix and offset that map a node to the
+               canonical frame (node @ matrix.T - offset).
+    """
+    sources = np.unique(np.asarray(astroid_location, dtype=np.int64).reshape(-1, 2), axis=0)
+
+    best = None
+    for matrix in SYMMETRIES:
+        transformed = sources @ matrix.T
+        offset = transformed.min(axis=0)
+        transformed = transformed - offset
+        transformed = transformed[np.lexsort((transformed[:, 1], transformed[:, 0]))]
+        candidate = transformed.tobytes()
+        if best is None or candidate < best[0]:
+            best = (candidate, matrix, offset)
+
+    candidate, matrix, offset = best
+    return hashlib.sha1(candidate).hexdigest(), matrix, offset
+
+def transform_layout(layout: dict, matrix: np.ndarray, offset: np.ndarray, inverse: bool = False) -> dict:
+    # moves a layout from AstroidSolver.get_layout to the canonical frame, or back with inverse
+    def transform(nodes: np.ndarray) -> np.ndarray:
+        if inverse:
+            return (nodes + offset) @ matrix
+        return nodes @ matrix.T - offset
+
+    platforms = layout["platforms"]
+    if platforms:
+        edges = np.array([platform[1:5] for platform in platforms], dtype=np.int64).reshape(-1, 2)
+        edges = transform(edges).reshape(-1, 4).tolist()
+        platforms = [[platform[0]] + edge + [platform[5]] for platform, edge in zip(platforms, edges)]
+    elevators = layout["elevators"]
+    if elevators:
+        elevators = transform(np.array(elevators, dtype=np.int64)).tolist()
+    return {"platforms": platforms, "elevators": elevators}
+
+def get_score(layout: dict) -> Tuple[int, int]:
+    # the two objectives of the solver, number of extractors and saturation of the miners
+    flows = {tuple(platform[1:5]): platform[5] for platform in layout["platforms"] if platform[0] == "flow"}
+    num_extractors = sum(1 for platform in layout["platforms"] if platform[0] in ["miner", "extender"])
+    saturation = sum(SATURATION_WEIGHTS[min(flows.get(tuple(platform[1:5]), 1), 4) - 1] for platform in layout["platforms"] if platform[0] == "miner")
+    return num_extractors, saturation
+
+class SolutionCache:
+    """
+    Solutions of the AstroidSolver keyed by the canonical asteroid shape and the elevator option.
+
+    The most recently used entries are kept in memory and every entry is also written to the
+    directory, so the cache survives restarts and is shared by the web workers (an entry is written to a
+    temporary file then renamed, and compared with the one on disk before). An entry is only used for a request if it was solved
+    with at least the requested time limits, and a better solution replaces the stored one.
+
+    Args:
+        directory (Optional[str]): Directory of the on-disk store, None keeps the cache in memory only.
+        max_entries (int): Number of entries kept in memory.
+    """
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 256):
+        self.directory = Path(directory) if directory is not None else None
+        self.max_entries = max_entries
+        self.entries : OrderedDict[str, dict] = OrderedDict()
+        self.lock = threading.Lock()
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, astroid_location: np.ndarray, with_elevator: bool, miners_timelimit: float, saturation_timelimit: float) -> Optional[dict]:
+        """
+        Returns the cached layout in the frame of astroid_location, or None if there is no good enough entry.
+        """
+        key, matrix, offset = canonicalize(astroid_location)
+        key = f"{key}_{int(with_elevator)}"
+
+        entry = self.load(key)
+        if entry is None:
+            return None
+        if entry["miners_timelimit"] < miners_timelimit or entry["saturation_timelimit"] < saturation_timelimit:
+            return None
+        return transform_layout(entry["layout"], matrix, offset, inverse=True)
+
+    def put(self, astroid_location: np.ndarray, with_elevator: bool, miners_timelimit: float, saturation_timelimit: float, layout: dict) -> None:
+        """
+        Stores a layout in the frame of astroid_location, keeping the better one if the shape is already cached.
+        """
+        key, matrix, offset = canonicalize(astroid_location)
+        key = f"{key}_{int(with_elevator)}"
+        entry = {
+            "miners_timelimit": miners_timelimit,
+            "saturation_timelimit": saturation_timelimit,
+            "score": list(get_score(layout)),
+            "layout": transform_layout(layout, matrix, offset),
+        }
+
+        # the file may have a better entry from another web worker than the one in memory
+        old_entry = self.read(key) if self.directory is not None else None
+        if old_entry is None:
+            old_entry = self.load(key)
+        if old_entry is not None:
+            # the stored solution is at least as good as a solve with the longer time limits
+            if old_entry["score"] >= entry["score"]:
+                entry["score"] = old_entry["score"]
+                entry["layout"] = old_entry["layout"]
+            entry["miners_timelimit"] = max(entry["miners_timelimit"], old_entry["miners_timelimit"])
+            entry["saturation_timelimit"] = max(entry["saturation_timelimit"], old_entry["saturation_timelimit"])
+
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        if self.directory is not None:
+            path = self.directory / f"{key}.json"
+            temporary_path = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(temporary_path, "w") as f:
+                    json.dump(entry, f)
+                os.replace(temporary_path, path)
+            except OSError as e:
+                logger.warning(f"[Cache] Failed to write {key}: {e}")
+
+    def load(self, key: str) -> Optional[dict]:
+        # from memory, or from the directory if it was evicted or written by an earlier run
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        if self.directory is None:
+            return None
+        entry = self.read(key)
+        if entry is None:
+            return None
+
+        with self.lock:
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def read(self, key: str) -> Optional[dict]:
+        # the entry in the directory
+        try:
+            with open(self.directory / f"{key}.json", "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
@@ -0,0 +1,266 @@
+# system
+from typing import Callable, Dict, Optional
+from multiprocessing.connection import Connection, wait
+import multiprocessing
+import threading
+import traceback
+import atexit
+import signal
+import sys
+import io
+import os
+import logging
+logger = logging.getLogger(__name__)
+
+# third party
+import numpy as np
+
+# project
+from app.astroid_solver import AstroidSolver, SolverParameters, stop_when_set
+
+class SolverPoolFullError(Exception):
+    pass
+
+class SolverJob:
+    def __init__(self, task_id: str, job: dict, on_start: Callable[[], None], on_log: Callable[[str], None], on_done: Callable[[Optional[dict]], None], on_incumbent: Optional[Callable[[dict], None]] = None, on_metrics: Optional[Callable[[dict], None]] = None):
+        self.task_id = task_id
+        self.job = job
+        self.on_start = on_start
+        self.on_log = on_log
+        self.on_done = on_done
+        self.on_incumbent = on_incumbent
+        self.on_metrics = on_metrics
+        self.process : Optional[multiprocessing.Process] = None
+        self.stop_event = None
+        self.running = False
+        self.cancelled = False
+
+class SolverPool:
+    """
+    Runs the solves in worker processes, so a solve can not block, crash or leak memory into the web server.
+
+    At most max_running solves run at the same time, up to max_queued more wait for a free slot and
+    anything above that is rejected with SolverPoolFullError. The log lines and improving solutions
+    of a solve are sent back over a pipe while it runs.
+
+    Args:
+        max_running (int): Number of solves running at the same time.
+        max_queued (int): Number of solves waiting for a free slot.
+        solver_cores (int): Cores shared by the running solves, each gets a fixed share of solver_cores // max_running
+            (a share that depends on the solves running when it starts would keep all cores for the first one).
+        stop_grace_period (float): Seconds a stopped solve has to return its best solution before its process is killed.
+    """
+    def __init__(self, max_running: int, max_queued: int, solver_cores: int, stop_grace_period: float = 10.0):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.solver_cores = solver_cores
+        self.stop_grace_period = stop_grace_period
+        self.slots = threading.Semaphore(max_running)
+        self.lock = threading.Lock()
+        self.jobs : Dict[str, SolverJob] = {}
+        self.num_running = 0
+
+        # forkserver starts the workers from a process that already imported the solver, spawn where it is not available
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context("forkserver")
+            self.context.set_forkserver_preload(["app.solver_pool"])
+        else:
+            self.context = multiprocessing.get_context("spawn")
+
+        atexit.register(self.shutdown)
+
+    @property
+    def num_queued(self) -> int:
+        with self.lock:
+            return len(self.jobs) - self.num_running
+
+    def submit(self, task_id: str, job: dict, on_start: Callable[[], None], on_log: Callable[[str], None], on_done: Callable[[Optional[dict]], None], on_incumbent: Optional[Callable[[dict], None]] = None, on_metrics: Optional[Callable[[dict], None]] = None) -> None:
+        """
+        Queues a solve, see solve_in_worker for the job fields.
+
+        on_start is called when the solve starts, on_log for every log line, on_incumbent (if given)
+        for the improving solutions as in AstroidSolver.report_incumbent, on_metrics (if given) with
+        the AstroidSolver.metrics of the finished solve and on_done with the layout of the solution
+        (None if there is none or the solve was cancelled), all from a thread of the pool.
+        """
+        solver_job = SolverJob(task_id, job, on_start, on_log, on_done, on_incumbent, on_metrics)
+        job["report_incumbents"] = on_incumbent is not None
+        with self.lock:
+            if task_id in self.jobs:
+                raise SolverPoolFullError(f"Task {task_id} is already queued")
+            if len(self.jobs) - self.num_running >= self.max_queued and self.num_running >= self.max_running:
+                raise SolverPoolFullError("Too many solves are waiting")
+            self.jobs[task_id] = solver_job
+            num_ahead = len(self.jobs) - self.num_running - 1
+            busy = self.num_running >= self.max_running
+        if busy:
+            on_log(f"Waiting for a free solver, {num_ahead} solves ahead")
+        threading.Thread(target=self.run_job, args=(solver_job,), daemon=True).start()
+
+    def cancel(self, task_id: str, graceful: bool = True) -> bool:
+        """
+        Stops a queued or running solve, returns False if the task has no solve.
+
+        A graceful stop ends the search and still returns the best solution found so far, the process
+        is only killed if it does not finish within stop_grace_period. Otherwise the process is killed
+        right away and no solution is returned.
+        """
+        with self.lock:
+            solver_job = self.jobs.get(task_id)
+            if solver_job is None:
+                return False
+            if solver_job.process is None or not graceful:
+                solver_job.cancelled = True
+            process = solver_job.process
+        if process is None:
+            return True
+        
+        if not graceful:
+            kill_process_group(process)
+            return True
+        
+        # ask the worker to stop, and kill it if it does not
+        # (only waits for the sentinel, joining here would race with the join in run_job)
+        solver_job.stop_event.set()
+        def kill_after_grace_period():
+            if not wait([process.sentinel], self.stop_grace_period):
+                logger.warning(f"[Solver] - {task_id} did not stop within {self.stop_grace_period} seconds, killing it")
+                kill_process_group(process)
+        threading.Thread(target=kill_after_grace_period, daemon=True).start()
+        return True
+
+    def shutdown(self) -> None:
+        for task_id in list(self.jobs):
+            self.cancel(task_id, graceful=False)
+
+    def run_job(self, solver_job: SolverJob) -> None:
+        layout = None
+        self.slots.acquire()
+        try:
+            with self.lock:
+                if solver_job.cancelled:
+                    return
+                self.num_running += 1
+                solver_job.running = True
+                solver_job.job["num_search_workers"] = max(1, self.solver_cores // self.max_running)
+
+            # the worker writes to one end of the pipe, the other end is read here
+            # (started outside of the lock, the first start also starts the forkserver)
+            reader, writer = self.context.Pipe(duplex=False)
+            stop_event = self.context.Event()
+            process = self.context.Process(target=solve_in_worker, args=(writer, solver_job.job, stop_event))
+            process.start()
+            writer.close()
+            with self.lock:
+                solver_job.process = process
+                solver_job.stop_event = stop_event
+            if solver_job.cancelled:
+                kill_process_group(process)
+            solver_job.on_start()
+
+            # forward the log lines until the worker sends its result or exits
+            while True:
+                try:
+                    kind, payload = reader.recv()
+                except (EOFError, OSError):
+                    break
+                if kind == "log":
+                    solver_job.on_log(payload)
+                elif kind == "incumbent":
+                    if solver_job.on_incumbent is not None:
+                        solver_job.on_incumbent(payload)
+                elif kind == "metrics":
+                    if solver_job.on_metrics is not None:
+                        solver_job.on_metrics(payload)
+                elif kind == "result":
+                    layout = payload
+                elif kind == "error":
+                    logger.error(f"[Solver] - {solver_job.task_id} failed:\n{payload}")
+                    solver_job.on_log("The solver failed")
+            reader.close()
+            solver_job.process.join()
+
+            if solver_job.cancelled:
+                layout = None
+            elif solver_job.process.exitcode != 0:
+                logger.error(f"[Solver] - {solver_job.task_id} worker exited with code {solver_job.process.exitcode}")
+                solver_job.on_log("The solver process stopped unexpectedly")
+        finally:
+            with self.lock:
+                if solver_job.running:
+                    self.num_running -= 1
+                del self.jobs[solver_job.task_id]
+            self.slots.release()
+            solver_job.on_done(layout)
+
+def kill_process_group(process: multiprocessing.Process) -> None:
+    # the worker leads its own process group, which also holds the processes of its cluster solves
+    # (right after the start it may not have its group yet, then only the worker is stopped)
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        process.terminate()
+
+class PipeWriter(io.TextIOBase):
+    # sends every printed line over the pipe
+    def __init__(self, send: Callable[[tuple], None]):
+        self.send = send
+        self.buffer = ""
+
+    def write(self, s: str) -> int:
+        self.buffer += s
+        while "\n" in self.buffer:
+            line, self.buffer = self.buffer.split("\n", 1)
+            self.send(("log", line))
+        return len(s)
+
+def solve_in_worker(connection: Connection, job: dict, stop_event) -> None:
+    """
+    Solves one asteroid in a worker process and sends ("log", line), ("incumbent", event), ("metrics", metrics),
+    ("error", traceback) and ("result", layout) messages over the connection. Setting stop_event stops the search.
+
+    The job has the fields astroid_location, with_elevator, miners_timelimit, saturation_timelimit,
+    num_search_workers, window_size, window_min_tiles, report_incumbents and previous (None, or a dict
+    with the layout, nodes and with_elevator of the previous solve of the task, for an incremental re-solve).
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+
+    # the search log and the stop watcher send from different threads
+    send_lock = threading.Lock()
+    def send(message: tuple) -> None:
+        with send_lock:
+            connection.send(message)
+    sys.stdout = PipeWriter(send)
+
+    solved = threading.Event()
+    try:
+        solver = AstroidSolver()
+        
+        # stop the search once stop_event is set, while it runs
+        threading.Thread(target=stop_when_set, args=(solver, stop_event, solved, lambda: send(("log", "Stopping the solver"))), daemon=True).start()
+        
+        solver.window_size = job["window_size"]
+        solver.window_min_tiles = job["window_min_tiles"]
+        if job.get("report_incumbents"):
+            solver.incumbent_callback = lambda event: send(("incumbent", event))
+        previous = job["previous"]
+        if previous is not None:
+            solver.set_layout(np.array(previous["nodes"]), previous["layout"])
+            solver.solved_with_elevator = previous["with_elevator"]
+
+        solver.add_astroid_locations(np.array(job["astroid_location"]), with_elevator=job["with_elevator"])
+        solver.run_solver(
+            miners_timelimit=job["miners_timelimit"],
+            saturation_timelimit=job["saturation_timelimit"],
+            with_elevator=job["with_elevator"],
+            log_callback=lambda msg: send(("log", msg)),
+            solver_parameters=SolverParameters(num_search_workers=job["num_search_workers"]))
+        solved.set()
+        send(("metrics", {**solver.metrics, "complete": solver.is_complete()}))
+        send(("result", solver.get_layout()))
+    except Exception:
+        send(("error", traceback.format_exc()))
+    finally:
+        solved.set()
+        connection.close()
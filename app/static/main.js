@@ -40,8 +40,6 @@ const miner_blueprints = {
 const miner_timelimit_max = 300;
 const saturation_timelimit_max = 300;
 
-const stats_refresh_interval_in_seconds = 5; // seconds
-
 let solve_for_fluid = false;
 
 // -----------------------------------------------
@@ -120,6 +118,7 @@ const checkbox_with_elevator = document.getElementById('with_elevator');
 const miners_timelimit = document.getElementById('miners_timelimit');
 const saturation_timelimit = document.getElementById('saturation_timelimit');
 const button_run_solver_and_stream = document.getElementById('run_solver_and_stream');
+const button_cancel_task = document.getElementById('cancel_task');
 const text_solver_output = document.getElementById("solver_output");
 
 const canvas_results = document.getElementById('result_canvas');
@@ -177,27 +176,20 @@ function update_default_dropdown_selection()
 populate_dropdown();
 update_default_dropdown_selection();
 
-// pull once at start
-function pull_stats_once()
+// the server sends the stats when they change (the browser reconnects on its own if the connection drops)
+function subscribe_to_stats()
 {
-    fetch('/get_stats/')
-    .then(response => response.json())
-    .then(data => {
+    const stats_source = new EventSource('/stats_stream');
+    stats_source.onmessage = function(event)
+    {
+        const data = JSON.parse(event.data);
         stats_tasks_ran_in_total.textContent = data.tasks_ran_in_total;
         stats_tasks_ran_today.textContent = data.tasks_ran_today;
         stats_current_running_tasks_num.textContent = data.current_running_tasks_num;
-    })
-    .catch(error => console.error('Error fetching stats:', error));
-}
-
-// pull every 5 seconds
-function pull_stats_periodically()
-{
-    setInterval(() => pull_stats_once(), stats_refresh_interval_in_seconds * 1000);
+    };
 }
 
-pull_stats_once();
-pull_stats_periodically();
+subscribe_to_stats();
 
 // -----------------------------------------------
 // link element to callbacks
@@ -221,6 +213,7 @@ saturation_timelimit.addEventListener('change', () => {
 });
 
 button_run_solver_and_stream.addEventListener('click', callback_run_solver_and_stream);
+button_cancel_task.addEventListener('click', callback_cancel_task);
 dropdown_miner_blueprint.addEventListener('change', callback_dropdown_change);
 button_generate_blueprint.addEventListener('click', callback_generate_blueprint);
 
@@ -250,6 +243,124 @@ function update_canvas_image(canvas, image_url)
     img.src = image_url; // set image source to the URL
 }
 
+// draw a solution from /get_solver_drawing on a canvas, with the same colors and symbols as the server image
+function draw_solution(canvas, drawing)
+{
+    const directions = [[1, 0], [0, 1], [-1, 0], [0, -1]];
+
+    // bounds of the field, with a border of 1 for the belts leaving it
+    let x_min = Infinity, x_max = -Infinity, y_min = Infinity, y_max = -Infinity;
+    for (let i = 0; i < drawing.tiles.length; i += 2)
+    {
+        x_min = Math.min(x_min, drawing.tiles[i]);
+        x_max = Math.max(x_max, drawing.tiles[i]);
+        y_min = Math.min(y_min, drawing.tiles[i + 1]);
+        y_max = Math.max(y_max, drawing.tiles[i + 1]);
+    }
+    x_min -= 1; x_max += 1; y_min -= 1; y_max += 1;
+
+    // pixels per tile, smaller for large fields so the canvas stays within the browser limits
+    const cell = Math.max(4, Math.min(30, Math.floor(8000 / Math.max(x_max - x_min + 1, y_max - y_min + 1))));
+    const header = 30;
+    canvas.width = (x_max - x_min + 1) * cell;
+    canvas.height = (y_max - y_min + 1) * cell + header;
+    const context = canvas.getContext('2d');
+    context.fillStyle = 'white';
+    context.fillRect(0, 0, canvas.width, canvas.height);
+
+    // tile centers in pixels, y points up as in the game
+    const px = x => (x - x_min + 0.5) * cell;
+    const py = y => (y_max - y + 0.5) * cell + header;
+
+    // title
+    const count = (values, stride) => values.length / stride;
+    context.fillStyle = 'black';
+    context.font = '16px sans-serif';
+    context.textBaseline = 'middle';
+    const num_saturated = drawing.throughput.filter(items => items >= 4).length;
+    context.fillText(`Asteroid Miner Solution = ${count(drawing.miners, 3)} miners (${num_saturated} saturated), ${count(drawing.extenders, 3)} extenders, ${count(drawing.belts, 3)} belts`, 5, header / 2);
+
+    // asteroid tiles
+    context.fillStyle = 'lightgrey';
+    for (let i = 0; i < drawing.tiles.length; i += 2)
+    {
+        context.fillRect(px(drawing.tiles[i]) - cell * 0.4, py(drawing.tiles[i + 1]) - cell * 0.4, cell * 0.8, cell * 0.8);
+    }
+
+    // belts, and the links of the miners (to their belt) and of the extenders (to their miner or extender), each kind as one path
+    function draw_links(values, color, width)
+    {
+        context.beginPath();
+        for (let i = 0; i < values.length; i += 3)
+        {
+            const [dx, dy] = directions[values[i + 2]];
+            context.moveTo(px(values[i]), py(values[i + 1]));
+            context.lineTo(px(values[i] + dx), py(values[i + 1] + dy));
+        }
+        context.strokeStyle = color;
+        context.lineWidth = width;
+        context.stroke();
+    }
+    draw_links(drawing.belts, 'blue', Math.max(1, cell / 12));
+    draw_links(drawing.miners, 'blue', Math.max(1, cell / 12));
+    draw_links(drawing.extenders, 'black', Math.max(1, cell / 24));
+
+    // miners as triangles pointing in their direction
+    context.beginPath();
+    for (let i = 0; i < drawing.miners.length; i += 3)
+    {
+        const [dx, dy] = directions[drawing.miners[i + 2]];
+        const x = px(drawing.miners[i]), y = py(drawing.miners[i + 1]), r = cell * 0.3;
+        context.moveTo(x + dx * r, y - dy * r);
+        context.lineTo(x - dx * r - dy * r, y + dy * r - dx * r);
+        context.lineTo(x - dx * r + dy * r, y + dy * r + dx * r);
+        context.closePath();
+    }
+    context.fillStyle = 'green';
+    context.fill();
+    context.strokeStyle = 'black';
+    context.lineWidth = 1;
+    context.stroke();
+
+    // extenders as circles
+    context.beginPath();
+    for (let i = 0; i < drawing.extenders.length; i += 3)
+    {
+        const x = px(drawing.extenders[i]), y = py(drawing.extenders[i + 1]);
+        context.moveTo(x + cell * 0.25, y);
+        context.arc(x, y, cell * 0.25, 0, 2 * Math.PI);
+    }
+    context.fillStyle = 'orange';
+    context.fill();
+    context.stroke();
+
+    // elevators as crosses
+    context.beginPath();
+    for (let i = 0; i < drawing.elevators.length; i += 2)
+    {
+        const x = px(drawing.elevators[i]), y = py(drawing.elevators[i + 1]), r = cell * 0.35;
+        context.moveTo(x - r, y - r); context.lineTo(x + r, y + r);
+        context.moveTo(x - r, y + r); context.lineTo(x + r, y - r);
+    }
+    context.strokeStyle = 'blue';
+    context.lineWidth = Math.max(1, cell / 10);
+    context.stroke();
+
+    // flow out of the miners, halfway to the next tile (skipped when too small to read)
+    if (cell >= 12)
+    {
+        context.fillStyle = 'blue';
+        context.font = `${Math.round(cell * 0.5)}px sans-serif`;
+        context.textAlign = 'center';
+        for (let i = 0; i < drawing.flows.length; i += 4)
+        {
+            const [dx, dy] = directions[drawing.flows[i + 2]];
+            context.fillText(drawing.flows[i + 3].toString(), px(drawing.flows[i] + dx / 2), py(drawing.flows[i + 1] + dy / 2));
+        }
+        context.textAlign = 'start';
+    }
+}
+
 function task_not_found_alert(error_text) 
 {
     if (error_text.includes("Task not found")) 
@@ -460,17 +571,28 @@ async function callback_increase_threshold()
     callback_threshold_change(); // call the threshold change callback to update the preview
 }   
 
+// the final result, drawn and composed as a blueprint
 async function get_solver_result()
+{
+    if (await get_solver_drawing())
+    {
+        // try generating the blueprint
+        callback_generate_blueprint();
+    }
+}
+
+// draw the current solution, also for the improving solutions while the solver runs (the blueprint is only composed at the end)
+async function get_solver_drawing()
 {
     // -------------------------------------
     // send to server
     // -------------------------------------
 
-    // request the final result
+    // request the current solution
     form = new FormData();
     form.append('task_id', task_id); // add task_id to the form
     form.append('remove_non_saturated_miners', checkbox_remove_non_saturated_miners.checked.toString()); // add remove_non_saturated_miners to the form
-    const response = await fetch(`/get_solver_results`, {method: 'POST', body: form});
+    const response = await fetch(`/get_solver_drawing`, {method: 'POST', body: form});
     
     // -------------------------------------
     // process response
@@ -480,19 +602,17 @@ async function get_solver_result()
     if (!response.ok)
     {
         const error_text = await response.text();
-        console.error('Failed to get final result:', error_text);
+        console.error('Failed to get the solution:', error_text);
         task_not_found_alert(error_text);
-        return;
+        return false;
     }
 
-    // get the final result
+    // get the solution
     const result = await response.json();
 
-    // draw the image on the canvas
-    update_canvas_image(canvas_results, `data:image/png;base64,${result.solution_image}`);
-
-    // try generating the blueprint
-    callback_generate_blueprint();
+    // draw the solution on the canvas (the server image from /get_solver_results is kept for other clients)
+    draw_solution(canvas_results, result.drawing);
+    return true;
 }
 
 async function callback_run_solver_and_stream() 
@@ -507,24 +627,28 @@ async function callback_run_solver_and_stream()
         return;
     }
 
-    // send request to server for task_id
-    const response = await fetch('/get_task_id/', {method: 'GET'});
-    // ensure the response is ok
-    if (!response.ok) 
+    // send request to server for task_id, the task_id of the previous run is kept so the server
+    // only re-optimizes around the edited tiles
+    if (!task_id)
     {
-        const error_text = await response.text();
-        console.error('Failed to get task_id:', error_text);
-        task_not_found_alert(error_text);
-        return;
-    }
+        const response = await fetch('/get_task_id/', {method: 'GET'});
+        // ensure the response is ok
+        if (!response.ok) 
+        {
+            const error_text = await response.text();
+            console.error('Failed to get task_id:', error_text);
+            task_not_found_alert(error_text);
+            return;
+        }
 
-    // get the task_id from the response
-    const data = await response.json();
-    task_id = data.task_id;
-    if (!task_id) 
-    {
-        console.error('No task_id received from the server.');
-        return;
+        // get the task_id from the response
+        const data = await response.json();
+        task_id = data.task_id;
+        if (!task_id) 
+        {
+            console.error('No task_id received from the server.');
+            return;
+        }
     }
     console.log('Task ID:', task_id);
 
@@ -569,14 +693,49 @@ async function callback_run_solver_and_stream()
         }
     };
 
+    // upon an improving solution, show it while the solver keeps running (at most every 5 seconds)
+    let last_incumbent_time = 0;
+    eventSource.addEventListener('incumbent', function(event)
+    {
+        const incumbent = JSON.parse(event.data);
+        text_solver_output.textContent += `Found ${incumbent.num_miners} miners, ${incumbent.num_extenders} extenders (${incumbent.phase}, ${incumbent.time.toFixed(1)} s)\n`;
+        text_solver_output.scrollTop = text_solver_output.scrollHeight;
+
+        if (Date.now() - last_incumbent_time > 5000)
+        {
+            last_incumbent_time = Date.now();
+            get_solver_drawing().catch(err => console.error("Error fetching intermediate result:", err));
+        }
+    });
+
     // upon error
-    eventSource.onerror = function() 
+    eventSource.onerror = function()
     {
         text_solver_output.textContent += "\n[Connection closed or error]\n";
         eventSource.close();
     };
 }
 
+async function callback_cancel_task()
+{
+    // won't work if no task_id
+    if (!task_id)
+    {
+        console.error('No task_id available. Please run the solver first.');
+        return;
+    }
+
+    // the solver stops and sends DONE with the best solution found so far
+    const form = new FormData();
+    form.append('task_id', task_id);
+    const response = await fetch('/cancel_task/', {method: 'POST', body: form});
+    if (!response.ok)
+    {
+        const error_text = await response.text();
+        console.error('Failed to stop the solver:', error_text);
+    }
+}
+
 function update_copy_brush_blueprint_text()
 {
     if (solve_for_fluid)
@@ -1,8 +1,3 @@
-// -----------------------------------------------
-// data
-// -----------------------------------------------
-const stats_refresh_interval_in_seconds = 5; // seconds
-
 // -----------------------------------------------
 // get web page elements
 // -----------------------------------------------
@@ -19,26 +14,19 @@ const stats_qrs_generated_in_total = document.getElementById('stats_qrs_generate
 const stats_qrs_generated_today = document.getElementById('stats_qrs_generated_today');
 const boost_error_correction_level = document.getElementById('boost_error_correction_level');
 
-// pull once at start
-function pull_stats_once()
+// the server sends the stats when they change (the browser reconnects on its own if the connection drops)
+function subscribe_to_stats()
 {
-    fetch('/get_qr_stats/')
-    .then(response => response.json())
-    .then(data => {
+    const stats_source = new EventSource('/stats_stream');
+    stats_source.onmessage = function(event)
+    {
+        const data = JSON.parse(event.data);
         stats_qrs_generated_in_total.textContent = data.qr_codes_ran_in_total;
         stats_qrs_generated_today.textContent = data.qr_codes_ran_today;
-    })
-    .catch(error => console.error('Error fetching stats:', error));
-}
-
-// pull every 5 seconds
-function pull_stats_periodically()
-{
-    setInterval(() => pull_stats_once(), stats_refresh_interval_in_seconds * 1000);
+    };
 }
 
-pull_stats_once();
-pull_stats_periodically();
+subscribe_to_stats();
 
 // -----------------------------------------------
 // callback functions
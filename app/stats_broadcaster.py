@@ -0,0 +1,59 @@
+# system
+from typing import Callable, Optional
+import asyncio
+import logging
+logger = logging.getLogger(__name__)
+
+class StatsBroadcaster:
+    """
+    Sends the stats to every subscribed page, only when they change.
+
+    One producer task reads the stats every interval seconds and puts a changed snapshot into the queue
+    of every subscriber, so the cost does not grow with the number of open pages. A subscriber only
+    keeps the latest snapshot, a slow one skips the ones in between. The producer only runs while
+    there are subscribers. Everything runs on the event loop.
+
+    Args:
+        get_snapshot (Callable[[], dict]): Returns the current stats, must be cheap.
+        interval (float): Seconds between two reads of the stats.
+    """
+    def __init__(self, get_snapshot: Callable[[], dict], interval: float = 1.0):
+        self.get_snapshot = get_snapshot
+        self.interval = interval
+        self.subscribers : set[asyncio.Queue] = set()
+        self.snapshot : Optional[dict] = None
+        self.producer : Optional[asyncio.Task] = None
+
+    @property
+    def num_subscribers(self) -> int:
+        return len(self.subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        # the queue starts with the current stats
+        queue = asyncio.Queue(maxsize=1)
+        self.snapshot = self.get_snapshot()
+        queue.put_nowait(self.snapshot)
+        self.subscribers.add(queue)
+        if self.producer is None or self.producer.done():
+            self.producer = asyncio.get_running_loop().create_task(self.produce())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    async def produce(self) -> None:
+        while self.subscribers:
+            await asyncio.sleep(self.interval)
+            try:
+                snapshot = self.get_snapshot()
+            except Exception:
+                logger.exception("[Stats] Failed to read the stats")
+                continue
+            if snapshot == self.snapshot:
+                continue
+            self.snapshot = snapshot
+            for queue in list(self.subscribers):
+                # replace the snapshot the subscriber did not read yet
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(snapshot)
@@ -0,0 +1,149 @@
+# system
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from contextlib import contextmanager
+import sqlite3
+import threading
+import atexit
+import logging
+logger = logging.getLogger(__name__)
+
+def current_date() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+class StatsStore:
+    """
+    Total and daily counters, kept in memory and written to a SQLite file in batches.
+
+    Increments and reads only touch memory. Every flush_interval seconds the increments since the last
+    flush are added to the file in one transaction, so a crash loses at most that many seconds of counts.
+    The counters are then read back from the file, so the web workers sharing it show the same counts.
+    The daily counters roll over at midnight (local time), the file keeps one row per day and counter.
+
+    Args:
+        path (str): The SQLite file.
+        flush_interval (float): Seconds between two writes to the file.
+        legacy_files (Optional[Dict[str, Tuple[str, str]]]): Counter name -> (total file, daily file) of the
+            old text counters, imported once if the SQLite file does not have the counter yet.
+    """
+    def __init__(self, path: str, flush_interval: float = 10.0, legacy_files: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+        # current values, and the increments not written yet
+        self.totals : Dict[str, int] = {}
+        self.daily : Dict[Tuple[str, str], int] = {}
+        self.pending_totals : Dict[str, int] = {}
+        self.pending_daily : Dict[Tuple[str, str], int] = {}
+
+        with self.connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS daily (date TEXT NOT NULL, name TEXT NOT NULL, value INTEGER NOT NULL, PRIMARY KEY (date, name))")
+            for name, (total_path, daily_path) in (legacy_files or {}).items():
+                self.import_legacy_files(connection, name, total_path, daily_path)
+            self.totals = dict(connection.execute("SELECT name, value FROM totals").fetchall())
+            self.daily = {(date, name): value for date, name, value in connection.execute("SELECT date, name, value FROM daily WHERE date = ?", (current_date(),)).fetchall()}
+
+        self.schedule_flush()
+        atexit.register(self.flush)
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        # a connection per use, committed at the end
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def increment(self, name: str) -> None:
+        key = (current_date(), name)
+        with self.lock:
+            self.totals[name] = self.totals.get(name, 0) + 1
+            self.pending_totals[name] = self.pending_totals.get(name, 0) + 1
+            self.daily[key] = self.daily.get(key, 0) + 1
+            self.pending_daily[key] = self.pending_daily.get(key, 0) + 1
+
+    def get_total(self, name: str) -> int:
+        return self.totals.get(name, 0)
+
+    def get_today(self, name: str) -> int:
+        return self.daily.get((current_date(), name), 0)
+
+    def flush(self) -> None:
+        # write the increments since the last flush, in one transaction
+        with self.flush_lock:
+            with self.lock:
+                pending_totals, self.pending_totals = self.pending_totals, {}
+                pending_daily, self.pending_daily = self.pending_daily, {}
+
+                # only today is kept in memory
+                today = current_date()
+                self.daily = {key: value for key, value in self.daily.items() if key[0] == today}
+
+            try:
+                with self.connect() as connection:
+                    connection.executemany(
+                        "INSERT INTO totals (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                        list(pending_totals.items()))
+                    connection.executemany(
+                        "INSERT INTO daily (date, name, value) VALUES (?, ?, ?) ON CONFLICT (date, name) DO UPDATE SET value = value + excluded.value",
+                        [(date, name, value) for (date, name), value in pending_daily.items()])
+                    totals = dict(connection.execute("SELECT name, value FROM totals").fetchall())
+                    daily = {(date, name): value for date, name, value in connection.execute("SELECT date, name, value FROM daily WHERE date = ?", (today,)).fetchall()}
+
+                # the counts of the other workers, and the increments since the swap above
+                with self.lock:
+                    for name, value in self.pending_totals.items():
+                        totals[name] = totals.get(name, 0) + value
+                    for key, value in self.pending_daily.items():
+                        daily[key] = daily.get(key, 0) + value
+                    self.totals = totals
+                    self.daily = daily
+            except sqlite3.Error as e:
+                # keep the increments for the next flush
+                logger.warning(f"[Stats] Failed to write {self.path}: {e}")
+                with self.lock:
+                    for name, value in pending_totals.items():
+                        self.pending_totals[name] = self.pending_totals.get(name, 0) + value
+                    for key, value in pending_daily.items():
+                        self.pending_daily[key] = self.pending_daily.get(key, 0) + value
+
+    def schedule_flush(self) -> None:
+        def flush_and_reschedule():
+            self.flush()
+            self.schedule_flush()
+        timer = threading.Timer(self.flush_interval, flush_and_reschedule)
+        timer.daemon = True
+        timer.start()
+
+    def import_legacy_files(self, connection: sqlite3.Connection, name: str, total_path: str, daily_path: str) -> None:
+        # the old counters, a file with the total and a file with one "date:count" line per day
+        if connection.execute("SELECT 1 FROM totals WHERE name = ?", (name,)).fetchone() is not None:
+            return
+        try:
+            with open(total_path, "r") as f:
+                total = int(f.read())
+        except (FileNotFoundError, ValueError):
+            return
+
+        daily = []
+        try:
+            with open(daily_path, "r") as f:
+                for line in f:
+                    parts = line.strip().split(":")
+                    if len(parts) == 2 and parts[1].isdigit():
+                        daily.append((parts[0], name, int(parts[1])))
+        except FileNotFoundError:
+            pass
+
+        # another web worker may have imported them first
+        if connection.execute("INSERT OR IGNORE INTO totals (name, value) VALUES (?, ?)", (name, total)).rowcount == 0:
+            return
+        connection.executemany("INSERT OR REPLACE INTO daily (date, name, value) VALUES (?, ?, ?)", daily)
+        logger.info(f"[Stats] Imported {name} from {total_path}: {total} in total, {len(daily)} days")
@@ -0,0 +1,571 @@
+# system
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from time import time
+import json
+import sqlite3
+import threading
+import zlib
+import logging
+
+# third party
+import numpy as np
+
+# project
+from app.astroid_solver import AstroidSolver
+
+logger = logging.getLogger(__name__)
+
+# statuses of a task, it is running while queued or running
+RUNNING_STATUSES = ("queued", "running")
+
+# messages of a stream kept while it runs (a follower further behind misses the oldest ones), and after its solve
+# for the followers still reading it (see read_events)
+RUNNING_EVENTS_KEPT = 1000
+FINISHED_EVENTS_KEPT = 100
+
+class TaskStore:
+    """
+    The tasks of the visitors, each with its AstroidSolver once it ran (only its compact solution, the model is
+    built and solved in the worker processes).
+
+    A task expires lifespan seconds after it was last used. The least recently used tasks are evicted once there
+    are more than max_tasks, or once their estimated size (AstroidSolver.get_num_bytes and the messages of their
+    stream) is above max_bytes. Running
+    tasks are neither expired nor evicted, the solver writes its solution to them.
+
+    A task also has a status (queued, running, then done, failed or cancelled), a cancel request and the messages
+    of the stream of its solve, so requests other than the one that started the solve can stop it (request_cancel)
+    or follow it (read_events). This is the in-process task backend, SQLiteTaskStore shares the tasks between
+    several web worker processes.
+
+    Args:
+        max_tasks (int): Number of tasks kept.
+        max_bytes (int): Total estimated size of the tasks.
+        lifespan (float): Seconds a task is kept after its last use.
+        on_remove (callable): Called with the id of every expired or evicted task, to drop what is kept for it elsewhere.
+    """
+    def __init__(self, max_tasks: int = 500, max_bytes: int = 256 * 1024 * 1024, lifespan: float = 900, on_remove: Optional[Callable[[str], None]] = None):
+        self.max_tasks = max_tasks
+        self.max_bytes = max_bytes
+        self.lifespan = lifespan
+        self.on_remove = on_remove
+        self.solvers : OrderedDict[str, Optional[AstroidSolver]] = OrderedDict()
+        self.timestamps : Dict[str, float] = {}
+        self.task_bytes : Dict[str, int] = {}
+        self.running : Set[str] = set()
+        self.statuses : Dict[str, str] = {}
+        self.cancel_requested : Set[str] = set()
+        self.events : Dict[str, Deque[Tuple[int, str]]] = {}
+        self.event_bytes : Dict[str, int] = {}
+        self.num_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.solvers)
+
+    def create(self, task_id: str) -> None:
+        # a new task, without a solver until it runs
+        with self.lock:
+            self.touch(task_id)
+            removed = self.evict()
+        self.removed(removed)
+
+    def get(self, task_id: str) -> Optional[AstroidSolver]:
+        # the solver of a task, None if the task is unknown, expired or never ran
+        with self.lock:
+            if task_id not in self.solvers:
+                return None
+            if task_id not in self.running and time() - self.timestamps[task_id] > self.lifespan:
+                self.remove(task_id)
+                self.expirations += 1
+                removed = [task_id]
+                solver = None
+            else:
+                self.touch(task_id)
+                removed = []
+                solver = self.solvers[task_id]
+        self.removed(removed)
+        return solver
+
+    def start(self, task_id: str) -> Optional[AstroidSolver]:
+        # marks the task as running and returns its solver (created if needed), None if it is already running
+        with self.lock:
+            if task_id in self.running:
+                return None
+            self.touch(task_id)
+            if self.solvers[task_id] is None:
+                self.solvers[task_id] = AstroidSolver()
+            self.running.add(task_id)
+            self.statuses[task_id] = "queued"
+            self.cancel_requested.discard(task_id)
+            self.events[task_id] = deque(maxlen=RUNNING_EVENTS_KEPT)
+            self.event_bytes[task_id] = 0
+            self.account(task_id)
+            return self.solvers[task_id]
+
+    def set_status(self, task_id: str, status: str) -> None:
+        with self.lock:
+            if task_id in self.solvers:
+                self.statuses[task_id] = status
+
+    def update(self, task_id: str) -> None:
+        # the solver of the task has a new solution, its new size is accounted
+        with self.lock:
+            removed = []
+            if task_id in self.solvers:
+                self.account(task_id)
+                removed = self.evict()
+        self.removed(removed)
+
+    def finish(self, task_id: str, status: str = "done") -> None:
+        # the task is not running anymore (and was just used), its new size is accounted and tasks are evicted if needed
+        with self.lock:
+            self.running.discard(task_id)
+            self.cancel_requested.discard(task_id)
+            if task_id not in self.solvers:
+                return
+            self.touch(task_id)
+            self.statuses[task_id] = status
+            self.solvers[task_id].release_model()
+            events = self.events.get(task_id)
+            while events is not None and len(events) > FINISHED_EVENTS_KEPT:
+                self.event_bytes[task_id] -= len(events.popleft()[1])
+            self.account(task_id)
+            removed = self.evict()
+        self.removed(removed)
+
+    def put(self, task_id: str, solver: AstroidSolver) -> None:
+        # keeps a solver loaded from elsewhere as the solver of the task
+        with self.lock:
+            self.touch(task_id)
+            self.solvers[task_id] = solver
+            self.account(task_id)
+            removed = self.evict()
+        self.removed(removed)
+
+    def discard(self, task_id: str) -> None:
+        # removes a task that is not running
+        with self.lock:
+            if task_id not in self.solvers or task_id in self.running:
+                return
+            self.remove(task_id)
+        self.removed([task_id])
+
+    def request_cancel(self, task_id: str) -> bool:
+        # asks the solve of a running task to stop, see is_cancel_requested
+        with self.lock:
+            if task_id not in self.running:
+                return False
+            self.cancel_requested.add(task_id)
+            return True
+
+    def is_cancel_requested(self, task_id: str) -> bool:
+        return task_id in self.cancel_requested
+
+    def publish(self, task_id: str, message: str) -> None:
+        # a message of the stream of the running solve, for read_events (the oldest one is dropped above RUNNING_EVENTS_KEPT)
+        with self.lock:
+            events = self.events.get(task_id)
+            if events is None:
+                return
+            num_bytes = len(message)
+            if len(events) == events.maxlen:
+                num_bytes -= len(events[0][1])
+            events.append((events[-1][0] + 1 if events else 1, message))
+            self.event_bytes[task_id] += num_bytes
+            self.task_bytes[task_id] = self.task_bytes.get(task_id, 0) + num_bytes
+            self.num_bytes += num_bytes
+            removed = self.evict()
+        self.removed(removed)
+
+    def read_events(self, task_id: str, after: int = 0) -> Tuple[List[Tuple[int, str]], bool]:
+        # the (id, message) of the stream with an id above after, and whether the task is still running
+        with self.lock:
+            events = [event for event in self.events.get(task_id, ()) if event[0] > after]
+            return events, task_id in self.running
+
+    def count_statuses(self) -> Dict[str, int]:
+        # the number of queued and running tasks
+        with self.lock:
+            counts = {status: 0 for status in RUNNING_STATUSES}
+            for task_id in self.running:
+                counts[self.statuses[task_id]] += 1
+            return counts
+
+    def get_metrics(self, task_id: str) -> Optional[dict]:
+        # the metrics of the tasks and their totals are only shared by SQLiteTaskStore,
+        # in a single process SolverTelemetry already has them
+        return None
+
+    def get_totals(self) -> Optional[Dict[Tuple[str, str], float]]:
+        return None
+
+    def expire(self) -> None:
+        # removes the tasks not used for lifespan seconds
+        now = time()
+        with self.lock:
+            removed = [task_id for task_id, timestamp in self.timestamps.items() if now - timestamp > self.lifespan and task_id not in self.running]
+            for task_id in removed:
+                self.remove(task_id)
+            self.expirations += len(removed)
+        for task_id in removed:
+            logger.info(f"[Removing task] - {task_id}")
+        self.removed(removed)
+
+    def account(self, task_id: str) -> None:
+        # called with the lock held, the estimated size of the task
+        solver = self.solvers[task_id]
+        num_bytes = solver.get_num_bytes() if solver is not None else 0
+        num_bytes += self.event_bytes.get(task_id, 0)
+        self.num_bytes += num_bytes - self.task_bytes.get(task_id, 0)
+        self.task_bytes[task_id] = num_bytes
+
+    def touch(self, task_id: str) -> None:
+        # called with the lock held, the task is the most recently used
+        if task_id not in self.solvers:
+            self.solvers[task_id] = None
+        self.solvers.move_to_end(task_id)
+        self.timestamps[task_id] = time()
+
+    def evict(self) -> List[str]:
+        # called with the lock held, removes the least recently used tasks that are not running while over the caps
+        removed = []
+        for task_id in list(self.solvers):
+            if len(self.solvers) <= self.max_tasks and self.num_bytes <= self.max_bytes:
+                break
+            if task_id in self.running:
+                continue
+            self.remove(task_id)
+            removed.append(task_id)
+        self.evictions += len(removed)
+        if removed:
+            logger.info(f"[Evicting tasks] - {len(removed)} tasks, {len(self.solvers)} tasks and {self.num_bytes // (1024 * 1024)} MB left")
+        return removed
+
+    def remove(self, task_id: str) -> None:
+        # called with the lock held
+        del self.solvers[task_id]
+        del self.timestamps[task_id]
+        self.num_bytes -= self.task_bytes.pop(task_id, 0)
+        self.statuses.pop(task_id, None)
+        self.cancel_requested.discard(task_id)
+        self.events.pop(task_id, None)
+        self.event_bytes.pop(task_id, None)
+
+    def removed(self, task_ids: List[str]) -> None:
+        # called without the lock, on_remove may take other locks
+        if self.on_remove is not None:
+            for task_id in task_ids:
+                self.on_remove(task_id)
+
+class SQLiteTaskStore:
+    """
+    The tasks in a SQLite file shared by the web worker processes (uvicorn --workers), so every worker can serve
+    every request of a task. The file holds the status of each task, its cancel request, the solution of its last
+    solve (updated with every improving solution while it runs, with a version) and the messages of its stream.
+
+    The solve and the stream of a task run in the worker that started it, it polls is_cancel_requested to stop on
+    a /cancel_task/ received by another worker, and the other workers follow the stream with read_events. The
+    messages of the stream, the metrics of the tasks (set_metrics) and the telemetry totals (add_totals) are kept
+    in memory and written every flush_interval seconds in one transaction, which also reads the number of running
+    tasks of all workers for count_statuses, so they are never written or read on the event loop. Each
+    worker keeps the solvers it loaded in a TaskStore of its own (bounded by max_tasks and max_bytes), and loads a
+    task again when another worker saved a newer version of its solution. The file keeps at most max_tasks tasks,
+    which expire lifespan seconds after their last use. A task stuck running for lifespan seconds (its worker
+    exited) is not running anymore.
+
+    Same methods as TaskStore, and set_metrics and add_totals for SolverTelemetry.
+
+    Args:
+        path (str): The SQLite file.
+        max_tasks (int): Number of tasks kept.
+        max_bytes (int): Total estimated size of the tasks loaded by this worker.
+        lifespan (float): Seconds a task is kept after its last use.
+        on_remove (callable): Called with the id of every task removed from this worker.
+        flush_interval (float): Seconds between two writes of the messages, metrics and totals.
+    """
+    def __init__(self, path: str, max_tasks: int = 500, max_bytes: int = 256 * 1024 * 1024, lifespan: float = 900, on_remove: Optional[Callable[[str], None]] = None, flush_interval: float = 0.5):
+        self.path = path
+        self.max_tasks = max_tasks
+        self.lifespan = lifespan
+        self.on_remove = on_remove
+        self.flush_interval = flush_interval
+        self.local = TaskStore(max_tasks=max_tasks, max_bytes=max_bytes, lifespan=lifespan, on_remove=self.removed_locally)
+        self.versions : Dict[str, int] = {}
+        self.num_evicted = 0
+        self.num_expired = 0
+
+        # written by flush, the ids of the messages of the streams of this worker are counted here
+        self.pending_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pending_events : Dict[str, List[Tuple[int, str]]] = {}
+        self.event_ids : Dict[str, int] = {}
+        self.pending_metrics : Dict[str, dict] = {}
+        self.pending_totals : Dict[Tuple[str, str], float] = {}
+        self.statuses_count = {status: 0 for status in RUNNING_STATUSES}
+
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS tasks (task_id TEXT PRIMARY KEY, last_used REAL NOT NULL, status TEXT, status_time REAL, cancel INTEGER NOT NULL DEFAULT 0, version INTEGER NOT NULL DEFAULT 0, solution BLOB, metrics TEXT)")
+            connection.execute("CREATE TABLE IF NOT EXISTS events (task_id TEXT NOT NULL, id INTEGER NOT NULL, message TEXT NOT NULL, PRIMARY KEY (task_id, id))")
+            connection.execute("CREATE TABLE IF NOT EXISTS totals (name TEXT NOT NULL, label TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (name, label))")
+
+        self.schedule_flush()
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        # a connection per use, committed at the end
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10.0)
+        # with the WAL journal, a commit is only synced at the checkpoints
+        connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def running_condition(self) -> Tuple[str, tuple]:
+        # the sql condition of a running task (0 for a task that never ran, not NULL), with its parameters
+        return f"COALESCE(status IN ({', '.join('?' * len(RUNNING_STATUSES))}) AND status_time >= ?, 0)", RUNNING_STATUSES + (time() - self.lifespan,)
+
+    def __len__(self) -> int:
+        with self.connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    @property
+    def num_bytes(self) -> int:
+        return self.local.num_bytes
+
+    @property
+    def evictions(self) -> int:
+        return self.num_evicted + self.local.evictions
+
+    @property
+    def expirations(self) -> int:
+        return self.num_expired
+
+    def create(self, task_id: str) -> None:
+        with self.connect() as connection:
+            connection.execute("INSERT OR IGNORE INTO tasks (task_id, last_used) VALUES (?, ?)", (task_id, time()))
+            removed = self.evict(connection)
+        self.discard_all(removed)
+
+    def get(self, task_id: str) -> Optional[AstroidSolver]:
+        now = time()
+        running, parameters = self.running_condition()
+        with self.connect() as connection:
+            row = connection.execute(f"SELECT last_used, status, version, {running} FROM tasks WHERE task_id = ?", parameters + (task_id,)).fetchone()
+            expired = row is not None and not row[3] and now - row[0] > self.lifespan
+            if expired:
+                self.delete(connection, [task_id])
+                self.num_expired += 1
+            elif row is not None and now - row[0] > 1.0:
+                connection.execute("UPDATE tasks SET last_used = ? WHERE task_id = ?", (now, task_id))
+        if row is None or expired:
+            self.local.discard(task_id)
+            return None
+        if row[1] is None and row[2] == 0:
+            # never ran
+            return None
+        return self.load(task_id, row[2])
+
+    def load(self, task_id: str, version: int) -> AstroidSolver:
+        # the solver of this worker, loaded again if another worker saved a newer solution
+        solver = self.local.get(task_id)
+        if solver is not None and (self.versions.get(task_id) == version or task_id in self.local.running):
+            return solver
+        with self.connect() as connection:
+            version, solution = connection.execute("SELECT version, solution FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        loaded = AstroidSolver()
+        if solver is not None:
+            # the results cached for the old solver are not served for the new one
+            loaded.solution_version = solver.solution_version
+        if solution is not None:
+            data = json.loads(zlib.decompress(solution))
+            loaded.set_layout(np.array(data["nodes"], dtype=np.int64).reshape(-1, 2), data["layout"])
+            loaded.solved_with_elevator = data["with_elevator"]
+        self.local.put(task_id, loaded)
+        self.versions[task_id] = version
+        return loaded
+
+    def start(self, task_id: str) -> Optional[AstroidSolver]:
+        now = time()
+        running, parameters = self.running_condition()
+        with self.connect() as connection:
+            connection.execute("INSERT OR IGNORE INTO tasks (task_id, last_used) VALUES (?, ?)", (task_id, now))
+            cursor = connection.execute(f"UPDATE tasks SET status = 'queued', status_time = ?, cancel = 0, last_used = ? WHERE task_id = ? AND NOT {running}", (now, now, task_id) + parameters)
+            if cursor.rowcount == 0:
+                return None
+            connection.execute("DELETE FROM events WHERE task_id = ?", (task_id,))
+            version = connection.execute("SELECT version FROM tasks WHERE task_id = ?", (task_id,)).fetchone()[0]
+        with self.pending_lock:
+            self.event_ids[task_id] = 0
+        self.load(task_id, version)
+        return self.local.start(task_id)
+
+    def set_status(self, task_id: str, status: str) -> None:
+        with self.connect() as connection:
+            connection.execute("UPDATE tasks SET status = ?, status_time = ? WHERE task_id = ?", (status, time(), task_id))
+
+    def save(self, connection: sqlite3.Connection, task_id: str) -> None:
+        # the solution of the solver of this worker, as compressed json
+        solver = self.local.solvers.get(task_id)
+        if solver is None or not solver.has_solution:
+            return
+        data = {"nodes": [list(node) for node in solver.nodes_to_extract], "layout": solver.get_layout(), "with_elevator": solver.solved_with_elevator}
+        solution = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 1)
+        connection.execute("UPDATE tasks SET solution = ?, version = version + 1, last_used = ? WHERE task_id = ?", (solution, time(), task_id))
+        row = connection.execute("SELECT version FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        if row is not None:
+            self.versions[task_id] = row[0]
+
+    def update(self, task_id: str) -> None:
+        with self.connect() as connection:
+            self.save(connection, task_id)
+        self.local.update(task_id)
+
+    def finish(self, task_id: str, status: str = "done") -> None:
+        # the last messages are written before the task is not running anymore, so the followers get all of them
+        self.flush()
+        with self.pending_lock:
+            self.event_ids.pop(task_id, None)
+        with self.connect() as connection:
+            self.save(connection, task_id)
+            connection.execute("UPDATE tasks SET status = ?, status_time = ?, cancel = 0, last_used = ? WHERE task_id = ?", (status, time(), time(), task_id))
+            connection.execute("DELETE FROM events WHERE task_id = ? AND id <= (SELECT MAX(id) FROM events WHERE task_id = ?) - ?", (task_id, task_id, FINISHED_EVENTS_KEPT))
+        self.local.finish(task_id, status)
+
+    def request_cancel(self, task_id: str) -> bool:
+        running, parameters = self.running_condition()
+        with self.connect() as connection:
+            return connection.execute(f"UPDATE tasks SET cancel = 1 WHERE task_id = ? AND {running}", (task_id,) + parameters).rowcount > 0
+
+    def is_cancel_requested(self, task_id: str) -> bool:
+        with self.connect() as connection:
+            row = connection.execute("SELECT cancel FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return row is not None and bool(row[0])
+
+    def publish(self, task_id: str, message: str) -> None:
+        # written by the next flush
+        with self.pending_lock:
+            if task_id not in self.event_ids:
+                return
+            self.event_ids[task_id] += 1
+            self.pending_events.setdefault(task_id, []).append((self.event_ids[task_id], message))
+
+    def set_metrics(self, task_id: str, metrics: dict) -> None:
+        # the metrics of the last run of the task (SolverTelemetry), the latest ones are written by the next flush
+        with self.pending_lock:
+            self.pending_metrics[task_id] = metrics
+
+    def get_metrics(self, task_id: str) -> Optional[dict]:
+        with self.connect() as connection:
+            row = connection.execute("SELECT metrics FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row is not None and row[0] is not None else None
+
+    def add_totals(self, increments: Dict[Tuple[str, str], float]) -> None:
+        # the increments of the telemetry totals, (name, label) -> value, added by the next flush
+        with self.pending_lock:
+            for key, value in increments.items():
+                self.pending_totals[key] = self.pending_totals.get(key, 0) + value
+
+    def get_totals(self) -> Dict[Tuple[str, str], float]:
+        # the telemetry totals of all workers, with the increments of this worker not written yet
+        with self.connect() as connection:
+            totals = {(name, label): value for name, label, value in connection.execute("SELECT name, label, value FROM totals").fetchall()}
+        with self.pending_lock:
+            for key, value in self.pending_totals.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def flush(self) -> None:
+        # writes the pending messages, metrics and totals in one transaction, and counts the running tasks of all workers
+        with self.flush_lock:
+            with self.pending_lock:
+                events, self.pending_events = self.pending_events, {}
+                metrics, self.pending_metrics = self.pending_metrics, {}
+                totals, self.pending_totals = self.pending_totals, {}
+            running, parameters = self.running_condition()
+            try:
+                with self.connect() as connection:
+                    connection.executemany("INSERT OR REPLACE INTO events (task_id, id, message) VALUES (?, ?, ?)", [(task_id, event_id, message) for task_id, task_events in events.items() for event_id, message in task_events])
+                    connection.executemany("DELETE FROM events WHERE task_id = ? AND id <= ?", [(task_id, task_events[-1][0] - RUNNING_EVENTS_KEPT) for task_id, task_events in events.items()])
+                    connection.executemany("UPDATE tasks SET metrics = ? WHERE task_id = ?", [(json.dumps(task_metrics), task_id) for task_id, task_metrics in metrics.items()])
+                    connection.executemany(
+                        "INSERT INTO totals (name, label, value) VALUES (?, ?, ?) ON CONFLICT (name, label) DO UPDATE SET value = value + excluded.value",
+                        [(name, label, value) for (name, label), value in totals.items()])
+                    counts = dict(connection.execute(f"SELECT status, COUNT(*) FROM tasks WHERE {running} GROUP BY status", parameters).fetchall())
+                self.statuses_count = {status: counts.get(status, 0) for status in RUNNING_STATUSES}
+            except sqlite3.Error as e:
+                # keep them for the next flush
+                logger.warning(f"[Tasks] Failed to write {self.path}: {e}")
+                with self.pending_lock:
+                    for task_id, task_events in events.items():
+                        self.pending_events[task_id] = task_events + self.pending_events.get(task_id, [])
+                    for task_id, task_metrics in metrics.items():
+                        self.pending_metrics.setdefault(task_id, task_metrics)
+                    for key, value in totals.items():
+                        self.pending_totals[key] = self.pending_totals.get(key, 0) + value
+
+    def schedule_flush(self) -> None:
+        def flush_and_reschedule():
+            self.flush()
+            self.schedule_flush()
+        timer = threading.Timer(self.flush_interval, flush_and_reschedule)
+        timer.daemon = True
+        timer.start()
+
+    def read_events(self, task_id: str, after: int = 0) -> Tuple[List[Tuple[int, str]], bool]:
+        running, parameters = self.running_condition()
+        with self.connect() as connection:
+            events = connection.execute("SELECT id, message FROM events WHERE task_id = ? AND id > ? ORDER BY id", (task_id, after)).fetchall()
+            row = connection.execute(f"SELECT {running} FROM tasks WHERE task_id = ?", parameters + (task_id,)).fetchone()
+        return events, row is not None and bool(row[0])
+
+    def count_statuses(self) -> Dict[str, int]:
+        # as of the last flush
+        return dict(self.statuses_count)
+
+    def expire(self) -> None:
+        running, parameters = self.running_condition()
+        with self.connect() as connection:
+            removed = [row[0] for row in connection.execute(f"SELECT task_id FROM tasks WHERE last_used < ? AND NOT {running}", (time() - self.lifespan,) + parameters).fetchall()]
+            self.delete(connection, removed)
+        self.num_expired += len(removed)
+        for task_id in removed:
+            logger.info(f"[Removing task] - {task_id}")
+        self.discard_all(removed)
+        self.local.expire()
+
+    def evict(self, connection: sqlite3.Connection) -> List[str]:
+        # removes the least recently used tasks that are not running above max_tasks
+        over = connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] - self.max_tasks
+        if over <= 0:
+            return []
+        running, parameters = self.running_condition()
+        removed = [row[0] for row in connection.execute(f"SELECT task_id FROM tasks WHERE NOT {running} ORDER BY last_used LIMIT ?", parameters + (over,)).fetchall()]
+        self.delete(connection, removed)
+        self.num_evicted += len(removed)
+        if removed:
+            logger.info(f"[Evicting tasks] - {len(removed)} tasks")
+        return removed
+
+    def delete(self, connection: sqlite3.Connection, task_ids: List[str]) -> None:
+        connection.executemany("DELETE FROM tasks WHERE task_id = ?", [(task_id,) for task_id in task_ids])
+        connection.executemany("DELETE FROM events WHERE task_id = ?", [(task_id,) for task_id in task_ids])
+
+    def discard_all(self, task_ids: List[str]) -> None:
+        # the removed tasks are also removed from this worker
+        for task_id in task_ids:
+            self.local.discard(task_id)
+
+    def removed_locally(self, task_id: str) -> None:
+        self.versions.pop(task_id, None)
+        if self.on_remove is not None:
+            self.on_remove(task_id)
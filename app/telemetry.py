@@ -0,0 +1,155 @@
+# system
+from typing import Callable, Dict, List, Optional, Tuple
+from time import time
+import copy
+import threading
+
+# summaries over all finished solves, name -> help text
+SUMMARIES = {
+    "queue_wait_seconds": "Seconds from the request until its solver process started.",
+    "model_build_seconds": "Seconds spent building the CP-SAT model in the solver process.",
+    "presolve_seconds": "Seconds spent in the CP-SAT presolve, over all searches of a solve.",
+    "solve_seconds": "Seconds from the start of the solver to its final solution.",
+    "gap": "Relative gap between the objective and the bound of the last search of a solve.",
+}
+
+class SolverTelemetry:
+    """
+    Structured metrics of the solves, per task and aggregated over all tasks.
+
+    The metrics of the last run of a task are a dict with the request (tiles, with_elevator, time limits),
+    its state ("queued", "running", "done", "cached" or "failed"), whether it was stopped, the queue wait and the AstroidSolver.metrics
+    of the solver process (model size and build time, the searches with their status, presolve time,
+    objective, bound and gap, and the incumbent objectives over time). The totals are exported in the
+    Prometheus text format.
+
+    With several web workers the metrics are shared through the task backend: on_change is called with the task id
+    and a copy of its metrics after every change, and on_totals with the increments of the totals of every finished
+    run ((name, label) -> value, see get_totals), both outside of the lock.
+    """
+    def __init__(self, on_change: Optional[Callable[[str, dict], None]] = None, on_totals: Optional[Callable[[Dict[Tuple[str, str], float]], None]] = None):
+        self.lock = threading.Lock()
+        self.on_change = on_change
+        self.on_totals = on_totals
+        self.tasks : Dict[str, dict] = {}
+        self.solves_total : Dict[str, int] = {}
+        self.summaries : Dict[str, List[float]] = {name: [0.0, 0] for name in SUMMARIES}
+
+    def start_task(self, task_id: str, **fields) -> None:
+        # a new run of the task replaces the metrics of the previous one
+        with self.lock:
+            self.tasks[task_id] = {"task_id": task_id, "state": "queued", "submitted_at": time(), "queue_time": None, "stopped": False, "incumbents": [], **fields}
+        self.changed(task_id)
+
+    def update(self, task_id: str, **fields) -> None:
+        with self.lock:
+            if task_id in self.tasks:
+                self.tasks[task_id].update(fields)
+        self.changed(task_id)
+
+    def set_running(self, task_id: str, num_search_workers: int) -> None:
+        with self.lock:
+            metrics = self.tasks.get(task_id)
+            if metrics is not None:
+                metrics["state"] = "running"
+                metrics["queue_time"] = time() - metrics["submitted_at"]
+                metrics["num_search_workers"] = num_search_workers
+        self.changed(task_id)
+
+    def add_incumbent(self, task_id: str, event: dict) -> None:
+        # the incumbents while the solver runs, replaced by the full list of the solver process when it finishes
+        with self.lock:
+            metrics = self.tasks.get(task_id)
+            if metrics is not None:
+                metrics["incumbents"].append([event["time"], event["phase"], event["objective"], None])
+        self.changed(task_id)
+
+    def finish(self, task_id: str, state: str, solver_metrics: Optional[dict] = None) -> None:
+        """
+        Ends the run of a task and adds it to the totals, solver_metrics is the AstroidSolver.metrics of the solve.
+        """
+        with self.lock:
+            metrics = self.tasks.get(task_id)
+            if metrics is None:
+                return
+            if solver_metrics:
+                metrics.update(solver_metrics)
+            metrics["state"] = state
+
+            # totals, by the final status of the solver
+            if state == "cached":
+                status = "CACHED"
+            elif state == "failed":
+                status = "CANCELLED" if metrics["stopped"] else "FAILED"
+            else:
+                status = metrics.get("status") or "UNKNOWN"
+            self.solves_total[status] = self.solves_total.get(status, 0) + 1
+
+            searches = metrics.get("searches", [])
+            presolve_times = [search["presolve_time"] for search in searches if search["presolve_time"] is not None]
+            gaps = [search["gap"] for search in searches if search["gap"] is not None]
+            observed = {
+                "queue_wait_seconds": metrics["queue_time"],
+                "model_build_seconds": metrics.get("model_build_time"),
+                "presolve_seconds": sum(presolve_times) if presolve_times else None,
+                "solve_seconds": metrics.get("solve_time"),
+                "gap": gaps[-1] if gaps else None,
+            }
+            increments = {("solves_total", status): 1}
+            for name, value in observed.items():
+                if value is not None:
+                    self.summaries[name][0] += value
+                    self.summaries[name][1] += 1
+                    increments[(name, "sum")] = value
+                    increments[(name, "count")] = 1
+        self.changed(task_id)
+        if self.on_totals is not None:
+            self.on_totals(increments)
+
+    def get(self, task_id: str) -> Optional[dict]:
+        # a copy, so it can be serialized while the pool threads update the task
+        with self.lock:
+            metrics = self.tasks.get(task_id)
+            return copy.deepcopy(metrics) if metrics is not None else None
+
+    def remove(self, task_id: str) -> None:
+        with self.lock:
+            self.tasks.pop(task_id, None)
+
+    def changed(self, task_id: str) -> None:
+        if self.on_change is not None:
+            metrics = self.get(task_id)
+            if metrics is not None:
+                self.on_change(task_id, metrics)
+
+    def get_totals(self) -> Dict[Tuple[str, str], float]:
+        # the totals of this process, ("solves_total", status) -> count and (summary name, "sum" or "count") -> value
+        with self.lock:
+            totals = {("solves_total", status): count for status, count in self.solves_total.items()}
+            for name, (total, count) in self.summaries.items():
+                totals[(name, "sum")] = total
+                totals[(name, "count")] = count
+        return totals
+
+    def to_prometheus(self, gauges: Dict[str, float], totals: Optional[Dict[Tuple[str, str], float]] = None) -> str:
+        """
+        The totals (those of get_totals, or the given ones of all web workers) and the given gauges (name -> value)
+        in the Prometheus text exposition format.
+        """
+        if totals is None:
+            totals = self.get_totals()
+        lines = []
+        for name, value in gauges.items():
+            lines += [f"# TYPE astroid_{name} gauge", f"astroid_{name} {value}"]
+
+        lines += ["# HELP astroid_solves_total Finished solves by the final status of the solver.", "# TYPE astroid_solves_total counter"]
+        for status, count in sorted((label, value) for (name, label), value in totals.items() if name == "solves_total"):
+            lines.append(f'astroid_solves_total{{status="{status}"}} {int(count)}')
+        for name, help_text in SUMMARIES.items():
+            lines += [
+                f"# HELP astroid_{name} {help_text}",
+                f"# TYPE astroid_{name} summary",
+                f"astroid_{name}_sum {totals.get((name, 'sum'), 0.0)}",
+                f"astroid_{name}_count {int(totals.get((name, 'count'), 0))}",
+            ]
+        return "\n".join(lines) + "\n"
@@ -1,21 +1,23 @@
 # system
-from datetime import datetime, timedelta
 from pathlib import Path
 from uuid import uuid4
 from io import BytesIO
 from zipfile import ZipFile
 import base64
-from contextlib import redirect_stdout
-import io
+import hashlib
+import json
 import asyncio
 import threading
-from time import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+import os
 import logging
 logger = logging.getLogger(__name__)
 
 # third party
 from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, Request
-from fastapi.responses import PlainTextResponse, HTMLResponse, JSONResponse, FileResponse, StreamingResponse
+from fastapi.responses import PlainTextResponse, HTMLResponse, JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import numpy as np
@@ -24,7 +26,13 @@ import qrcode
 # project
 from app.astroid_parser import parse_using_blueprint_and_return_image, parse_using_blueprint
 from app.astroid_solver import AstroidSolver
-from app.blueprint_composer import convert_miner_to_fluid
+from app.solution_cache import SolutionCache
+from app.result_cache import ResultCache
+from app.task_store import TaskStore, SQLiteTaskStore
+from app.solver_pool import SolverPool, SolverPoolFullError
+from app.telemetry import SolverTelemetry
+from app.stats_store import StatsStore
+from app.stats_broadcaster import StatsBroadcaster
 from app.qr_encoder import content_to_segno_image, content_to_segno_matrix, matrix_to_platform_blueprint, matrix_to_building_blueprint
 
 # ------------------------------------------
@@ -37,7 +45,8 @@ app = FastAPI()
 # static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-# path for counter
+# path for counter, the text files are the counters of older versions, imported once
+stats_path = str(Path.home() / "fastapi_stats.sqlite3")
 total_counter_path = str(Path.home() / "fastapi_total_counter.txt")
 today_counter_path = str(Path.home() / "fastapi_today_counter.txt")
 total_qr_counter_path = str(Path.home() / "fastapi_total_qr_counter.txt")
@@ -46,126 +55,156 @@ today_qr_counter_path = str(Path.home() / "fastapi_today_qr_counter.txt")
 # templates
 templates = Jinja2Templates(directory="app/templates")
 
-# list of tasks
-tasks_solvers : dict[str, AstroidSolver] = {}
-tasks_timestamps : dict[str, float] = {}
-tasks_suffix : dict[str, str] = {}  # to store task type if needed
-
-current_running_tasks_num : int = 0
-
 cleanup_interval = 60  # 1 minute
 miners_timelimit_max = 300
 saturation_timelimit_max = 300
 tasks_lifespan = 900  # 15 minutes
+tasks_max = 500  # tasks kept, the least recently used ones are evicted above it
+tasks_max_bytes = 256 * 1024 * 1024  # estimated size of the kept solutions, the least recently used tasks are evicted above it
+task_backend = os.environ.get("TASK_BACKEND", "memory")  # memory: the tasks are kept in this process, sqlite: in task_backend_path, shared by the web workers
+task_backend_path = os.environ.get("TASK_BACKEND_PATH", str(Path.home() / "fastapi_tasks.sqlite3"))
+task_cancel_check_interval = 1  # seconds between two checks for a /cancel_task/ received by another web worker
+task_stream_poll_interval = 0.5  # seconds between two reads of the messages of a solve followed on /task_stream
+task_store_executor_workers = 8  # threads for the calls to the sqlite task backend, which read and write its file
+web_workers = max(1, int(os.environ.get("WEB_WORKERS", "1")))  # uvicorn --workers of the deployment, they share the cores
+solver_cores = max(1, (os.cpu_count() or 1) // web_workers)  # cores shared by all running solvers of this web worker
+tiled_mode_min_tiles = 1500  # fields with more tiles are solved window by window
+tiled_mode_window_size = 10
+solution_cache_path = str(Path.home() / "fastapi_solution_cache")
+solution_cache_max_entries = 256  # entries kept in memory, all of them are kept on disk
+result_cache_max_bytes = 64 * 1024 * 1024  # rendered images, drawings and blueprints of the tasks, kept until a new solution
+blueprint_gzip_level = 6  # 9 makes generated blueprints about 10% smaller but takes about 4 times longer
+cpu_executor_workers = max(1, solver_cores // 2)  # threads for parsing, model building, rendering and blueprint composition
+cpu_jobs_max = 64  # jobs queued or running in the executors, requests above it get a 503
+solver_max_running = max(1, int(os.environ.get("SOLVER_MAX_RUNNING", min(solver_cores, max(2, solver_cores // 4)))))  # solver processes running at the same time, each with solver_cores // solver_max_running cores
+solver_max_queued = 32  # solves waiting for a free solver process, requests above it get a 503
+stats_flush_interval = 10  # seconds between two writes of the counters
+stats_broadcast_interval = 1  # seconds between two checks for changed stats, sent to the pages on /stats_stream
+stats_keepalive_interval = 15  # seconds without changes before a keepalive is sent on /stats_stream
 logger.info(f"[Parameters] Cleanup interval: {cleanup_interval} seconds")
 logger.info(f"[Parameters] Tasks lifespan: {tasks_lifespan} seconds")
+logger.info(f"[Parameters] Tasks: at most {tasks_max} tasks, {tasks_max_bytes // (1024 * 1024)} MB")
+logger.info(f"[Parameters] Task backend: {task_backend}" + (f", {task_backend_path}" if task_backend == "sqlite" else ""))
+logger.info(f"[Parameters] Web workers: {web_workers}")
 logger.info(f"[Parameters] Timelimit: {miners_timelimit_max} seconds")
 logger.info(f"[Parameters] Saturation timelimit: {saturation_timelimit_max} seconds")
+logger.info(f"[Parameters] Solver cores: {solver_cores}")
+logger.info(f"[Parameters] Tiled mode: above {tiled_mode_min_tiles} tiles, window size {tiled_mode_window_size}")
+logger.info(f"[Parameters] Solution cache: {solution_cache_path}, {solution_cache_max_entries} entries in memory")
+logger.info(f"[Parameters] Result cache: {result_cache_max_bytes // (1024 * 1024)} MB")
+logger.info(f"[Parameters] Blueprint gzip level: {blueprint_gzip_level}")
+logger.info(f"[Parameters] CPU executor: {cpu_executor_workers} workers, at most {cpu_jobs_max} jobs")
+logger.info(f"[Parameters] Solver processes: {solver_max_running} running, {solver_max_queued} queued")
+logger.info(f"[Parameters] Stats: {stats_path}, written every {stats_flush_interval} seconds, broadcast every {stats_broadcast_interval} seconds")
+
+# task and qr code counters
+stats_store = StatsStore(stats_path, flush_interval=stats_flush_interval, legacy_files={
+    "tasks": (total_counter_path, today_counter_path),
+    "qr_codes": (total_qr_counter_path, today_qr_counter_path),
+})
+
+# solutions of previously solved asteroid shapes
+solution_cache = SolutionCache(solution_cache_path, max_entries=solution_cache_max_entries)
+
+# images, drawings and blueprints of the current solution of every task
+result_cache = ResultCache(max_bytes=result_cache_max_bytes)
+
+# solves run in worker processes, each with an even share of the cores
+solver_pool = SolverPool(max_running=solver_max_running, max_queued=solver_max_queued, solver_cores=solver_cores)
+
+# metrics of the solves, per task in /task_metrics/{task_id} and in total in /metrics
+telemetry = SolverTelemetry()
+
+def remove_task(task_id: str) -> None:
+    # drops what is kept for an expired or evicted task
+    telemetry.remove(task_id)
+    result_cache.invalidate(task_id)
+
+# the tasks of the visitors, each with the solution of its last solve
+if task_backend == "memory":
+    task_store = TaskStore(max_tasks=tasks_max, max_bytes=tasks_max_bytes, lifespan=tasks_lifespan, on_remove=remove_task)
+elif task_backend == "sqlite":
+    task_store = SQLiteTaskStore(task_backend_path, max_tasks=tasks_max, max_bytes=tasks_max_bytes, lifespan=tasks_lifespan, on_remove=remove_task)
+    
+    # the metrics of the tasks and their totals are shared by the web workers
+    telemetry.on_change = task_store.set_metrics
+    telemetry.on_totals = task_store.add_totals
+else:
+    raise ValueError(f"Unknown task backend {task_backend}, use memory or sqlite")
+
+# the calls to the sqlite backend read and write its file, they run in task_store_executor
+# (not counted in cpu_jobs_max, they are short and a stream must not end with a 503 halfway)
+task_store_executor = ThreadPoolExecutor(max_workers=task_store_executor_workers, thread_name_prefix="tasks")
+
+async def run_task_store(func, *args):
+    # the in-process backend only takes a lock, it is called directly
+    if task_backend == "memory":
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(task_store_executor, partial(func, *args))
 
-def cleanup_tasks():    
-    now = time()
-    for task_id, timestamp in list(tasks_timestamps.items()):
-        duration = now - timestamp
-        if duration > tasks_lifespan:
-            logger.info(f"[Removing task] - {task_id}")
-            
-            if task_id in tasks_solvers:
-                del tasks_solvers[task_id]
-            if task_id in tasks_timestamps:
-                del tasks_timestamps[task_id]
-            if task_id in tasks_suffix:
-                del tasks_suffix[task_id]
-            
-    # Schedule the next cleanup
-    threading.Timer(cleanup_interval, cleanup_tasks).start()  # Run every 60 seconds
-
-cleanup_tasks()  # Start the cleanup process
-
-# === Generic total counter functions ===
-
-counter_lock = threading.Lock()
-
-def increase_counter(path):
-    with counter_lock:
-        try:
-            with open(path, "r") as f:
-                counter = int(f.read())
-        except (FileNotFoundError, ValueError):
-            counter = 0
-        with open(path, "w") as f:
-            f.write(f"{counter + 1}")
-
-def get_counter(path):
-    with counter_lock:
-        try:
-            with open(path, "r") as f:
-                return int(f.read())
-        except (FileNotFoundError, ValueError):
-            return 0
+# ------------------------------------------
+# CPU bound work, off the event loop
+# ------------------------------------------
 
-# === Daily counter functions ===
+# parsing, model building, rendering and blueprint composition run in cpu_executor
+# (the images are rendered with a figure per image, see app.plotting, so they can be rendered in parallel)
+cpu_executor = ThreadPoolExecutor(max_workers=cpu_executor_workers, thread_name_prefix="cpu")
+cpu_jobs_num : int = 0  # only changed from the event loop
 
-def increase_daily_counter(path):
-    with counter_lock:
-        today = datetime.now().strftime("%Y-%m-%d")
-        try:
-            with open(path, "r") as f:
-                lines = f.readlines()
-        except FileNotFoundError:
-            lines = []
-
-        found = False
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line or ':' not in line:
-                continue
-            parts = line.split(":")
-            if len(parts) != 2:
-                continue
-            date, counter = parts
-            if date == today:
-                try:
-                    counter = int(counter) + 1
-                except ValueError:
-                    counter = 1  # fallback to 1 if corrupted
-                lines[i] = f"{date}:{counter}\n"
-                found = True
-                break
+class ServerBusyError(Exception):
+    pass
 
-        if not found:
-            lines.append(f"{today}:1\n")
+async def run_cpu_bound(func, *args, executor: ThreadPoolExecutor = cpu_executor, **kwargs):
+    # run func in the executor, or raise ServerBusyError if too many jobs are already waiting
+    global cpu_jobs_num
+    if cpu_jobs_num >= cpu_jobs_max:
+        raise ServerBusyError()
+    cpu_jobs_num += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+    finally:
+        cpu_jobs_num -= 1
+
+async def stream_cpu_bound(func, *args, **kwargs):
+    # the pieces of the iterator returned by func, each computed in cpu_executor
+    # the first one is computed before returning, so a busy server still gets a 503 rather than a broken response
+    iterator = await run_cpu_bound(func, *args, **kwargs)
+    first = await run_cpu_bound(next, iterator, None)
+    async def pieces():
+        piece = first
+        while piece is not None:
+            yield piece
+            piece = await asyncio.get_running_loop().run_in_executor(cpu_executor, next, iterator, None)
+    return pieces()
+
+async def get_cached_result(task_id: str, astroid_solver: AstroidSolver, options: tuple, compute) -> Optional[str]:
+    # the result of compute (a coroutine function returning a string) for the current solution of the task and these options
+    key = (task_id, astroid_solver.solution_version) + options
+    result = result_cache.get(key)
+    if result is None:
+        result = await compute()
+        if result is not None:
+            result_cache.put(key, result)
+    return result
 
-        with open(path, "w") as f:
-            f.writelines(lines)
+def cleanup_tasks():    
+    task_store.expire()
+            
+    # Schedule the next cleanup (a daemon, so it does not keep the process alive on shutdown)
+    timer = threading.Timer(cleanup_interval, cleanup_tasks)  # Run every 60 seconds
+    timer.daemon = True
+    timer.start()
 
-def get_daily_counter(path):
-    with counter_lock:
-        today = datetime.now().strftime("%Y-%m-%d")
-        try:
-            with open(path, "r") as f:
-                lines = f.readlines()
-        except FileNotFoundError:
-            return 0
-
-        for line in lines:
-            line = line.strip()
-            if not line or ':' not in line:
-                continue
-            parts = line.split(":")
-            if len(parts) != 2:
-                continue
-            date, counter = parts
-            if date == today:
-                try:
-                    return int(counter)
-                except ValueError:
-                    return 0
-        return 0
+cleanup_tasks()  # Start the cleanup process
 
 # ------------------------------------------
 # Web API
 # ------------------------------------------
 
+@app.exception_handler(ServerBusyError)
+async def server_busy_handler(request: Request, exc: ServerBusyError):
+    return JSONResponse(status_code=503, content={"error": "The server is busy, please try again later"})
+
 # home page
 @app.get("/", response_class=HTMLResponse)
 async def get_index(request: Request):
@@ -176,13 +215,52 @@ async def get_index(request: Request):
 async def get_qr_encoder(request: Request):
     return templates.TemplateResponse("qr_encoder.html", {"request": request})
 
+def get_running_tasks_stats() -> dict:
+    # the running and queued solves of every web worker
+    counts = task_store.count_statuses()  # in memory for both backends
+    return {"current_running_tasks_num": counts["running"], "queued_tasks_num": counts["queued"]}
+
+def get_stats_snapshot() -> dict:
+    # the stats of both pages, the counters are in memory and the running tasks in the task backend
+    return {
+        "tasks_ran_in_total": stats_store.get_total("tasks"),
+        "tasks_ran_today": stats_store.get_today("tasks"),
+        **get_running_tasks_stats(),
+        "qr_codes_ran_in_total": stats_store.get_total("qr_codes"),
+        "qr_codes_ran_today": stats_store.get_today("qr_codes"),
+    }
+
+# sends the changed stats to every open page
+stats_broadcaster = StatsBroadcaster(get_stats_snapshot, interval=stats_broadcast_interval)
+
+# stream of the stats, a new snapshot is sent when they change
+@app.get("/stats_stream")
+async def stats_stream(request: Request):
+    queue = stats_broadcaster.subscribe()
+    
+    async def stream():
+        try:
+            while True:
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=stats_keepalive_interval)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(snapshot)}\n\n"
+        finally:
+            stats_broadcaster.unsubscribe(queue)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
 @app.get("/get_stats/")
 async def get_stats():
-    return JSONResponse(status_code=200, content={"tasks_ran_in_total": get_counter(total_counter_path), "tasks_ran_today": get_daily_counter(today_counter_path), "current_running_tasks_num": current_running_tasks_num})
+    return JSONResponse(status_code=200, content={"tasks_ran_in_total": stats_store.get_total("tasks"), "tasks_ran_today": stats_store.get_today("tasks"), **get_running_tasks_stats()})
 
 @app.get("/get_qr_stats/")
 async def get_qr_stats():
-    return JSONResponse(status_code=200, content={"qr_codes_ran_in_total": get_counter(total_qr_counter_path), "qr_codes_ran_today": get_daily_counter(today_qr_counter_path)})
+    return JSONResponse(status_code=200, content={"qr_codes_ran_in_total": stats_store.get_total("qr_codes"), "qr_codes_ran_today": stats_store.get_today("qr_codes")})
 
 @app.post("/get_simple_coordinates_preview/")
 async def get_simple_coordinates_preview(input_blueprint: str = Form(...)):
@@ -192,7 +270,9 @@ async def get_simple_coordinates_preview(input_blueprint: str = Form(...)):
     
     # parse the blueprint
     try:
-        img = parse_using_blueprint_and_return_image(input_blueprint)
+        img = await run_cpu_bound(parse_using_blueprint_and_return_image, input_blueprint)
+    except ServerBusyError:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -213,7 +293,7 @@ async def get_simple_coordinates_preview(input_blueprint: str = Form(...)):
 async def get_task_id():
     # create task id
     task_id = uuid4().hex
-    tasks_timestamps[task_id] = time()
+    await run_task_store(task_store.create, task_id)
     
     # return the task_id as json response
     return JSONResponse(status_code=200, content={"task_id": task_id})
@@ -232,81 +312,127 @@ async def run_solver_and_stream(
     # ------------------------------
         
     # skip if no astroid locations
-    coords = parse_using_blueprint(input_miner_blueprint)
+    coords = await run_cpu_bound(parse_using_blueprint, input_miner_blueprint)
     if coords is None:
         async def err_location():
             yield "data: No astroid locations found\n\n"
         return StreamingResponse(err_location(), media_type="text/event-stream")
     
-    # create solver if one does not exist
-    if task_id not in tasks_solvers:
-        tasks_solvers[task_id] = AstroidSolver()
-    
-    # add locations to the solver
-    solver = tasks_solvers[task_id]
-    solver.add_astroid_locations(astroid_location=np.array(coords))
+    # a task is reused for every run of the same user, only one run at a time
+    # (its solver only keeps the solution, the model is built and solved in a worker process)
+    solver = await run_task_store(task_store.start, task_id)
+    if solver is None:
+        async def err_running():
+            yield "data: The solver is already running for this task\n\n"
+        return StreamingResponse(err_running(), media_type="text/event-stream")
     
     # cap timelimit
     miners_timelimit = max(0, min(miners_timelimit, miners_timelimit_max))
     saturation_timelimit = max(0, min(saturation_timelimit, saturation_timelimit_max))
+    
+    telemetry.start_task(task_id, tiles=len(coords), with_elevator=with_elevator_bool, miners_timelimit=miners_timelimit, saturation_timelimit=saturation_timelimit)
+    try:
+        # use the cached solution if the same shape was already solved with at least these time limits
+        cached_layout = await run_cpu_bound(solution_cache.get, np.array(coords), with_elevator_bool, miners_timelimit, saturation_timelimit)
+        if cached_layout is not None:
+            logger.info(f"[Solver] - cache hit for {task_id}")
+            await run_cpu_bound(solver.set_layout, np.array(coords), cached_layout)
+            solver.solved_with_elevator = with_elevator_bool
+            result_cache.invalidate(task_id)
+            num_miners = sum(1 for platform in cached_layout["platforms"] if platform[0] == "miner")
+            num_extenders = sum(1 for platform in cached_layout["platforms"] if platform[0] == "extender")
+            messages = ["data: Solution found in cache\n\n", f"data: {num_miners} miners, {num_extenders} extenders\n\n", "data: DONE\n\n"]
+            for message in messages:
+                task_store.publish(task_id, message)
+            await run_task_store(task_store.finish, task_id)
+            telemetry.finish(task_id, "cached")
+            stats_store.increment("tasks")
+            async def replay_cached():
+                for message in messages:
+                    yield message
+            return StreamingResponse(replay_cached(), media_type="text/event-stream")
+    except Exception:
+        # the task is not running if the solver could not be started
+        await run_task_store(task_store.finish, task_id, "failed")
+        telemetry.finish(task_id, "failed")
+        raise
 
     # -------------------------------
-    # separate thread
+    # solver process
     # -------------------------------
     
-    # get the queue and loop to handle multithreading
+    # the previous solution of the task, so the worker only re-optimizes around the edited tiles
+    previous = None
+    if solver.has_solution:
+        previous = {"layout": solver.get_layout(), "nodes": solver.nodes_to_extract, "with_elevator": solver.solved_with_elevator}
+    job = {
+        "astroid_location": coords,
+        "with_elevator": with_elevator_bool,
+        "miners_timelimit": miners_timelimit,
+        "saturation_timelimit": saturation_timelimit,
+        "window_size": tiled_mode_window_size,
+        "window_min_tiles": tiled_mode_min_tiles,
+        "previous": previous,
+    }
+    
+    # get the queue and loop to pass the log lines from the threads of the pool
     queue = asyncio.Queue()
     loop = asyncio.get_running_loop()
+    started = False
+    solver_metrics = {}
     
-    # run the solver in a separate thread to avoid blocking the event loop
-    def separate_thread_run_solver(astroid_solver: AstroidSolver, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop, with_elevator_bool: bool, miners_timelimit: float, saturation_timelimit: float):
-        global current_running_tasks_num
-        
-        # run solver and redirect output
-        
-        class StreamToQueue(io.StringIO):
-            def __init__(self, queue, loop):
-                super().__init__()
-                self.queue = queue
-                self.loop = loop
-                self._buffer = ""
-
-            def write(self, s):
-                self._buffer += s
-                while "\n" in self._buffer:
-                    line, self._buffer = self._buffer.split("\n", 1)
-                    self.loop.call_soon_threadsafe(self.queue.put_nowait, f"data: {line}\n\n")
-                return len(s)
-
-            def flush(self):
-                if self._buffer:
-                    self.loop.call_soon_threadsafe(self.queue.put_nowait, f"data: {self._buffer}\n\n")
-                    self._buffer = ""
-
-        logger.info(f"[Solver] - start for {task_id}")
-        current_running_tasks_num += 1
-        stream_writer = StreamToQueue(queue, loop)
+    def on_start():
+        nonlocal started
+        started = True
+        task_store.set_status(task_id, "running")
+        telemetry.set_running(task_id, job["num_search_workers"])
+        logger.info(f"[Solver] - start for {task_id} with {job['num_search_workers']} workers")
+    
+    def on_log(line: str):
+        loop.call_soon_threadsafe(queue.put_nowait, f"data: {line}\n\n")
+        if "Academic license" not in line:
+            task_store.publish(task_id, f"data: {line}\n\n")
+    
+    def on_incumbent(event: dict):
+        # show the improving solutions in /get_solver_results while the solver runs, and send them to the page
+        solver.set_layout(np.array(coords), event["layout"])
+        task_store.update(task_id)
+        telemetry.add_incumbent(task_id, event)
+        loop.call_soon_threadsafe(queue.put_nowait, f"event: incumbent\ndata: {json.dumps(event)}\n\n")
         
-        def solver_log_callback(msg: str):
-            stream_writer.write(msg + "\n")
-            
-        with redirect_stdout(stream_writer):
-            astroid_solver.run_solver(
-                miners_timelimit=miners_timelimit,
-                saturation_timelimit=saturation_timelimit,
-                with_elevator=with_elevator_bool,
-                log_callback=solver_log_callback
-            )
+        # the followers on /task_stream get the solution from /get_solver_results
+        task_store.publish(task_id, f"event: incumbent\ndata: {json.dumps({key: value for key, value in event.items() if key != 'layout'})}\n\n")
+    
+    def on_metrics(metrics: dict):
+        solver_metrics.update(metrics)
+    
+    def on_done(layout: Optional[dict]):
         logger.info(f"[Solver] - finish for {task_id}")
-        current_running_tasks_num -= 1
-        increase_counter(total_counter_path)
-        increase_daily_counter(today_counter_path)
+        telemetry.finish(task_id, "done" if layout is not None else "failed", solver_metrics)
+        
+        # keep the solution in the task, and for the next request with the same shape if it is as good as a solve
+        # with these time limits (a stopped or incremental solve, or the greedy layout, is not)
+        result_cache.invalidate(task_id)
+        if layout is not None:
+            solver.set_layout(np.array(coords), layout)
+            solver.solved_with_elevator = with_elevator_bool
+            if solver_metrics.get("complete"):
+                solution_cache.put(np.array(coords), with_elevator_bool, miners_timelimit, saturation_timelimit, layout)
+        task_store.publish(task_id, "data: DONE\n\n")
+        task_store.finish(task_id, "done" if layout is not None else "failed")
+        if started:
+            stats_store.increment("tasks")
 
         # push None so stream() can break the loop
         loop.call_soon_threadsafe(queue.put_nowait, "data: DONE\n\n")
         loop.call_soon_threadsafe(queue.put_nowait, None)
-        
-    threading.Thread(target=separate_thread_run_solver, args=(solver, queue, loop, with_elevator_bool, miners_timelimit, saturation_timelimit)).start()
+    
+    try:
+        solver_pool.submit(task_id, job, on_start, on_log, on_done, on_incumbent, on_metrics)
+    except SolverPoolFullError:
+        await run_task_store(task_store.finish, task_id, "failed")
+        telemetry.finish(task_id, "failed")
+        raise ServerBusyError()
 
     # -------------------------------
     # current thread
@@ -314,67 +440,175 @@ async def run_solver_and_stream(
     
     # collect from the queue and yield as a stream
     async def stream():
+        finished = False
+        cancel_checked = loop.time()
+        try:
+            while True:
+                # a /cancel_task/ for this task may have been received by another web worker
+                if loop.time() - cancel_checked >= task_cancel_check_interval:
+                    cancel_checked = loop.time()
+                    if await run_task_store(task_store.is_cancel_requested, task_id) and solver_pool.cancel(task_id):
+                        logger.info(f"[Solver] - cancelled {task_id}")
+                        telemetry.update(task_id, stopped=True)
+                
+                # get the next line from the queue, and check for a closed tab while the solver is quiet
+                try:
+                    line = await asyncio.wait_for(queue.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    continue
+                                        
+                # break if None is received
+                if line is None:
+                    finished = True
+                    break
+                
+                # skip the line that contains "Academic license"
+                if "Academic license" in line:
+                    continue
+                
+                # yield the line as a server-sent event
+                yield line
+        finally:
+            # nobody is waiting for the result anymore, stop the solver (its best solution is still kept)
+            if not finished:
+                logger.info(f"[Solver] - client disconnected from {task_id}, stopping the solver")
+                telemetry.update(task_id, stopped=True)
+                solver_pool.cancel(task_id)
+            
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+# stop a running solver, the best solution found so far is kept
+@app.post("/cancel_task/")
+async def cancel_task(task_id: str = Form(...)):
+    # the solver runs in this web worker, or the worker running it stops it on its next check
+    if solver_pool.cancel(task_id):
+        logger.info(f"[Solver] - cancelled {task_id}")
+        telemetry.update(task_id, stopped=True)
+    elif not await run_task_store(task_store.request_cancel, task_id):
+        return JSONResponse(status_code=404, content={"error": "No running solver for this task"})
+    return JSONResponse(status_code=200, content={"task_id": task_id, "cancelled": True})
+
+# follow the solve of a task from any web worker, the messages of run_solver_and_stream with their id
+# (the page may reconnect with after set to the last id it received)
+@app.get("/task_stream")
+async def task_stream(request: Request, task_id: str, after: int = 0):
+    async def stream():
+        last_id = after
         while True:
-            # get the next line from the queue
-            line = await queue.get()
-                                    
-            # break if None is received
-            if line is None:
+            events, running = await run_task_store(task_store.read_events, task_id, last_id)
+            for event_id, message in events:
+                last_id = event_id
+                yield f"id: {event_id}\n{message}"
+            if not running and not events:
                 break
-            
-            # skip the line that contains "Academic license"
-            if "Academic license" in line:
-                continue
-            
-            # yield the line as a server-sent event
-            yield line
-            
+            if await request.is_disconnected():
+                break
+            await asyncio.sleep(task_stream_poll_interval)
+    
     return StreamingResponse(stream(), media_type="text/event-stream")
 
+# structured metrics of the last solve of a task
+@app.get("/task_metrics/{task_id}")
+async def get_task_metrics(task_id: str):
+    # from the task backend if it shares them (the task may have run in another web worker)
+    metrics = await run_task_store(task_store.get_metrics, task_id)
+    if metrics is None:
+        metrics = telemetry.get(task_id)
+    if metrics is None:
+        return JSONResponse(status_code=404, content={"error": "Task not found"})
+    return JSONResponse(status_code=200, content=metrics)
+
+# metrics of all solves, in the Prometheus text format
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # the solves and tasks of all web workers, the sizes, caches and subscribers of the worker that answers
+    counts = task_store.count_statuses()
+    gauges = {
+        "solver_running": counts["running"],
+        "solver_queued": counts["queued"],
+        "tasks": await run_task_store(len, task_store),
+        "task_store_bytes": task_store.num_bytes,
+        "task_evictions": task_store.evictions,
+        "task_expirations": task_store.expirations,
+        "stats_subscribers": stats_broadcaster.num_subscribers,
+        "result_cache_bytes": result_cache.num_bytes,
+        "result_cache_hits": result_cache.hits,
+        "result_cache_misses": result_cache.misses,
+    }
+    totals = await run_task_store(task_store.get_totals)
+    return PlainTextResponse(telemetry.to_prometheus(gauges, totals), media_type="text/plain; version=0.0.4")
+
 # get solver image
 @app.post("/get_solver_results")
 async def get_solver_results(task_id: str = Form(...), remove_non_saturated_miners: bool = Form(...)):
-    # skip if task id not found
-    if task_id not in tasks_solvers:
+    # get the solver, skip if task id not found
+    astroid_solver = await run_task_store(task_store.get, task_id)
+    if astroid_solver is None:
         return JSONResponse(status_code=404, content={"error": "Task not found"})
+    if not astroid_solver.has_solution:
+        return JSONResponse(status_code=404, content={"error": "No solution for this task"})
     
-    # get the solver
-    astroid_solver = tasks_solvers[task_id]
-    
-    # get the solution image
-    solution_image = astroid_solver.get_solution_image(remove_non_saturated_miners=remove_non_saturated_miners)
+    # get the solution image, as base64
+    async def render():
+        solution_image = await run_cpu_bound(astroid_solver.get_solution_image, remove_non_saturated_miners=remove_non_saturated_miners)
+        if solution_image is None:
+            return None
+        return base64.b64encode(solution_image.getvalue()).decode()
+    solution_b64 = await get_cached_result(task_id, astroid_solver, ("image", remove_non_saturated_miners), render)
     
-    if solution_image is None:
+    if solution_b64 is None:
         return JSONResponse(status_code=500, content={"error": "Failed to generate solution image"})
     
-    # convert to base64
-    solution_b64 = base64.b64encode(solution_image.getvalue()).decode()
-    
     return {
         "task_id": task_id,
         "solution_image": solution_b64,
     }
     
+# get the solution as arrays, drawn by the page instead of get_solver_results
+@app.post("/get_solver_drawing")
+async def get_solver_drawing(task_id: str = Form(...), remove_non_saturated_miners: bool = Form(...)):
+    # get the solver, skip if task id not found
+    astroid_solver = await run_task_store(task_store.get, task_id)
+    if astroid_solver is None:
+        return JSONResponse(status_code=404, content={"error": "Task not found"})
+    if not astroid_solver.has_solution:
+        return JSONResponse(status_code=404, content={"error": "No solution for this task"})
+    
+    # the drawing is cached as json, it is large for big fields
+    async def draw():
+        drawing = await run_cpu_bound(astroid_solver.get_solution_drawing, remove_non_saturated_miners=remove_non_saturated_miners)
+        return json.dumps(drawing, separators=(",", ":"))
+    drawing_json = await get_cached_result(task_id, astroid_solver, ("drawing", remove_non_saturated_miners), draw)
+    return Response(content=f'{{"task_id":{json.dumps(task_id)},"drawing":{drawing_json}}}', media_type="application/json")
+
 # get solver blueprint
 @app.post("/generate_blueprint/")
-async def generate_blueprint(task_id: str = Form(...), miner_blueprint: str = Form(...), solve_for_fluid: bool = Form(...), remove_non_saturated_miners: bool = Form(...)):
-    # skip if task id not found
-    if task_id not in tasks_solvers:
-        return JSONResponse(status_code=404, content={"error": "Task not found"})
-        
-    # get the solver
-    astroid_solver = tasks_solvers[task_id]
+async def generate_blueprint(task_id: str = Form(...), miner_blueprint: str = Form(...), solve_for_fluid: bool = Form(...), remove_non_saturated_miners: bool = Form(...), stream: bool = Form(False)):
+    # get the solver, skip if task id not found
+    astroid_solver = await run_task_store(task_store.get, task_id)
     if astroid_solver is None:
-        return JSONResponse(status_code=404, content={"error": "Solver not found"})
+        return JSONResponse(status_code=404, content={"error": "Task not found"})
+    if not astroid_solver.has_solution:
+        return JSONResponse(status_code=404, content={"error": "No solution for this task"})
     
     # get the blueprint txt
     if miner_blueprint == "empty":
         miner_blueprint = ""
-    blueprint = astroid_solver.get_solution_blueprint(miner_blueprint=miner_blueprint, remove_non_saturated_miners=remove_non_saturated_miners)
-
-    if solve_for_fluid:
-        new_blueprint = convert_miner_to_fluid(blueprint, miner_blueprint)
-        blueprint = new_blueprint
+    miner_blueprint_hash = hashlib.sha1(miner_blueprint.encode()).hexdigest()
+    key = ("blueprint", remove_non_saturated_miners, solve_for_fluid, miner_blueprint_hash)
+    
+    # the blueprint as plain text, sent piece by piece as it is encoded unless it is cached
+    if stream:
+        blueprint = result_cache.get((task_id, astroid_solver.solution_version) + key)
+        if blueprint is not None:
+            return PlainTextResponse(blueprint)
+        return StreamingResponse(await stream_cpu_bound(astroid_solver.stream_solution_blueprint, miner_blueprint=miner_blueprint, remove_non_saturated_miners=remove_non_saturated_miners, compresslevel=blueprint_gzip_level, solve_for_fluid=solve_for_fluid), media_type="text/plain")
+    
+    async def compose():
+        return await run_cpu_bound(astroid_solver.get_solution_blueprint, miner_blueprint=miner_blueprint, remove_non_saturated_miners=remove_non_saturated_miners, compresslevel=blueprint_gzip_level, solve_for_fluid=solve_for_fluid)
+    blueprint = await get_cached_result(task_id, astroid_solver, key, compose)
 
     if blueprint is None:
         return JSONResponse(status_code=500, content={"error": "Failed to generate blueprint"})
@@ -389,7 +623,7 @@ async def generate_blueprint(task_id: str = Form(...), miner_blueprint: str = Fo
 @app.post("/generate_qr_code_image/")
 async def generate_qr_code_image(input_text: str = Form(...), version: str = Form(...), error_correction_level: str = Form(...), boost_error: bool = Form(...)):
     # generate QR code image
-    blob, version_used, error_level = content_to_segno_image(input_text, version, error_correction_level, boost_error)
+    blob, version_used, error_level = await run_cpu_bound(content_to_segno_image, input_text, version, error_correction_level, boost_error)
 
     if version_used == "M1":
         error_level = "L"
@@ -403,16 +637,15 @@ async def generate_qr_code_image(input_text: str = Form(...), version: str = For
 @app.post("/generate_qr_code_blueprint/")
 async def generate_qr_code_blueprint(input_text: str = Form(...), version: str = Form(...), error_correction_level: str = Form(...), boost_error: bool = Form(...), blueprint_type: str = Form(...)):
     # generate QR code matrix
-    matrix = content_to_segno_matrix(input_text, version, error_correction_level, boost_error)
+    matrix = await run_cpu_bound(content_to_segno_matrix, input_text, version, error_correction_level, boost_error)
     
     # convert to blueprint
     if blueprint_type == "platform":
-        blueprint = matrix_to_platform_blueprint(matrix)
+        blueprint = await run_cpu_bound(matrix_to_platform_blueprint, matrix)
     elif blueprint_type == "building":
-        blueprint = matrix_to_building_blueprint(matrix)
+        blueprint = await run_cpu_bound(matrix_to_building_blueprint, matrix)
     
     # increase qr counter
-    increase_counter(total_qr_counter_path)
-    increase_daily_counter(today_qr_counter_path)
+    stats_store.increment("qr_codes")
 
     return JSONResponse(status_code=200, content={"blueprint": blueprint})
\ No newline at end of file
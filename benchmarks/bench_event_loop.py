@@ -0,0 +1,86 @@
+# system
+from time import perf_counter, sleep
+from urllib.parse import urlencode
+from urllib.request import urlopen
+import subprocess
+import tempfile
+import threading
+import os
+import sys
+
+# third party
+import numpy as np
+
+# project
+from app.blueprint_composer import create_empty_blueprint_json, create_miner_json, json_to_blueprint
+from benchmarks.bench_model_build import random_field
+
+def field_blueprint(astroid_location: np.ndarray) -> str:
+    # a blueprint with one miner per asteroid tile, as pasted by the users
+    blueprint_json = create_empty_blueprint_json()
+    for x, y in astroid_location.tolist():
+        blueprint_json["BP"]["Entries"].append(create_miner_json(x, y, (1, 0)))
+    return json_to_blueprint(blueprint_json)
+
+def run_solve(url: str, task_id: str, blueprint: str, timelimit: float) -> None:
+    # start a solve and read its stream until DONE
+    params = urlencode({
+        "task_id": task_id,
+        "with_elevator_bool": "false",
+        "miners_timelimit": timelimit,
+        "saturation_timelimit": 0,
+        "input_miner_blueprint": blueprint,
+    })
+    with urlopen(f"{url}/run_solver_and_stream?{params}") as response:
+        for line in response:
+            if line.strip() == b"data: DONE":
+                break
+
+def bench_event_loop(num_solves: int = 4, num_tiles: int = 2000, timelimit: float = 10.0, port: int = 8765) -> None:
+    url = f"http://127.0.0.1:{port}"
+
+    # start the web server, with its counters and cache in a temporary home
+    env = dict(os.environ, HOME=tempfile.mkdtemp())
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.webapp:app", "--port", str(port), "--log-level", "warning"], env=env)
+    try:
+        # wait until it answers
+        for _ in range(100):
+            try:
+                urlopen(f"{url}/get_stats/").read()
+                break
+            except OSError:
+                sleep(0.1)
+
+        # concurrent solves of different fields (so none of them comes from the cache)
+        threads = []
+        for i in range(num_solves):
+            blueprint = field_blueprint(random_field(num_tiles, seed=i))
+            task_id = urlopen(f"{url}/get_task_id/").read().decode().split('"')[3]
+            threads.append(threading.Thread(target=run_solve, args=(url, task_id, blueprint, timelimit)))
+        for thread in threads:
+            thread.start()
+
+        # latency of a cheap endpoint while the solves run
+        latencies = []
+        while any(thread.is_alive() for thread in threads):
+            start = perf_counter()
+            urlopen(f"{url}/get_stats/").read()
+            latencies.append(perf_counter() - start)
+            sleep(0.05)
+        for thread in threads:
+            thread.join()
+
+        latencies = np.array(latencies) * 1000
+        print(f"{num_solves} solves of {num_tiles} tiles, {len(latencies)} requests to /get_stats/")
+        print(f"p50 {np.percentile(latencies, 50):.1f} ms, p99 {np.percentile(latencies, 99):.1f} ms, max {latencies.max():.1f} ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    # usage: python -m benchmarks.bench_event_loop [solves] [tiles] [timelimit]
+    args = sys.argv[1:]
+    bench_event_loop(
+        num_solves=int(args[0]) if len(args) > 0 else 4,
+        num_tiles=int(args[1]) if len(args) > 1 else 2000,
+        timelimit=float(args[2]) if len(args) > 2 else 10.0)
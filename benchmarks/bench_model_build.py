@@ -0,0 +1,44 @@
+# system
+from time import perf_counter
+import sys
+
+# third party
+import numpy as np
+
+# project
+from app.astroid_solver import AstroidSolver
+
+def random_field(num_tiles: int, seed: int = 0) -> np.ndarray:
+    # grow a random blob of asteroid tiles from the origin
+    rng = np.random.default_rng(seed)
+    tiles = {(0, 0)}
+    frontier = [(0, 0)]
+    while len(tiles) < num_tiles:
+        x, y = frontier[rng.integers(len(frontier))]
+        dx, dy = [(1, 0), (0, 1), (-1, 0), (0, -1)][rng.integers(4)]
+        node = (x + dx, y + dy)
+        if node not in tiles:
+            tiles.add(node)
+            frontier.append(node)
+    return np.array(sorted(tiles))
+
+def bench_model_build(tile_counts: list[int], repeats: int = 3) -> None:
+    print(f"{'tiles':>8} {'variables':>10} {'constraints':>12} {'build (s)':>10} {'us / tile':>10}")
+    for num_tiles in tile_counts:
+        astroid_location = random_field(num_tiles)
+        
+        # best of a few runs
+        best = float("inf")
+        for _ in range(repeats):
+            solver = AstroidSolver()
+            start = perf_counter()
+            solver.add_astroid_locations(astroid_location)
+            best = min(best, perf_counter() - start)
+        
+        proto = solver.model.Proto()
+        print(f"{num_tiles:>8} {len(proto.variables):>10} {len(proto.constraints):>12} {best:>10.3f} {best / num_tiles * 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    # usage: python -m benchmarks.bench_model_build [tile counts...]
+    tile_counts = [int(arg) for arg in sys.argv[1:]] or [100, 250, 500, 1000, 2000, 4000]
+    bench_model_build(tile_counts)
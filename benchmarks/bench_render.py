@@ -0,0 +1,213 @@
+# system
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from io import BytesIO
+from collections import defaultdict
+from typing import List, Tuple, Dict
+import sys
+
+# third party
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+
+# project
+from app.astroid_solver import AstroidSolver, render_result
+from app.greedy_layout import greedy_layout
+from app.var_to_txt import FakeVar
+
+# the renderer before app.plotting, on the global pyplot state, for comparison
+def render_result_pyplot(all_miner_platforms: List[FakeVar],
+                         all_extender_platforms: List[FakeVar],
+                         all_belts: List[FakeVar],
+                         nodes_to_extract: List[Tuple[int, int]] = [],
+                         node_flow_in: Dict[Tuple[int, int], List[FakeVar]] = defaultdict(list),
+                         node_flow_out: Dict[Tuple[int, int], List[FakeVar]] = defaultdict(list),
+                         node_used_by_elevator: Dict[Tuple[int, int], FakeVar] = {}) -> BytesIO:
+    
+    # -------------------------------------------
+    # settings
+    # -------------------------------------------
+    
+    # colors
+    edge_color = 'black'
+    belt_color = 'blue'
+    miner_color = 'green'
+    extender_color = 'orange'
+    extender_belt_color = 'black'
+    elevator_color = 'blue'
+    
+    # from all_belts, extract all nodes
+    all_nodes = set()
+    for belt in all_belts:
+        node = tuple(map(int, belt.VarName.split('_')[1:3]))
+        all_nodes.add(node)
+    
+    # compute x and y limits
+    x_min = min(node[0] for node in all_nodes)
+    x_max = max(node[0] for node in all_nodes)
+    y_min = min(node[1] for node in all_nodes)
+    y_max = max(node[1] for node in all_nodes)
+    
+    # compute number of miners
+    num_miners = sum(1 for miner in all_miner_platforms if miner.X > 0.5)
+    num_extenders = sum(1 for extender in all_extender_platforms if extender.X > 0.5)
+    num_belts = sum(1 for belt in all_belts if belt.X > 0.5)
+    
+    # roughly compute figure size based on the limits
+    width = (x_max - x_min + 5) / 3
+    height = (y_max - y_min + 5) / 3
+    
+    # initialize plt
+    plt.clf()
+    plt.figure(figsize=(width, height))
+    plt.xlim(x_min - 1, x_max + 1)
+    plt.ylim(y_min - 1, y_max + 1)
+    # plt.grid(True)
+    plt.xticks(range(x_min - 1, x_max + 2))
+    plt.yticks(range(y_min - 1, y_max + 2))
+    plt.gca().set_aspect('equal', adjustable='box')
+    # include first optimization objective in the title
+    plt.title("Asteroid Miner Solution = " + str(num_miners) + " miners, " + str(num_extenders) + " extenders, " + str(num_belts) + " belts")
+    plt.xlabel("X-axis")
+    plt.ylabel("Y-axis")
+    # plt.axhline(0, color='black', lw=0.5)
+    # plt.axvline(0, color='black', lw=0.5)
+    
+    # draw nodes to extract
+    plt.scatter(*zip(*nodes_to_extract), color='lightgrey', s=150, marker='s', zorder = 0)
+        
+    # draw elevator nodes
+    for node, elevator in node_used_by_elevator.items():
+        if elevator.X > 0.5:
+            plt.scatter(node[0], node[1], color=elevator_color, marker='x', s=150, zorder=2)
+    
+    # draw belts
+    for belt in all_belts:
+        if belt.X > 0.5:  # if the belt is placed
+            start_node = tuple(map(int, belt.VarName.split('_')[1:3]))
+            end_node = tuple(map(int, belt.VarName.split('_')[3:5]))
+            plt.plot([start_node[0], end_node[0]], [start_node[1], end_node[1]], color=belt_color, linewidth=2, zorder = 1)
+    
+    # draw miners
+    used_miner_nodes = set()
+    for miner in all_miner_platforms:
+        if miner.X > 0.5:  # if the miner is placed
+            start_node = tuple(map(int, miner.VarName.split('_')[1:3]))
+            end_node = tuple(map(int, miner.VarName.split('_')[3:5]))
+            used_miner_nodes.add(start_node)
+            
+            # compute direction
+            direction = (end_node[0] - start_node[0], end_node[1] - start_node[1])
+
+            if direction == (1, 0):  # right
+                marker = '>'
+            elif direction == (0, 1):  # up
+                marker = '^'
+            elif direction == (-1, 0):  # left
+                marker = '<'
+            elif direction == (0, -1):  # down
+                marker = 'v'
+            else:
+                marker = '.'
+            
+            # draw miner
+            plt.scatter(start_node[0], start_node[1], color=miner_color, marker=marker, s=80, edgecolors=edge_color, zorder=2)
+            
+            # draw line to belt
+            plt.plot([start_node[0], end_node[0]], [start_node[1], end_node[1]], color=belt_color, linewidth=2, zorder = 1)
+            
+    # draw extenders
+    for extender in all_extender_platforms:
+        if extender.X > 0.5:  # if the extender is placed
+            start_node = tuple(map(int, extender.VarName.split('_')[1:3]))
+            end_node = tuple(map(int, extender.VarName.split('_')[3:5]))
+            
+            # draw extender
+            plt.scatter(start_node[0], start_node[1], color=extender_color, marker='o', s=80, edgecolors=edge_color, zorder=2)
+            
+            # draw line to miner or extender
+            plt.plot([start_node[0], end_node[0]], [start_node[1], end_node[1]], color=extender_belt_color, linewidth=1, zorder = 1)
+    
+    # draw flow out values for miner node
+    for node, flows in node_flow_out.items():
+        if node not in used_miner_nodes:
+            continue
+        for flow in flows:
+            if flow.X > 0.5:  # if the flow is placed
+                # get end node
+                end_node = tuple(map(int, flow.VarName.split('_')[3:5]))
+                
+                # get flow value
+                flow_value = flow.X
+                
+                # put text on the flow direction, lean more towards the start node
+                mid_x = (node[0] + end_node[0]) / 2
+                mid_y = (node[1] + end_node[1]) / 2
+                plt.text(mid_x, mid_y, f"{flow_value:.0f}", fontsize=15, ha='center', va='center', color=belt_color, zorder=3)
+    
+    # add legend
+    plt.tight_layout()
+        
+    # return the figure as a PNG image blob
+    buffer = BytesIO()
+    plt.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close()
+    buffer.seek(0)
+    
+    # return
+    return buffer
+    
+def grid_solver(size: int) -> AstroidSolver:
+    # a square field with the greedy layout, as a stand in for a solved field
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size))
+    astroid_location = np.column_stack([xs.ravel(), ys.ravel()])
+    layout = greedy_layout(astroid_location)
+    platforms = [[kind, *start, *end, 1] for kind in ["miner", "extender", "belt"] for start, end in layout[f"{kind}s"].items()]
+    platforms += [["flow", *start, *end, flow] for (start, end), flow in layout["flows"].items()]
+    solver = AstroidSolver()
+    solver.set_layout(astroid_location, {"platforms": platforms, "elevators": []})
+    return solver
+
+def render_args(solver: AstroidSolver) -> Tuple[tuple, tuple]:
+    # the arguments of the reference renderer (one FakeVar per used element) and of render_result
+    solution = solver.solution
+    node_flow_in = defaultdict(list)
+    node_flow_out = defaultdict(list)
+    for flow in solution.flows.to_vars("flow"):
+        x, y, x2, y2 = map(int, flow.VarName.split('_')[1:5])
+        node_flow_out[(x, y)].append(flow)
+        node_flow_in[(x2, y2)].append(flow)
+    node_used_by_elevator = {(x, y): FakeVar(VarName=f"elevator_{x}_{y}", X=1) for x, y in solution.elevators.tolist()}
+    pyplot_args = (solution.miners.to_vars("miner"), solution.extenders.to_vars("extender"), solution.belts.to_vars("belt"),
+                   solver.nodes_to_extract, node_flow_in, node_flow_out, node_used_by_elevator)
+    return pyplot_args, (solution, solver.nodes_to_extract)
+
+def bench_render(sizes: list[int], repeats: int = 3, threads: int = 4) -> None:
+    print(f"{'grid':>9} {'pyplot (ms)':>12} {'figure (ms)':>12} {'speedup':>8} {f'{threads} threads (ms / image)':>24}")
+    for size in sizes:
+        pyplot_args, args = render_args(grid_solver(size))
+        
+        # best of a few runs of each renderer
+        timings = []
+        for render, render_arguments in [(render_result_pyplot, pyplot_args), (render_result, args)]:
+            best = float("inf")
+            for _ in range(repeats):
+                start = perf_counter()
+                render(*render_arguments)
+                best = min(best, perf_counter() - start)
+            timings.append(best * 1000)
+        
+        # the same images from several threads at once, only possible with the figure renderer
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            start = perf_counter()
+            list(executor.map(lambda _: render_result(*args), range(threads * repeats)))
+            parallel = (perf_counter() - start) / (threads * repeats) * 1000
+        
+        print(f"{f'{size}x{size}':>9} {timings[0]:>12.0f} {timings[1]:>12.0f} {timings[0] / timings[1]:>7.1f}x {parallel:>24.0f}")
+
+if __name__ == "__main__":
+    # usage: python -m benchmarks.bench_render [grid sizes...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 200]
+    bench_render(sizes)
@@ -1,4 +1,8 @@
 #!/bin/bash
 source /home/ubuntu/miniconda3/etc/profile.d/conda.sh
 conda activate shapez2
-exec uvicorn app.webapp:app --host 0.0.0.0 --port 8000 --reload --log-config app/custom_logging/logging_config.yaml
\ No newline at end of file
+
+# several web workers share the tasks through a SQLite file, and split the cores between their solvers
+export WEB_WORKERS=${WEB_WORKERS:-2}
+export TASK_BACKEND=${TASK_BACKEND:-sqlite}
+exec uvicorn app.webapp:app --host 0.0.0.0 --port 8000 --workers $WEB_WORKERS --log-config app/custom_logging/logging_config.yaml
\ No newline at end of file
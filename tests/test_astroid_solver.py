@@ -0,0 +1,180 @@
+# system
+from typing import Tuple
+
+# third party
+import numpy as np
+import pytest
+from ortools.sat.python import cp_model
+
+# project
+from app.astroid_solver import AstroidSolver, SolverParameters, get_miner_throughput, remove_non_saturated_miners_func
+from app.greedy_layout import greedy_layout
+from app.solution import DIRECTIONS, Edges
+
+def remove_non_saturated_miners_reference(miners: Edges, extenders: Edges) -> Tuple[Edges, Edges]:
+    # the implementation before get_miner_throughput, quadratic in the number of extenders
+    miner_nodes = [tuple(node) for node in miners.nodes.tolist()]
+    extender_nodes = [tuple(node) for node in extenders.nodes.tolist()]
+    extension_maps = dict(zip(extender_nodes, map(tuple, extenders.ends.tolist())))
+    for start_node, end_node in extension_maps.items():
+        while end_node in extension_maps:
+            end_node = extension_maps[end_node]
+        extension_maps[start_node] = end_node
+
+    miner_to_extension_count = {}
+    for miner_node in miner_nodes:
+        count = sum(1 for start_node, end_node in extension_maps.items() if end_node == miner_node)
+        miner_to_extension_count[miner_node] = count
+
+    miners_not_saturated = [miner_node for miner_node in miner_nodes if miner_to_extension_count[miner_node] < 3]
+    extension_not_saturated = [start_node for start_node, end_node in extension_maps.items() if end_node in miners_not_saturated]
+    keep_miners = np.array([node not in miners_not_saturated for node in miner_nodes], dtype=bool)
+    keep_extenders = np.array([node not in extension_not_saturated for node in extender_nodes], dtype=bool)
+    return miners.select(keep_miners), extenders.select(keep_extenders)
+
+def random_layout(seed: int, size: int = 12) -> Tuple[Edges, Edges]:
+    # miners and extenders on distinct tiles of a square, the extenders in chains without loops
+    # (the reference implementation does not end on a loop)
+    rng = np.random.default_rng(seed)
+    tiles = [(x, y) for x in range(size) for y in range(size)]
+    order = rng.permutation(len(tiles))
+    num_miners = rng.integers(1, len(tiles) // 4)
+    miners = {tiles[i]: rng.integers(4) for i in order[:num_miners]}
+
+    extenders = {}
+    for i in order[num_miners:]:
+        node = tiles[i]
+        direction = rng.integers(4)
+        end = (node[0] + DIRECTIONS[direction][0], node[1] + DIRECTIONS[direction][1])
+        while end in extenders and end != node:
+            end = (end[0] + DIRECTIONS[extenders[end]][0], end[1] + DIRECTIONS[extenders[end]][1])
+        if end != node and rng.random() < 0.8:
+            extenders[node] = direction
+
+    def to_edges(elements: dict) -> Edges:
+        return Edges(np.array(list(elements.keys())), np.array(list(elements.values())))
+    return to_edges(miners), to_edges(extenders)
+
+def assert_same_edges(edges: Edges, expected: Edges) -> None:
+    np.testing.assert_array_equal(edges.nodes, expected.nodes)
+    np.testing.assert_array_equal(edges.directions, expected.directions)
+
+@pytest.mark.parametrize("seed", range(50))
+def test_remove_non_saturated_miners_matches_the_reference(seed):
+    miners, extenders = random_layout(seed)
+    kept_miners, kept_extenders = remove_non_saturated_miners_func(miners, extenders)
+    expected_miners, expected_extenders = remove_non_saturated_miners_reference(miners, extenders)
+    assert_same_edges(kept_miners, expected_miners)
+    assert_same_edges(kept_extenders, expected_extenders)
+
+def test_extenders_in_a_loop_feed_no_miner():
+    # two extenders facing each other above a miner, and a chain of three feeding it from below
+    miners = Edges(np.array([(0, 0)]), np.array([0]))
+    extenders = Edges(np.array([(0, 1), (0, 2), (0, -1), (0, -2), (0, -3)]), np.array([1, 3, 1, 1, 1]))
+    throughput, extender_miners = get_miner_throughput(miners, extenders)
+    assert throughput.tolist() == [4]
+    assert extender_miners.tolist() == [-1, -1, 0, 0, 0]
+
+def square_field(size: int, x0: int = 0, y0: int = 0) -> np.ndarray:
+    xs, ys = np.meshgrid(np.arange(x0, x0 + size), np.arange(y0, y0 + size))
+    return np.column_stack([xs.ravel(), ys.ravel()])
+
+def solve(solver: AstroidSolver, astroid_location: np.ndarray, miners_timelimit: float = 2.0, saturation_timelimit: float = 1.0, **kwargs) -> AstroidSolver:
+    solver.add_astroid_locations(astroid_location, with_elevator=False, **kwargs)
+    solver.run_solver(miners_timelimit, saturation_timelimit, log_callback=lambda line: None, solver_parameters=SolverParameters(num_search_workers=2))
+    return solver
+
+def test_solve_is_complete_unless_stopped_or_incremental():
+    solver = solve(AstroidSolver(), square_field(8))
+    assert solver.has_solution
+    assert solver.is_complete()
+
+    # after an edit only the tiles around it are solved again
+    solve(solver, square_field(8)[1:])
+    assert solver.metrics["incremental"]
+    assert not solver.is_complete()
+
+    # a stopped solve keeps the greedy layout
+    stopped = AstroidSolver()
+    stopped.stop()
+    solve(stopped, square_field(8))
+    assert stopped.has_solution
+    assert not stopped.is_complete()
+
+def get_extractor_nodes(solver: AstroidSolver) -> list:
+    # the tiles of the miners and extenders of the solution
+    return [(x, y) for kind, x, y, _, _, _ in solver.get_layout()["platforms"] if kind in ["miner", "extender"]]
+
+def test_saturation_phase_keeps_the_extractors_of_the_first_phase():
+    solver = solve(AstroidSolver(), square_field(6))
+    miners_search, saturation_search = solver.metrics["searches"]
+    assert [miners_search["phase"], saturation_search["phase"]] == ["miners", "saturation"]
+    assert len(get_extractor_nodes(solver)) >= miners_search["objective"]
+
+def test_saturation_phase_is_skipped_without_time():
+    solver = solve(AstroidSolver(), square_field(6), saturation_timelimit=0.0)
+    assert [search["phase"] for search in solver.metrics["searches"]] == ["miners"]
+
+def test_saturation_phase_starts_from_the_greedy_layout_without_a_first_phase():
+    solver = solve(AstroidSolver(), square_field(6), miners_timelimit=0.0)
+    greedy = greedy_layout(square_field(6))
+    assert [search["phase"] for search in solver.metrics["searches"]] == ["miners", "saturation"]
+    assert len(get_extractor_nodes(solver)) >= len(greedy["miners"]) + len(greedy["extenders"])
+
+def test_separate_clusters_are_solved_separately():
+    clusters = [square_field(4), square_field(4, x0=10)]
+    solver = solve(AstroidSolver(), np.vstack(clusters))
+    assert len(solver.components) == 2
+    assert solver.metrics["clusters"] == 2
+    extractor_nodes = set(get_extractor_nodes(solver))
+    for cluster in clusters:
+        assert extractor_nodes & set(map(tuple, cluster.tolist()))
+
+def test_windows_improve_on_the_greedy_layout():
+    solver = AstroidSolver()
+    solver.window_size = 4
+    solve(solver, square_field(10), miners_timelimit=3.0)
+    greedy = greedy_layout(square_field(10))
+    extractor_nodes = get_extractor_nodes(solver)
+    assert [search["phase"] for search in solver.metrics["searches"]] == ["windows"]
+    assert len(extractor_nodes) >= len(greedy["miners"]) + len(greedy["extenders"])
+    assert len(set(extractor_nodes)) == len(extractor_nodes)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_greedy_layout_is_feasible(seed):
+    # random fields with holes, the model with the decisions of the greedy layout must have a solution
+    rng = np.random.default_rng(seed)
+    field = square_field(8)
+    field = field[rng.random(len(field)) < 0.8]
+    solver = AstroidSolver()
+    solver.add_astroid_locations(field, with_elevator=False, decompose=False)
+    values, _ = solver.get_greedy_values()
+    model = solver.model.Clone()
+    _, _, decision_index = solver.get_decision_variables()
+    for index in decision_index.tolist():
+        var = model.GetIntVarFromProtoIndex(index)
+        model.Add(var == int(values[index]))
+    cp_solver = cp_model.CpSolver()
+    cp_solver.parameters.max_time_in_seconds = 10.0
+    assert cp_solver.Solve(model) in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+
+def test_incremental_solve_keeps_the_layout_away_from_the_edit():
+    solver = solve(AstroidSolver(), square_field(12))
+    previous = solver.get_layout()["platforms"]
+
+    # remove a corner tile, only the tiles around it and downstream of them may change
+    field = square_field(12)
+    field = field[~np.all(field == (0, 0), axis=1)]
+    solve(solver, field)
+    assert [search["phase"] for search in solver.metrics["searches"]] == ["incremental"]
+
+    next_node = {(x, y): (x2, y2) for kind, x, y, x2, y2, _ in previous if kind != "flow"}
+    free_nodes = {(x, y) for x in range(4) for y in range(4)}
+    for node in list(free_nodes):
+        node = next_node.get(node)
+        while node is not None and node not in free_nodes:
+            free_nodes.add(node)
+            node = next_node.get(node)
+    platforms = {tuple(platform) for platform in solver.get_layout()["platforms"] if platform[0] != "flow"}
+    kept = {tuple(platform) for platform in previous if platform[0] != "flow" and tuple(platform[1:3]) not in free_nodes}
+    assert kept <= platforms
@@ -0,0 +1,47 @@
+# third party
+import numpy as np
+import pytest
+
+# project
+from app.blueprint_composer import (blueprint_to_json, compose_blueprint, create_empty_blueprint_json, create_miner_json,
+                                    iter_blueprint_entries, iter_encoded_blueprint, json_to_blueprint)
+from app.greedy_layout import greedy_layout
+from app.solution import Edges, Solution
+
+def grid_solution(size: int) -> Solution:
+    # the greedy layout of a square field, with an elevator at the end of some miners
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size))
+    layout = greedy_layout(np.column_stack([xs.ravel(), ys.ravel()]))
+    edges = {kind: Edges.from_edges([[*start, *end] for start, end in layout[f"{kind}s"].items()], np.ones(len(layout[f"{kind}s"]))) for kind in ["miner", "extender", "belt"]}
+    return Solution(edges["miner"], edges["extender"], edges["belt"], elevators=edges["miner"].ends[:3])
+
+def blueprint_of(entries: list) -> str:
+    # the blueprint of the entries encoded at once, as before the streaming encoder
+    blueprint_json = create_empty_blueprint_json()
+    blueprint_json["BP"]["Entries"] = entries
+    return json_to_blueprint(blueprint_json)
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 64 * 1024])
+def test_encoded_blueprint_is_the_composed_blueprint(chunk_size):
+    solution = grid_solution(20)
+    entries = list(iter_blueprint_entries(solution))
+    encoded = "".join(iter_encoded_blueprint(entries, chunk_size=chunk_size))
+    assert encoded == compose_blueprint(solution)
+    assert blueprint_to_json(encoded) == blueprint_to_json(blueprint_of(entries))
+    assert encoded.endswith("[]_2$")
+
+def test_encoded_blueprint_decodes_with_a_shared_platform():
+    # the platform of the miners is serialized once and written in every entry
+    platform = {"Entries": [{"T": "Platform", "X": 1}]}
+    entries = []
+    for x in range(10):
+        entry = create_miner_json(x, 0, (1, 0))
+        entry["B"] = platform
+        entries.append(entry)
+    encoded = "".join(iter_encoded_blueprint(entries, chunk_size=50))
+    decoded = blueprint_to_json(encoded)
+    assert decoded == blueprint_to_json(blueprint_of(entries))
+    assert all(entry["B"] == platform for entry in decoded["BP"]["Entries"])
+
+def test_empty_blueprint_decodes():
+    assert blueprint_to_json("".join(iter_encoded_blueprint([]))) == create_empty_blueprint_json()
@@ -0,0 +1,37 @@
+# project
+from app.result_cache import ResultCache
+
+def test_least_recently_used_results_are_evicted_above_max_bytes():
+    cache = ResultCache(max_bytes=10)
+    cache.put(("a", 1, "image"), "aaaa")
+    cache.put(("b", 1, "image"), "bbbb")
+    assert cache.get(("a", 1, "image")) == "aaaa"
+    cache.put(("c", 1, "image"), "cccc")
+    assert list(cache.entries) == [("a", 1, "image"), ("c", 1, "image")]
+    assert cache.get(("b", 1, "image")) is None
+    assert cache.num_bytes == 8
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_result_replaced_under_the_same_key_is_counted_once():
+    cache = ResultCache(max_bytes=10)
+    cache.put(("a", 1, "image"), "aaaa")
+    cache.put(("a", 1, "image"), "aaaaaa")
+    assert cache.num_bytes == 6
+    assert cache.get(("a", 1, "image")) == "aaaaaa"
+
+def test_result_larger_than_the_cache_is_not_kept():
+    cache = ResultCache(max_bytes=10)
+    cache.put(("a", 1, "image"), "aaaa")
+    cache.put(("b", 1, "image"), "b" * 11)
+    assert cache.get(("b", 1, "image")) is None
+    assert cache.get(("a", 1, "image")) == "aaaa"
+
+def test_invalidate_drops_all_results_of_a_task():
+    cache = ResultCache(max_bytes=100)
+    cache.put(("a", 1, "image"), "aaaa")
+    cache.put(("a", 1, "blueprint", True), "aa")
+    cache.put(("b", 1, "image"), "bbbb")
+    cache.invalidate("a")
+    assert list(cache.entries) == [("b", 1, "image")]
+    assert cache.task_keys == {"b": {("b", 1, "image")}}
+    assert cache.num_bytes == 4
@@ -0,0 +1,76 @@
+# third party
+import numpy as np
+import pytest
+
+# project
+from app.solution_cache import SYMMETRIES, SolutionCache, canonicalize
+
+# an asteroid without symmetries, so a layout maps to the other frames in one way only
+ASTROID = np.array([(0, 0), (1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (0, 2), (2, 2)])
+
+def make_layout(num_miners: int) -> dict:
+    # miners on the first tiles facing +x, fed by one extender below the first one
+    platforms = [["miner", x, y, x + 1, y, 1] for x, y in ASTROID[:num_miners].tolist()]
+    platforms += [["extender", 0, 1, 0, 0, 1], ["flow", 0, 0, 1, 0, 2]]
+    return {"platforms": platforms, "elevators": [[3, 0]]}
+
+def move(nodes: np.ndarray, matrix: np.ndarray, shift: tuple) -> np.ndarray:
+    return np.asarray(nodes).reshape(-1, 2) @ matrix.T + np.array(shift)
+
+def move_layout(layout: dict, matrix: np.ndarray, shift: tuple) -> dict:
+    platforms = [[platform[0], *move(platform[1:5], matrix, shift).ravel().tolist(), platform[5]] for platform in layout["platforms"]]
+    return {"platforms": platforms, "elevators": move(layout["elevators"], matrix, shift).tolist()}
+
+def sorted_layout(layout: dict) -> dict:
+    return {"platforms": sorted(layout["platforms"]), "elevators": sorted(layout["elevators"])}
+
+@pytest.mark.parametrize("matrix", SYMMETRIES)
+def test_canonical_key_is_stable_under_rotations_and_reflections(matrix):
+    key, _, _ = canonicalize(ASTROID)
+    moved = move(ASTROID, matrix, (7, -4))
+    moved_key, moved_matrix, moved_offset = canonicalize(moved[::-1])
+    assert moved_key == key
+
+    # the returned transform maps the moved asteroid to the same canonical tiles
+    _, canonical_matrix, canonical_offset = canonicalize(ASTROID)
+    canonical = {tuple(node) for node in (ASTROID @ canonical_matrix.T - canonical_offset).tolist()}
+    assert {tuple(node) for node in (moved @ moved_matrix.T - moved_offset).tolist()} == canonical
+
+def test_canonical_key_differs_for_another_shape():
+    assert canonicalize(ASTROID)[0] != canonicalize(ASTROID[:-1])[0]
+
+@pytest.mark.parametrize("matrix", SYMMETRIES)
+def test_get_returns_the_layout_in_the_frame_of_the_request(matrix):
+    cache = SolutionCache()
+    layout = make_layout(3)
+    cache.put(ASTROID, False, 10, 10, layout)
+
+    cached = cache.get(move(ASTROID, matrix, (-5, 2)), False, 10, 10)
+    assert sorted_layout(cached) == sorted_layout(move_layout(layout, matrix, (-5, 2)))
+    assert cache.get(ASTROID, True, 10, 10) is None
+
+def test_an_entry_solved_with_shorter_time_limits_is_not_used():
+    cache = SolutionCache()
+    cache.put(ASTROID, False, 10, 5, make_layout(3))
+    assert cache.get(ASTROID, False, 10, 5) is not None
+    assert cache.get(ASTROID, False, 20, 5) is None
+    assert cache.get(ASTROID, False, 10, 6) is None
+
+def test_put_keeps_the_better_layout_and_the_longer_time_limits(tmp_path):
+    cache = SolutionCache(directory=str(tmp_path))
+    better = make_layout(4)
+    cache.put(ASTROID, False, 10, 10, better)
+
+    # a worse solve with longer time limits keeps the better layout, which is as good as that solve
+    cache.put(ASTROID, False, 30, 20, make_layout(2))
+    assert sorted_layout(cache.get(ASTROID, False, 30, 20)) == sorted_layout(better)
+
+    # a better solve replaces it, with the time limits of the stored entry
+    best = make_layout(5)
+    cache.put(ASTROID, False, 1, 1, best)
+    assert sorted_layout(cache.get(ASTROID, False, 30, 20)) == sorted_layout(best)
+
+    # the entry is read back from the directory, also evicted from memory
+    reloaded = SolutionCache(directory=str(tmp_path), max_entries=1)
+    reloaded.put(ASTROID[:-1], False, 1, 1, make_layout(1))
+    assert sorted_layout(reloaded.get(ASTROID, False, 30, 20)) == sorted_layout(best)
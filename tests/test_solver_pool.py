@@ -0,0 +1,75 @@
+# system
+import threading
+import time
+
+# third party
+import pytest
+
+# project
+from app.solver_pool import SolverPool, SolverPoolFullError
+
+class Task:
+    # the callbacks of a submitted solve
+    def __init__(self):
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.log = []
+        self.layout = None
+
+    def submit(self, pool: SolverPool, task_id: str, timelimit: float = 60.0) -> "Task":
+        job = {
+            "astroid_location": [[x, y] for x in range(10) for y in range(10)],
+            "with_elevator": False,
+            "miners_timelimit": timelimit,
+            "saturation_timelimit": timelimit,
+            "window_size": None,
+            "window_min_tiles": 0,
+            "previous": None,
+        }
+        pool.submit(task_id, job, self.started.set, self.log.append, self.on_done)
+        return self
+
+    def on_done(self, layout):
+        self.layout = layout
+        self.done.set()
+
+@pytest.fixture
+def pool():
+    pool = SolverPool(max_running=1, max_queued=1, solver_cores=2, stop_grace_period=5.0)
+    yield pool
+    pool.shutdown()
+
+def test_graceful_cancel_returns_the_best_layout(pool):
+    task = Task().submit(pool, "a")
+    assert task.started.wait(30)
+    time.sleep(2)
+    assert pool.cancel("a")
+    assert task.done.wait(10)
+    assert task.layout is not None
+    assert task.layout["platforms"]
+
+def test_cancel_without_grace_kills_the_solve(pool):
+    task = Task().submit(pool, "a")
+    assert task.started.wait(30)
+    assert pool.cancel("a", graceful=False)
+    assert task.done.wait(10)
+    assert task.layout is None
+
+def test_cancelled_queued_solve_never_runs(pool):
+    running = Task().submit(pool, "a")
+    assert running.started.wait(30)
+    queued = Task().submit(pool, "b")
+    assert pool.num_queued == 1
+    assert pool.cancel("b")
+    pool.cancel("a", graceful=False)
+    assert queued.done.wait(10)
+    assert not queued.started.is_set()
+    assert queued.layout is None
+    assert running.done.wait(10)
+
+def test_full_pool_rejects_solves(pool):
+    assert Task().submit(pool, "a").started.wait(30)
+    Task().submit(pool, "b")
+    with pytest.raises(SolverPoolFullError):
+        Task().submit(pool, "c")
+    assert not pool.cancel("c")
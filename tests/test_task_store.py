@@ -0,0 +1,113 @@
+# system
+from typing import List
+
+# third party
+import pytest
+
+# project
+import app.task_store
+from app.task_store import FINISHED_EVENTS_KEPT, RUNNING_EVENTS_KEPT, SQLiteTaskStore, TaskStore
+
+@pytest.fixture
+def clock(monkeypatch):
+    # the time of the task store, moved by the tests
+    now = [1000.0]
+    monkeypatch.setattr(app.task_store, "time", lambda: now[0])
+    return now
+
+def make_store(removed: List[str], **kwargs) -> TaskStore:
+    return TaskStore(on_remove=removed.append, **kwargs)
+
+def test_least_recently_used_task_is_evicted(clock):
+    removed = []
+    store = make_store(removed, max_tasks=2)
+    store.create("a")
+    store.create("b")
+    store.get("a")
+    store.create("c")
+    assert removed == ["b"]
+    assert list(store.solvers) == ["a", "c"]
+    assert store.evictions == 1
+
+def test_running_task_is_never_evicted(clock):
+    removed = []
+    store = make_store(removed, max_tasks=2)
+    store.create("a")
+    store.start("a")
+    store.create("b")
+    store.create("c")
+    assert removed == ["b"]
+    assert list(store.solvers) == ["a", "c"]
+
+    # once finished it is evicted like the other tasks
+    store.finish("a")
+    store.get("c")
+    store.create("d")
+    assert removed == ["b", "a"]
+    assert list(store.solvers) == ["c", "d"]
+
+def test_tasks_are_evicted_above_max_bytes(clock):
+    removed = []
+    store = make_store(removed, max_bytes=1000)
+    store.create("a")
+    store.create("b")
+    store.start("b")
+    store.publish("b", "x" * 600)
+    assert removed == []
+    store.publish("b", "x" * 600)
+    assert removed == ["a"]
+    assert store.num_bytes == 1200
+
+    # the stream of the running task is over the cap, but it is kept
+    store.create("c")
+    assert removed == ["a", "c"]
+    assert "b" in store.solvers
+
+def test_expired_tasks_are_removed_unless_running(clock):
+    removed = []
+    store = make_store(removed, lifespan=60)
+    store.create("a")
+    store.create("b")
+    store.start("b")
+    clock[0] += 30
+    store.create("c")
+    clock[0] += 31
+    store.expire()
+    assert removed == ["a"]
+    assert store.expirations == 1
+
+    # an expired task is not returned
+    clock[0] += 61
+    assert store.get("c") is None
+    assert removed == ["a", "c"]
+    assert store.get("b") is not None
+
+def test_stream_is_capped_and_trimmed_when_finished(clock):
+    store = TaskStore()
+    store.create("a")
+    store.start("a")
+    for i in range(RUNNING_EVENTS_KEPT + 10):
+        store.publish("a", str(i))
+    events, running = store.read_events("a")
+    assert running
+    assert len(events) == RUNNING_EVENTS_KEPT
+    assert events[0] == (11, "10")
+
+    store.finish("a")
+    events, running = store.read_events("a")
+    assert not running
+    assert len(events) == FINISHED_EVENTS_KEPT
+    assert store.event_bytes["a"] == sum(len(message) for _, message in events)
+
+def test_sqlite_store_evicts_the_least_recently_used_task_that_is_not_running(clock, tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.sqlite"), max_tasks=2, flush_interval=3600)
+    store.create("a")
+    store.start("a")
+    clock[0] += 1
+    store.create("b")
+    clock[0] += 1
+    store.create("c")
+    assert store.evictions == 1
+    with store.connect() as connection:
+        assert sorted(row[0] for row in connection.execute("SELECT task_id FROM tasks")) == ["a", "c"]
+    assert store.start("a") is None
@@ -0,0 +1,116 @@
+# system
+import os
+import re
+import threading
+import time
+
+# third party
+import pytest
+from fastapi.testclient import TestClient
+
+# project
+from app.astroid_parser import get_brush_blueprint
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # the app keeps its counters and caches in the home directory, read when it is imported
+    home = os.environ.get("HOME")
+    os.environ["HOME"] = str(tmp_path_factory.mktemp("home"))
+    try:
+        from app.webapp import app
+    finally:
+        if home is not None:
+            os.environ["HOME"] = home
+    with TestClient(app) as client:
+        yield client
+
+def new_task(client: TestClient) -> str:
+    return client.get("/get_task_id/").json()["task_id"]
+
+def split_events(text: str) -> list:
+    # the lines of each server-sent event (log lines of several lines are followed by more than one blank line)
+    return [block.split("\n") for block in re.split(r"\n\n+", text) if block]
+
+def run_solver(client: TestClient, task_id: str, timelimit: float = 1.0, brush_size: int = 6) -> list:
+    # the first line of each message of the solve, once it is done (without the improving solutions)
+    params = {
+        "task_id": task_id,
+        "with_elevator_bool": False,
+        "miners_timelimit": timelimit,
+        "saturation_timelimit": timelimit,
+        "input_miner_blueprint": get_brush_blueprint(brush_size),
+    }
+    response = client.get("/run_solver_and_stream", params=params)
+    assert response.status_code == 200
+    return [lines[0] for lines in split_events(response.text) if lines[0].startswith("data: ")]
+
+def test_cancel_task_without_a_solve(client):
+    response = client.post("/cancel_task/", data={"task_id": new_task(client)})
+    assert response.status_code == 404
+
+def test_cancel_task_keeps_the_best_solution(client):
+    task_id = new_task(client)
+    messages = []
+    solve = threading.Thread(target=lambda: messages.extend(run_solver(client, task_id, timelimit=60.0, brush_size=7)))
+    solve.start()
+
+    # cancel once the solver process runs, before that there is no solution to keep
+    deadline = time.time() + 30
+    while client.get("/get_stats/").json()["current_running_tasks_num"] == 0 and time.time() < deadline:
+        time.sleep(0.2)
+    time.sleep(1)
+    response = client.post("/cancel_task/", data={"task_id": task_id})
+    assert response.json() == {"task_id": task_id, "cancelled": True}
+
+    solve.join(30)
+    assert not solve.is_alive()
+    assert messages[-1] == "data: DONE"
+    response = client.post("/get_solver_results", data={"task_id": task_id, "remove_non_saturated_miners": False})
+    assert response.status_code == 200
+
+def count_solves(client: TestClient) -> int:
+    lines = client.get("/metrics").text.split("\n")
+    return sum(int(line.split()[-1]) for line in lines if line.startswith("astroid_solves_total{"))
+
+def test_metrics_count_the_solves(client):
+    solves = count_solves(client)
+    task_id = new_task(client)
+    run_solver(client, task_id, brush_size=5)
+    assert count_solves(client) == solves + 1
+
+    metrics = client.get(f"/task_metrics/{task_id}").json()
+    assert metrics["tiles"] == 25
+    assert client.get(f"/task_metrics/{new_task(client)}").status_code == 404
+
+def test_solver_drawing_has_the_arrays_of_the_solution(client):
+    task_id = new_task(client)
+    response = client.post("/get_solver_drawing", data={"task_id": task_id, "remove_non_saturated_miners": False})
+    assert response.status_code == 404
+
+    run_solver(client, task_id)
+    response = client.post("/get_solver_drawing", data={"task_id": task_id, "remove_non_saturated_miners": False})
+    assert response.status_code == 200
+    drawing = response.json()["drawing"]
+    assert set(drawing) == {"tiles", "miners", "extenders", "belts", "elevators", "flows", "throughput"}
+    assert len(drawing["tiles"]) == 2 * 36
+    assert len(drawing["miners"]) == 3 * len(drawing["throughput"]) > 0
+    assert len(drawing["extenders"]) % 3 == 0
+    assert len(drawing["flows"]) % 4 == 0
+
+def read_task_stream(client: TestClient, task_id: str, after: int = 0) -> list:
+    # the (id, lines) of the events of the stream
+    response = client.get("/task_stream", params={"task_id": task_id, "after": after})
+    return [(int(lines[0][len("id: "):]), lines[1:]) for lines in split_events(response.text) if lines[0].startswith("id: ")]
+
+def test_task_stream_replays_the_messages_of_the_solve(client):
+    task_id = new_task(client)
+    messages = run_solver(client, task_id, brush_size=8)
+    events = read_task_stream(client, task_id)
+    assert events[-1][1] == ["data: DONE"]
+
+    # the latest messages, the oldest ones of a long log are dropped
+    replayed = [lines[0] for _, lines in events if lines[0].startswith("data: ")]
+    assert replayed == messages[-len(replayed):]
+
+    # a reconnecting page only gets the messages after the last one it received
+    assert read_task_stream(client, task_id, after=events[-2][0]) == events[-1:]